@@ -1,16 +1,17 @@
 import tkinter as tk
 from tkinter import filedialog, messagebox
 import tkinter.ttk as ttk
-import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
+
+from plateplanner import PlateMap
+from plateplanner.csvio import read_plate, write_csv
+from plateplanner.render import render_plate
 
 class PCRPlannerApp:
     def __init__(self, root):
         self.root = root
         self.root.title("PCR Planner")
         
-        self.samples = pd.DataFrame(np.full((8, 12), ""), columns=[f"Col{i+1}" for i in range(12)], index=[f"Row{chr(65+i)}" for i in range(8)])
+        self.plate = PlateMap()
         
         self.create_widgets()
     
@@ -28,9 +29,9 @@ class PCRPlannerApp:
         main_frame.add(self.plate_frame)
 
         self.plate_buttons = {}
-        for row in range(8):
+        for row in range(self.plate.rows):
             self.plate_frame.grid_rowconfigure(row, weight=1)
-            for col in range(12):
+            for col in range(self.plate.cols):
                 self.plate_frame.grid_columnconfigure(col, weight=1)
                 button = tk.Button(self.plate_frame, text="", width=10, height=10,
                                    command=lambda r=row, c=col: self.edit_sample(r, c))
@@ -66,27 +67,16 @@ class PCRPlannerApp:
 
         self.tree.grid(row=2, column=0, sticky="nsew")
 
-        self.initialize_dataframe()
         self.update_plate()
         self.update_treeview()
 
-    def initialize_dataframe(self):
-        pos_list = [f"{chr(65+row)}{col+1}" for row in range(8) for col in range(12)]
-        self.samples = pd.DataFrame({
-            "pos": pos_list,
-            "sample": [""] * 96,
-            "primers": [""] * 96
-        })
-        self.samples.set_index('pos', inplace=True)
-
     def edit_sample(self, row, col):
-        pos = f"{chr(65+row)}{col+1}"
+        pos, = self.plate.label([row], [col])
         sample_name = tk.simpledialog.askstring("Input", f"Enter sample name for position {pos}:")
         primer_name = tk.simpledialog.askstring("Input", f"Enter primers for position {pos}:")
 
         if sample_name is not None and primer_name is not None:
-            self.samples.loc[pos, "sample"] = sample_name
-            self.samples.loc[pos, "primers"] = primer_name
+            self.plate.set(pos, sample_name, primer_name)
             self.update_plate()
             self.update_treeview()
         
@@ -94,35 +84,19 @@ class PCRPlannerApp:
         for i in self.tree.get_children():
             self.tree.delete(i)
         
-        df_with_blanks = self.samples.fillna("")
-        for pos, row in df_with_blanks.iterrows():
-            self.tree.insert("", "end", values=(pos, row["sample"], row["primers"]))
+        for record in self.plate.records():
+            self.tree.insert("", "end", values=record)
 
     def update_plate(self):
         for (row, col), button in self.plate_buttons.items():
-            pos = f"{chr(65+row)}{col+1}"
-            sample = self.samples.loc[pos, "sample"]
+            sample = self.plate.sample[row, col]
             button.config(text=sample, font=("Helvetica", 10))  # Adjust font size as needed
     
     def load_csv(self):
         file_path = filedialog.askopenfilename(filetypes=[("CSV files", "*.csv")])
         if file_path:
             try:
-                df = pd.read_csv(file_path, dtype=str, keep_default_na=False)
-                required_columns1 = {"pos", "sample", "primers"}
-                required_columns2 = {"row", "col", "sample", "primers"}
-                # if not (required_columns1.issubset(df.columns) or required_columns2.issubset(df.columns)):
-                #     messagebox.showerror("Error", "CSV file is missing required columns.")
-                #     return
-                if required_columns2.issubset(df.columns):
-                    df["pos"] = df["row"].astype(str) + df["col"].astype(str)
-                    print(df)
-                elif not required_columns1.issubset(df.columns):
-                    messagebox.showerror("Error", "CSV file is missing required columns.")
-                    return
-
-                df.set_index("pos", inplace=True)
-                self.samples = df
+                self.plate = read_plate(file_path, self.plate.geometry)
                 self.update_plate()
                 self.update_treeview()
             except Exception as e:
@@ -131,24 +105,18 @@ class PCRPlannerApp:
     def save_csv(self):
         file_path = filedialog.asksaveasfilename(defaultextension=".csv", filetypes=[("CSV files", "*.csv")])
         if file_path:
-            self.samples.to_csv(file_path)
+            write_csv(self.plate, file_path)
             messagebox.showinfo("Save CSV", f"CSV saved to {file_path}")
     
     def save_plate_map(self):
-        fig, ax = plt.subplots()
-        ax.axis('tight')
-        ax.axis('off')
-        table = ax.table(cellText=self.samples.values, colLabels=self.samples.columns, rowLabels=self.samples.index, cellLoc='center', loc='center')
-        table.auto_set_font_size(False)
-        table.set_fontsize(10)
-        fig.tight_layout()
-        file_path = filedialog.asksaveasfilename(defaultextension=".png", filetypes=[("PNG files", "*.png")])
+        file_path = filedialog.asksaveasfilename(defaultextension=".png", filetypes=[
+            ("PNG files", "*.png"), ("SVG files", "*.svg"), ("PDF files", "*.pdf")])
         if file_path:
-            plt.savefig(file_path)
-            plt.close()
-            messagebox.showinfo("Save Plate Map", f"Plate map saved to {file_path}")
-        else:
-            plt.close()
+            try:
+                render_plate(self.plate, file_path)
+                messagebox.showinfo("Save Plate Map", f"Plate map saved to {file_path}")
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to save plate map: {e}")
 
 if __name__ == "__main__":
     root = tk.Tk()
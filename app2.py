@@ -1,5 +1,3 @@
-import matplotlib.pyplot as plt
-from matplotlib.colors import to_hex
 import numpy as np
 import pandas as pd
 import tkinter as tk
@@ -7,6 +5,9 @@ from tkinter import filedialog, messagebox
 import tkinter.ttk as ttk
 from tkmacosx import Button
 
+from plateplanner.colours import ColourMap
+from plateplanner.trace import traced
+
 # https://realpython.com/python-gui-tkinter/#building-your-first-python-gui-application-with-tkinter
 
 class InputWindow():
@@ -50,8 +51,9 @@ class PlatePlannerApp:
 
         row = [chr(65+i) for i in range(8)] * 12
         col = np.repeat(range(1, 13), 8)
-        self.data = pd.DataFrame(np.full((96, 2), ""), columns=["sample", "primers"], index=[f"{r}{c}" for r, c in zip(row, col)])
+        self.data = pd.DataFrame(np.full((96, 2), "", dtype=object), columns=["sample", "primers"], index=[f"{r}{c}" for r, c in zip(row, col)])
         self.selected_cells = set()
+        self.colours = ColourMap()
 
         self.create_widgets()
 
@@ -120,12 +122,11 @@ class PlatePlannerApp:
             self.update_table()
 
     def get_colour_map(self):
-        primers = self.data["primers"].unique()
-        primers = [i for i in primers if i]
-        cmap = plt.get_cmap("tab20", len(primers))
-        colour_map = {primer: to_hex(cmap(i)) for i, primer in enumerate(primers)}
-        return colour_map
+        # Only primers that appeared or disappeared since the last call change the map
+        self.colours.update(self.data["primers"].unique())
+        return self.colours
 
+    @traced("app.update_plate", "ui")
     def update_plate(self):
         colour_map = self.get_colour_map()
         # print(colour_map)
@@ -134,9 +135,10 @@ class PlatePlannerApp:
             sample = self.data.loc[pos, "sample"]
             primers = self.data.loc[pos, "primers"]
 
-            colour = colour_map.get(primers, "white")
+            colour = colour_map.colour(primers)
             button.config(text=sample, font=("Helvetica", 10), highlightbackground=colour)
 
+    @traced("app.update_table", "ui")
     def update_table(self):
         for i in self.table.get_children():
             self.table.delete(i)
@@ -144,6 +146,7 @@ class PlatePlannerApp:
         for pos, row in self.data.iterrows():
             self.table.insert("", "end", values=(pos, row["sample"], row["primers"]))
 
+    @traced("app.load_data", "ui")
     def load_csv(self):
         file_path = filedialog.askopenfilename(filetypes=[("CSV files", "*.csv")])
         self.root.focus_force()
@@ -1,17 +1,20 @@
-import numpy as np
-import pandas as pd
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QPushButton, QTableWidget, QTableWidgetItem, QFileDialog, QMessageBox,
+    QPushButton, QTableView, QFileDialog, QMessageBox,
     QDialog, QLabel, QLineEdit, QGridLayout, QMenu
 )
 from PySide6.QtCore import Qt, QMimeData
-from PySide6.QtGui import QDrag, QAction
+from PySide6.QtGui import QDrag, QAction, QKeySequence
+
+from plateplanner import History, PlateMap
+from plateplanner.colours import ColourMap
+from plateplanner.csvio import read_plate
+from plateplanner.qt import PlateTableModel, WellListProxy
 
 class InputWindow(QDialog):
-    def __init__(self, parent, data, pos):
+    def __init__(self, parent, plate, pos):
         super().__init__(parent)
-        self.data = data
+        self.plate = plate
         self.pos = pos
 
         self.setWindowTitle(f"Edit {pos}")
@@ -19,15 +22,16 @@ class InputWindow(QDialog):
 
     def create_widgets(self):
         layout = QGridLayout()
+        (sample,), (primers,) = self.plate.get(self.pos)
 
         layout.addWidget(QLabel("Sample"), 0, 0)
         self.sample_entry = QLineEdit()
-        self.sample_entry.setText(self.data.loc[self.pos]["sample"])
+        self.sample_entry.setText(sample)
         layout.addWidget(self.sample_entry, 0, 1)
         
         layout.addWidget(QLabel("Primers"), 1, 0)
         self.primers_entry = QLineEdit()
-        self.primers_entry.setText(self.data.loc[self.pos]["primers"])
+        self.primers_entry.setText(primers)
         layout.addWidget(self.primers_entry, 1, 1)
 
         self.ok_button = QPushButton("OK")
@@ -46,9 +50,11 @@ class PlatePlannerApp(QMainWindow):
         self.setWindowTitle("Plate Planner")
         self.resize(900, 400)
 
-        row = [chr(65+i) for i in range(8)] * 12
-        col = np.repeat(range(1, 13), 8)
-        self.df = pd.DataFrame(np.full((96, 2), ""), columns=["sample", "primers"], index=[f"{r}{c}" for r, c in zip(row, col)])
+        self.plate = PlateMap()
+        self.history = History(self.plate)
+        self.plate_model = PlateTableModel(self.plate, self, colours=ColourMap())
+        self.table_model = WellListProxy(self)
+        self.table_model.setSourceModel(self.plate_model)
 
         self.create_widgets()
 
@@ -62,14 +68,13 @@ class PlatePlannerApp(QMainWindow):
         panel1_layout = QVBoxLayout(panel1)
         panel1_layout.addWidget(QLabel("Plate layout"))
 
-        self.plate_table = QTableWidget(8, 12)
-        self.plate_table.setHorizontalHeaderLabels([str(i) for i in range(1, 13)])
-        self.plate_table.setVerticalHeaderLabels([chr(65+i) for i in range(8)])
-        self.plate_table.setSelectionMode(QTableWidget.MultiSelection)
-        self.plate_table.setEditTriggers(QTableWidget.DoubleClicked)
+        self.plate_table = QTableView()
+        self.plate_table.setModel(self.plate_model)
+        self.plate_table.setSelectionMode(QTableView.MultiSelection)
+        self.plate_table.setEditTriggers(QTableView.NoEditTriggers)
         self.plate_table.setContextMenuPolicy(Qt.CustomContextMenu)
         self.plate_table.customContextMenuRequested.connect(self.show_context_menu)
-        self.plate_table.itemDoubleClicked.connect(self.edit_sample)
+        self.plate_table.doubleClicked.connect(self.edit_sample)
 
         panel1_layout.addWidget(self.plate_table)
         main_layout.addWidget(panel1, 2)
@@ -85,57 +90,45 @@ class PlatePlannerApp(QMainWindow):
         table_frame = QWidget()
         table_layout = QVBoxLayout(table_frame)
         
-        self.table = QTableWidget(0, 3)
-        self.table.setHorizontalHeaderLabels(["pos", "sample", "primers"])
+        # List of wells, a view on the plate model that follows its changes
+        self.table = QTableView()
+        self.table.setModel(self.table_model)
+        self.table.verticalHeader().hide()
         table_layout.addWidget(self.table)
         panel2_layout.addWidget(table_frame)
         main_layout.addWidget(panel2, 1)
 
-        self.update_plate()
-        self.update_table()
+        # Undo/redo
+        undo_action = QAction("Undo", self)
+        undo_action.setShortcut(QKeySequence.Undo)
+        undo_action.triggered.connect(lambda: self.history.undo())
+        self.addAction(undo_action)
+        redo_action = QAction("Redo", self)
+        redo_action.setShortcut(QKeySequence.Redo)
+        redo_action.triggered.connect(lambda: self.history.redo())
+        self.addAction(redo_action)
 
     def edit_sample(self, item):
-        row, col = item.row(), item.column()
-        pos = f"{chr(65+row)}{col+1}"
-        dialog = InputWindow(self, self.df, pos)
+        pos, = self.plate.label([item.row()], [item.column()])
+        dialog = InputWindow(self, self.plate, pos)
         if dialog.exec():
             result = dialog.result
             if result:
-                self.df.loc[pos, "sample"] = result[0]
-                self.df.loc[pos, "primers"] = result[1]
-                self.update_plate()
-                self.update_table()
+                self.plate.set(pos, *result)
 
     def update_plate(self):
-        for row in range(8):
-            for col in range(12):
-                pos = f"{chr(65+row)}{col+1}"
-                sample = self.df.loc[pos, "sample"]
-                item = QTableWidgetItem(sample)
-                self.plate_table.setItem(row, col, item)
-
-    def update_table(self):
-        self.table.setRowCount(0)
-        for pos, row in self.df.iterrows():
-            row_position = self.table.rowCount()
-            self.table.insertRow(row_position)
-            self.table.setItem(row_position, 0, QTableWidgetItem(pos))
-            self.table.setItem(row_position, 1, QTableWidgetItem(row["sample"]))
-            self.table.setItem(row_position, 2, QTableWidgetItem(row["primers"]))
+        # Both views repaint changed wells themselves; this forces a full repaint
+        self.plate_model.refresh()
 
     def load_csv(self):
         file_dialog = QFileDialog(self)
         file_path, _ = file_dialog.getOpenFileName(self, "Open CSV", "", "CSV files (*.csv)")
         if file_path:
             try:
-                df = pd.read_csv(file_path, dtype=str, keep_default_na=False)
-                if "pos" not in df.columns:
-                    df["pos"] = df["row"].astype(str) + df["col"].astype(str)
-                df.set_index("pos", inplace=True)
-
-                self.df = df
-                self.update_plate()
-                self.update_table()
+                self.plate = read_plate(file_path, self.plate.geometry)
+                self.history.close()
+                self.history = History(self.plate)
+                self.plate_model.set_plate(self.plate)
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to load CSV file: {e}")
 
@@ -153,29 +146,23 @@ class PlatePlannerApp(QMainWindow):
         menu.exec(self.plate_table.viewport().mapToGlobal(position))
 
     def bulk_edit(self):
-        selected_items = self.plate_table.selectedItems()
+        selected_items = self.plate_table.selectedIndexes()
         if not selected_items:
             return
 
         sample, primers = "", ""
         item = selected_items[0]
-        row, col = item.row(), item.column()
-        pos = f"{chr(65+row)}{col+1}"
-        dialog = InputWindow(self, self.df, pos)
+        pos, = self.plate.label([item.row()], [item.column()])
+        dialog = InputWindow(self, self.plate, pos)
         if dialog.exec():
             sample, primers = dialog.result
 
-        for item in selected_items:
-            row, col = item.row(), item.column()
-            pos = f"{chr(65+row)}{col+1}"
-            self.df.loc[pos, "sample"] = sample
-            self.df.loc[pos, "primers"] = primers
-
-        self.update_plate()
-        self.update_table()
+        rows = [item.row() for item in selected_items]
+        cols = [item.column() for item in selected_items]
+        self.plate.set((rows, cols), sample, primers)
 
     def swap_cells(self):
-        selected_items = self.plate_table.selectedItems()
+        selected_items = self.plate_table.selectedIndexes()
         if len(selected_items) != 2:
             QMessageBox.warning(self, "Warning", "Select exactly two cells to swap.")
             return
@@ -184,17 +171,7 @@ class PlatePlannerApp(QMainWindow):
         row1, col1 = item1.row(), item1.column()
         row2, col2 = item2.row(), item2.column()
 
-        pos1 = f"{chr(65+row1)}{col1+1}"
-        pos2 = f"{chr(65+row2)}{col2+1}"
-
-        sample1, primers1 = self.df.loc[pos1]
-        sample2, primers2 = self.df.loc[pos2]
-
-        self.df.loc[pos1] = [sample2, primers2]
-        self.df.loc[pos2] = [sample1, primers1]
-
-        self.update_plate()
-        self.update_table()
+        self.plate.swap(([row1], [col1]), ([row2], [col2]))
 
 if __name__ == "__main__":
     app = QApplication([])
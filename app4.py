@@ -1,23 +1,27 @@
-# import matplotlib.colormaps as cmaps
-from matplotlib import cm
-from matplotlib.colors import to_hex
-import numpy as np
-import pandas as pd
 from PySide6.QtWidgets import (
-    QApplication, QWidget, QSplitter, QVBoxLayout, QTableWidget, 
-    QTableWidgetItem, QPushButton, QFileDialog, QMessageBox,
-    QGridLayout, QDialog, QLineEdit, QDialogButtonBox, QSizePolicy,
-    QLabel
+    QApplication, QWidget, QSplitter, QVBoxLayout, QTableView,
+    QPushButton, QFileDialog, QMessageBox,
+    QGridLayout, QDialog, QLineEdit, QDialogButtonBox, QLabel, QComboBox,
+    QPlainTextEdit, QSpinBox, QCheckBox
 )
 from PySide6.QtGui import QShortcut, QKeySequence
-from PySide6.QtCore import Qt, QTimer
+from PySide6.QtCore import Qt, QTimer, QItemSelectionModel
+
+from plateplanner import FORMATS, History, Project
+from plateplanner.colours import ColourMap
+from plateplanner.project import MemoryStore
+from plateplanner.csvio import read_plates, write_csv
+from plateplanner.layout import plan_plates
+from plateplanner.render import render_plate, render_project
+from plateplanner.trace import traced
+from plateplanner.qt import PlateTableModel, PlateView, PositionRole, WellListProxy
 
 class BulkEditDialog(QDialog):
-    def __init__(self, data, positions):
+    def __init__(self, plate, positions):
         super().__init__()
         self.setWindowTitle("Edit Multiple Wells")
-        samples = {data.loc[pos, "sample"] for pos in positions if pos in data.index}
-        primers = {data.loc[pos, "primers"] for pos in positions if pos in data.index}
+        samples, primers = plate.get(positions)
+        samples, primers = set(samples), set(primers)
 
         layout = QGridLayout()
         layout.setColumnStretch(0, 3)
@@ -69,8 +73,47 @@ class SingleEditDialog(QDialog):
     def get_data(self):
         return self.sample.text(), self.primers.text()
 
-class MainWindow(QWidget):
+class PlanDialog(QDialog):
     def __init__(self):
+        super().__init__()
+        self.setWindowTitle("Plan Plates")
+        layout = QGridLayout()
+
+        self.samples = QPlainTextEdit()
+        self.samples.setPlaceholderText("One sample per line")
+        self.primers = QLineEdit()
+        self.primers.setPlaceholderText("Comma separated")
+        self.replicates = QSpinBox()
+        self.replicates.setRange(1, 96)
+        self.controls = QLineEdit("NTC")
+        self.align = QCheckBox("Start each primer at the top of a column")
+        layout.addWidget(QLabel("Samples:"), 0, 0)
+        layout.addWidget(self.samples, 0, 1)
+        layout.addWidget(QLabel("Primers:"), 1, 0)
+        layout.addWidget(self.primers, 1, 1)
+        layout.addWidget(QLabel("Replicates:"), 2, 0)
+        layout.addWidget(self.replicates, 2, 1)
+        layout.addWidget(QLabel("Controls:"), 3, 0)
+        layout.addWidget(self.controls, 3, 1)
+        layout.addWidget(self.align, 4, 1)
+
+        self.button_box = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        self.button_box.accepted.connect(self.accept)
+        self.button_box.rejected.connect(self.reject)
+        layout.addWidget(self.button_box, 5, 0, 1, 2)
+
+        self.setLayout(layout)
+
+    def get_data(self):
+        def names(text, separator):
+            return [name.strip() for name in text.split(separator) if name.strip()]
+        return (
+            names(self.samples.toPlainText(), "\n"), names(self.primers.text(), ","),
+            self.replicates.value(), names(self.controls.text(), ","), self.align.isChecked(),
+        )
+
+class MainWindow(QWidget):
+    def __init__(self, wells=96):
         super().__init__()
         self.setWindowTitle("Plate Planner")
         w,h = 800, 400
@@ -95,45 +138,70 @@ class MainWindow(QWidget):
         self.save_button.clicked.connect(self.save_data)
         self.right_layout.addWidget(self.save_button)
 
-        # Initialise dataframe
-        row = [chr(65+i) for i in range(8)] * 12
-        col = np.repeat(range(1, 13), 8)
-        self.positions = pd.Index([f"{r}{c}" for r, c in zip(row, col)], name="pos")
-        self.data = pd.DataFrame(np.full((96, 2), ""), columns=["sample", "primers"], index=self.positions)
-
-        # Table widget
-        self.table_widget = QTableWidget(self.right_panel)
+        # Buttons to open and save a multi-plate project directory
+        self.open_project_button = QPushButton("Open Project", self.right_panel)
+        self.open_project_button.clicked.connect(self.open_project)
+        self.right_layout.addWidget(self.open_project_button)
+        self.save_project_button = QPushButton("Save Project", self.right_panel)
+        self.save_project_button.clicked.connect(self.save_project)
+        self.right_layout.addWidget(self.save_project_button)
+
+        # Button to export plate maps as images, or the whole project as one PDF
+        self.export_button = QPushButton("Export Map", self.right_panel)
+        self.export_button.clicked.connect(self.export_map)
+        self.right_layout.addWidget(self.export_button)
+
+        # Lay out samples x primers automatically as a new project
+        self.plan_button = QPushButton("Plan Plates", self.right_panel)
+        self.plan_button.clicked.connect(self.plan_plates)
+        self.right_layout.addWidget(self.plan_button)
+
+        # Plate selector; plates are loaded from the project when first opened
+        self.plate_box = QComboBox(self.right_panel)
+        self.plate_box.currentTextChanged.connect(self.open_plate)
+        self.right_layout.addWidget(self.plate_box)
+
+        # Plate format selector
+        self.format_box = QComboBox(self.right_panel)
+        for n in FORMATS:
+            self.format_box.addItem(f"{n}-well", n)
+        self.format_box.setCurrentIndex(list(FORMATS).index(wells))
+        self.format_box.currentIndexChanged.connect(
+            lambda i: self.set_format(self.format_box.itemData(i)))
+        self.right_layout.addWidget(self.format_box)
+
+        # Initialise project with a single blank plate
+        self.project = Project()
+        self.plate = self.project.add("1", geometry=wells)
+        self.positions = self.plate.positions
+        self.history = History(self.plate)
+        # Primer colours follow the plate on show; primers on both plates keep theirs when switching
+        self.colours = ColourMap()
+        self.plate_model = PlateTableModel(self.plate, self, colours=self.colours)
+
+        # Table widget, a list view on the plate model that follows its changes
+        self.table_model = WellListProxy(self)
+        self.table_model.setSourceModel(self.plate_model)
+        self.table_widget = QTableView(self.right_panel)
+        self.table_widget.setModel(self.table_model)
+        self.table_widget.verticalHeader().hide()
         self.right_layout.addWidget(self.table_widget)
         ## Format table
-        self.table_widget.setColumnCount(3)
-        self.table_widget.setHorizontalHeaderLabels(["Position", "Sample", "Primers"])
         self.table_widget.setColumnWidth(0, 50)  # Set width for Position column
         self.table_widget.setColumnWidth(1, 50)  # Set width for Sample column
         self.table_widget.setColumnWidth(2, 50)  # Set width for Primers column
 
-        self.update_table()  # Initialize the table with empty values from data frame
-
         # Set the layout of the window
         layout = QVBoxLayout(self)
         layout.addWidget(self.divider)
         self.setLayout(layout)
 
         # Plate map / grid / right panel
-        self.left_layout = QGridLayout(self.left_panel)
-        self.left_layout.setSpacing(10)
-        # Number of rows and columns
-        num_rows = 1 + 8
-        num_cols = 1 + 12
-
-        # Set equal stretch to all rows and columns
-        for i in range(num_rows):
-            self.left_layout.setRowStretch(i, 1)
-        for j in range(num_cols):
-            self.left_layout.setColumnStretch(j, 1)
-        
-        self.well_buttons = {}
-        self.init_plate_map()
+        self.left_layout = QVBoxLayout(self.left_panel)
+
         self.selected_cells = []
+        self.init_plate_map()
+        self.update_plate_list()
 
         ## Shortcuts
         # Shortcut for closing window
@@ -141,122 +209,190 @@ class MainWindow(QWidget):
         close_kb.activated.connect(self.close)
         deselect_kb = QShortcut(QKeySequence("Ctrl+A"), self)
         deselect_kb.activated.connect(self.deselect_all)
+        # Bulk edit and clear the selected wells
+        bulk_edit_kb = QShortcut(QKeySequence("Ctrl+E"), self)
+        bulk_edit_kb.activated.connect(self.bulk_edit_wells)
+        clear_kb = QShortcut(QKeySequence.Delete, self)
+        clear_kb.activated.connect(self.clear_selected_cells)
+        # Undo/redo
+        undo_kb = QShortcut(QKeySequence.Undo, self)
+        undo_kb.activated.connect(self.history_undo)
+        redo_kb = QShortcut(QKeySequence.Redo, self)
+        redo_kb.activated.connect(self.history_redo)
+
+    def set_format(self, wells):
+        if wells == len(self.plate):
+            return
+        # A new format starts a new single-plate project, so ask before dropping anything
+        if len(self.project) > 1 or self.plate.codes.any():
+            answer = QMessageBox.question(
+                self, "Change Format",
+                f"Start a new project with one {wells}-well plate? "
+                "Unsaved changes to the current project will be lost.")
+            if answer != QMessageBox.Yes:
+                self.show_format(len(self.plate))
+                return
+        project = Project()
+        project.add("1", geometry=wells)
+        self.set_project(project)
+
+    def set_project(self, project):
+        self.project = project
+        self.colours.clear()
+        self.update_plate_list()
+
+    def update_plate_list(self):
+        self.plate_box.blockSignals(True)
+        self.plate_box.clear()
+        self.plate_box.addItems(self.project.ids())
+        self.plate_box.blockSignals(False)
+        if len(self.project):
+            self.open_plate(self.plate_box.currentText())
+
+    @traced("app.open_plate", "ui")
+    def open_plate(self, plate_id):
+        if not plate_id or plate_id not in self.project:
+            return
+        plate = self.project[plate_id]
+        self.show_format(len(plate))
+        self.set_plate(plate)
+
+    def show_format(self, wells):
+        # Follow the plate's format without triggering a reset
+        self.format_box.blockSignals(True)
+        self.format_box.setCurrentIndex(list(FORMATS).index(wells))
+        self.format_box.blockSignals(False)
+
+    def set_plate(self, plate):
+        self.deselect_all()
+        self.plate = plate
+        self.positions = plate.positions
+        self.history.close()
+        self.history = History(plate)
+        self.plate_model.set_plate(plate)
+
+    @traced("app.history_undo", "ui")
+    def history_undo(self):
+        self.deselect_all()
+        self.history.undo()
+
+    @traced("app.history_redo", "ui")
+    def history_redo(self):
+        self.deselect_all()
+        self.history.redo()
 
     def set_sel_mode(self):
         self.sel_mode_idx = (self.sel_mode_idx+1) % len(self.sel_modes)
         self.sel_mode = self.sel_modes[self.sel_mode_idx]
 
-    def update_table(self):
-        self.table_widget.setRowCount(0) # Clear existing rows
-        # Repopulate table
-        self.table_widget.setRowCount(0)
-        for pos, row in self.data.iterrows():
-            row_position = self.table_widget.rowCount()
-            self.table_widget.insertRow(row_position)
-            self.table_widget.setItem(row_position, 0, QTableWidgetItem(pos))
-            self.table_widget.setItem(row_position, 1, QTableWidgetItem(row["sample"]))
-            self.table_widget.setItem(row_position, 2, QTableWidgetItem(row["primers"]))
-
+    @traced("app.update_plate", "ui")
     def update_plate(self):
-        # unique_primers = self.data["primers"].unique()
-        # colormap = cm.get_cmap('tab20', len(unique_primers))  # Using tab20 colormap
-        # primer_to_color = {primer: to_hex(colormap(i)) for i, primer in enumerate(unique_primers)}
-
-        for pos, button in self.well_buttons.items():
-            if pos in self.data.index:
-                # print(pos, button)
-                # button.setText(self.data.loc[pos, "sample"])
-                sample = self.data.loc[pos, "sample"]
-                primers = self.data.loc[pos, "primers"]
-                button.setText(sample)
-                # button.setStyleSheet(f"{self.button_style['default']} background-color: {primer_to_color[primers]};")
-            else:
-                button.setText("")
-                # button.setStyleSheet(self.button_style["default"])
+        # The plate and table models repaint changed wells themselves; this forces a full repaint
+        self.plate_model.refresh()
 
-    def load_data(self, file_path):
+    @traced("app.load_data", "ui")
+    def load_data(self, file_path=None):
         file_path, _ = QFileDialog.getOpenFileName(self, "Open CSV File", "", "CSV Files (*.csv)")
         if file_path:
             try:
-                df = pd.read_csv(file_path, dtype=str, keep_default_na=False)
-                if "pos" not in df.columns:
-                    if "row" not in df.columns or "col" not in df.columns:
-                        # print(len(df))
-                        if len(df) > 96:
-                            df = df[:96]
-                        # print(len(df))
-                        df["pos"] = self.positions
-                        QMessageBox.critical(self, "Note", "No position information, generating.")
-                    else:
-                        df["pos"] = df["row"].astype(str) + df["col"].astype(str)
-                df = df[["pos", "sample", "primers"]]
-                df.set_index("pos", inplace=True)
-                # print(df)
-                # print(self.positions)
-                # print(df)
-                self.data = df.reindex(self.positions, fill_value="")
-                # blank_df = pd.DataFrame({"pos": self.positions})
-                # self.data = blank_df.set_index("pos").combine_first(df.set_index("pos"))
-
-                self.update_plate()
-                self.update_table()
+                result = read_plates(file_path)
+                if result.layout == "sequential":
+                    QMessageBox.critical(self, "Note", "No position information, generating.")
+                project = Project()
+                for plate_id, plate in result.plates.items():
+                    project.add(plate_id, plate)
+                if not len(project):
+                    project.add("1", geometry=result.geometry)
+                self.set_project(project)
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to load CSV file: {e}")
 
+    @traced("app.save_data", "ui")
     def save_data(self):
         file_path, _ = QFileDialog.getSaveFileName(self, "Save CSV File", "", "CSV Files (*.csv)")
         if file_path:
             try:
-                self.data.to_csv(file_path)
+                write_csv(self.plate, file_path)
                 QMessageBox.information(self, "Success", f"Data successfully saved to {file_path}")
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Failed to save CSV file: {e}")
 
+    @traced("app.open_project", "ui")
+    def open_project(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Open Project", "", "Plate Projects (*.plates)")
+        if path:
+            try:
+                self.set_project(Project.open(path))
+            except Exception as e:
+                QMessageBox.critical(self, "Error", f"Failed to open project: {e}")
+
+    @traced("app.save_project", "ui")
+    def save_project(self):
+        try:
+            if not isinstance(self.project.store, MemoryStore):
+                self.project.save()
+            else:
+                path, _ = QFileDialog.getSaveFileName(self, "Save Project", "", "Plate Projects (*.plates)")
+                if not path:
+                    return
+                if not path.endswith(".plates"):
+                    path += ".plates"
+                current = self.plate_box.currentText()
+                self.set_project(self.project.save_as(path))
+                self.plate_box.setCurrentText(current)
+            QMessageBox.information(self, "Success", "Project saved")
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to save project: {e}")
+
+    @traced("app.export_map", "ui")
+    def export_map(self):
+        path, selected = QFileDialog.getSaveFileName(
+            self, "Export Map", "", "PNG Image (*.png);;SVG Image (*.svg);;PDF, all plates (*.pdf)")
+        if not path:
+            return
+        suffix = "." + selected.rsplit("*.", 1)[-1].rstrip(")")
+        if not path.lower().endswith((".png", ".svg", ".pdf")):
+            path += suffix
+        try:
+            if path.lower().endswith(".pdf"):
+                render_project(self.project, path, colours=self.colours)
+            else:
+                render_plate(self.plate, path, title=self.plate_box.currentText(), colours=self.colours)
+            QMessageBox.information(self, "Success", f"Plate map saved to {path}")
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to export plate map: {e}")
+
+    @traced("app.plan_plates", "ui")
+    def plan_plates(self):
+        dialog = PlanDialog()
+        if not dialog.exec():
+            return
+        samples, primers, replicates, controls, align = dialog.get_data()
+        try:
+            plan = plan_plates(samples, primers, replicates, controls, len(self.plate), align_columns=align)
+        except ValueError as e:
+            QMessageBox.critical(self, "Error", f"Failed to plan plates: {e}")
+            return
+        self.set_project(Project(MemoryStore(plan.plates)))
+
     def init_plate_map(self):
-        # Default button style sheet
-        self.button_style = {
-            "default": "font-size: 12pt;",
-            "highlight": "font-size: 12pt; border: 2px solid grey;"
-        }
-        # Assuming 8 rows and 12 columns for a 96-well plate
-        rows = ["A", "B", "C", "D", "E", "F", "G", "H"]
-        cols = range(1, 13)
-        self.left_layout.addWidget(QLabel(""), 0, 0)  # Top-left empty corner
-
-        # unique_primers = self.data["primers"].unique()
-        # colormap = cm.get_cmap('tab20', len(unique_primers))
-        # primer_to_color = {primer: to_hex(colormap(i)) for i, primer in enumerate(unique_primers)}
-
-        for j, col in enumerate(cols):
-            col_label = QLabel(str(col))
-            col_label.setSizePolicy(QSizePolicy.MinimumExpanding, QSizePolicy.Expanding)
-            self.left_layout.addWidget(col_label, 0, j+1)
-        for i, row in enumerate(rows):
-            row_label = QLabel(row)
-            row_label.setSizePolicy(QSizePolicy.MinimumExpanding, QSizePolicy.Expanding)
-            self.left_layout.addWidget(row_label, i+1, 0)
-            for j, col in enumerate(cols):
-                pos = f"{row}{col}"
-                sample = self.data.loc[pos, "sample"]
-                primers = self.data.loc[pos, "primers"]
-                button = QPushButton(sample)
-                # button.setStyleSheet(f"{self.button_style['default']} background-color: {primer_to_color[primers]};")
-                button.setMinimumSize(10, 10)  # needed to let plate shrink
-                button.setSizePolicy(QSizePolicy.MinimumExpanding, QSizePolicy.MinimumExpanding)
-                button.clicked.connect(lambda ch, p=pos: self.select_well(p))
-                self.left_layout.addWidget(button, i+1, j+1)
-                self.well_buttons[pos] = button
+        # One view over the plate model; wells are painted on demand by its delegate
+        self.plate_view = PlateView(self.left_panel)
+        self.plate_view.setModel(self.plate_model)
+        self.plate_view.clicked.connect(lambda index: self.select_well(index.data(PositionRole)))
+        self.left_layout.addWidget(self.plate_view)
 
+    @traced("app.select_well", "ui")
     def select_well(self, pos):
         # Bulk selection with control
         if QApplication.keyboardModifiers() == Qt.ControlModifier:
             if pos in self.selected_cells:
                 self.selected_cells.remove(pos)
-                self.well_buttons[pos].setStyleSheet(self.button_style["default"])
             else:
                 self.selected_cells.append(pos)
-                self.well_buttons[pos].setStyleSheet(self.button_style["highlight"])
                 # self.highlight_cell(pos)
+            self.plate_view.selectionModel().select(
+                self.plate_model.index_of(pos), QItemSelectionModel.Toggle)
         # Single cell selection
         else:
             if self.selected_cells and pos not in self.selected_cells:
@@ -268,85 +404,62 @@ class MainWindow(QWidget):
         if not self.selected_cells:
             return
         # Calculate the offset based on the first selected cell
-        first_selected = self.selected_cells[0]
         target_row, target_col = self.get_row_col(target_pos)
-        first_row, first_col = self.get_row_col(first_selected)
-        row_offset = target_row - first_row
-        col_offset = target_col - first_col
-
-        new_positions = {}
-        for pos in self.selected_cells:
-            old_row, old_col = self.get_row_col(pos)
-            new_row = old_row + row_offset
-            new_col = old_col + col_offset
-            new_pos = f"{chr(65 + new_row)}{new_col + 1}"
-            new_positions[pos] = new_pos
+        first_row, first_col = self.get_row_col(self.selected_cells[0])
 
-        self.apply_move(new_positions)
+        try:
+            self.apply_move(target_row - first_row, target_col - first_col)
+        except ValueError as e:
+            QMessageBox.warning(self, "Warning", str(e))
 
     def get_row_col(self, pos):
-        row = ord(pos[0]) - 65
-        col = int(pos[1:]) - 1
+        (row,), (col,) = self.plate.coords(pos)
         return row, col
 
-    def apply_move(self, new_positions):
-        if len(new_positions) != len(self.selected_cells):
-            return
-        
-        for old_pos, new_pos in new_positions.items():
-            if self.data.loc[new_pos]["sample"] != "":
-                raise ValueError(f"Cannot move to {new_pos} because it is already occupied.")
-            # Move data from old_pos to new_pos
-            self.data.loc[new_pos] = self.data.loc[old_pos]
-            self.data.loc[old_pos] = {"sample": "", "primers": ""}
-
-        self.update_table()
-        self.update_plate()
+    @traced("app.apply_move", "ui")
+    def apply_move(self, row_offset, col_offset):
+        # Validated up front and applied in one go, so a failed move changes nothing
+        self.plate.shift(self.selected_cells, row_offset, col_offset)
         self.deselect_all()
 
     def deselect_all(self):
-        for pos in self.selected_cells:
-            self.well_buttons[pos].setStyleSheet(self.button_style["default"])
+        self.plate_view.selectionModel().clearSelection()
         self.selected_cells.clear()
 
     def edit_well(self, pos):
-        sample, primers = self.data.loc[pos][["sample", "primers"]]
+        (sample,), (primers,) = self.plate.get(pos)
         dialog = SingleEditDialog(sample, primers)
         if dialog.exec():
             new_sample, new_primers = dialog.get_data()
-            self.data.loc[pos, "sample"] = new_sample
-            self.data.loc[pos, "primers"] = new_primers
-            self.well_buttons[pos].setText(new_sample)
-            
-            self.update_table()
+            self.plate.set(pos, new_sample, new_primers)
 
+    @traced("app.bulk_edit_wells", "ui")
     def bulk_edit_wells(self):
-        dialog = BulkEditDialog(self.data, self.selected_cells)
+        if not self.selected_cells:
+            return
+        dialog = BulkEditDialog(self.plate, self.selected_cells)
         if dialog.exec():
             new_sample, new_primers = dialog.get_data()
-            for pos in self.selected_cells:
-                if new_sample:  # Only update if a new value is provided
-                    self.data.loc[pos, "sample"] = new_sample
-                    self.well_buttons[pos].setText(new_sample)
-                if new_primers:
-                    self.data.loc[pos, "primers"] = new_primers
-            self.update_table()
-            for pos in self.selected_cells:  # Clear selections after editing
-                self.well_buttons[pos].setStyleSheet(self.button_style["default"])
-            self.selected_cells.clear()
+            # Only update fields where a new value is provided
+            self.plate.set(self.selected_cells, new_sample or None, new_primers or None)
+            self.deselect_all()  # Clear selections after editing
+
+    @traced("app.clear_selected_cells", "ui")
+    def clear_selected_cells(self):
+        if self.selected_cells:
+            self.plate.clear(self.selected_cells)
+            self.deselect_all()
 
     def highlight_cell(self, pos):
-        self.well_buttons[pos].setStyleSheet(self.button_style["highlight"])
-        QTimer.singleShot(200, lambda: self.well_buttons[pos].setStyleSheet(self.button_style["default"]))
+        index = self.plate_model.index_of(pos)
+        selection = self.plate_view.selectionModel()
+        selection.select(index, QItemSelectionModel.Select)
+        QTimer.singleShot(200, lambda: selection.select(index, QItemSelectionModel.Deselect))
 
+    @traced("app.swap_cells", "ui")
     def swap_cells(self, pos1, pos2):
-        # Update data and table
-        self.data.loc[[pos1, pos2], ["sample", "primers"]] = self.data.loc[[pos2, pos1], ["sample", "primers"]].values
-        self.update_table()
-
-        # Update buttons
-        self.well_buttons[pos1].setText(self.data.loc[pos1, "sample"])
-        self.well_buttons[pos2].setText(self.data.loc[pos2, "sample"])
+        # Plate and table views follow the model
+        self.plate.swap(pos1, pos2)
 
 if __name__ == "__main__":
     app = QApplication([])
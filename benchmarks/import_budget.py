@@ -0,0 +1,72 @@
+"""Cold-start import budget for the desktop apps.
+
+Imports the entry module in fresh interpreters with ``-X importtime`` and
+fails if the median total exceeds the budget, or if a module that should only
+be loaded on first use (matplotlib, pandas) is imported at startup.
+
+    python benchmarks/import_budget.py
+    python benchmarks/import_budget.py --module app3 --budget-ms 400 --runs 7
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# Only needed for export, plotting or analytics, so never at startup
+DEFERRED = ("matplotlib", "pandas")
+
+
+def import_times(module):
+    # {module: cumulative microseconds} for one cold import of module
+    env = dict(os.environ, QT_QPA_PLATFORM=os.environ.get("QT_QPA_PLATFORM", "offscreen"))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if result.returncode:
+        raise RuntimeError(f"importing {module} failed:\n{result.stderr}")
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def check(module="app4", budget_ms=500, runs=5):
+    totals, loaded = [], set()
+    for _ in range(runs):
+        times = import_times(module)
+        totals.append(times[module] / 1000)
+        loaded.update(times)
+    median = statistics.median(totals)
+    deferred = sorted(name for name in loaded if name.split(".")[0] in DEFERRED)
+    problems = []
+    if median > budget_ms:
+        problems.append(f"import {module} took {median:.0f} ms (median of {runs}), budget is {budget_ms} ms")
+    if deferred:
+        problems.append(f"import {module} loads {', '.join(deferred[:5])}{' ...' if len(deferred) > 5 else ''} at startup")
+    return median, problems
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--module", default="app4")
+    parser.add_argument("--budget-ms", type=float, default=500)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args(argv)
+    median, problems = check(args.module, args.budget_ms, args.runs)
+    for problem in problems:
+        print(f"FAIL: {problem}")
+    if not problems:
+        print(f"ok: import {args.module} took {median:.0f} ms (budget {args.budget_ms:.0f} ms)")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
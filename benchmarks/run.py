@@ -0,0 +1,324 @@
+"""Benchmarks for the planner's hot paths.
+
+Times the desktop app (app4 under offscreen Qt) and the Django views against
+a throwaway SQLite database, at 96, 384 and 1536 wells. Cases whose cost grows
+with the project (loading CSVs, the web import, export and index) also run at
+1, 50 and 500 plates; per-plate edits run on a single plate. Results are
+written as JSON and, given a baseline, compared against it: a case whose
+median is more than ``--tolerance`` slower fails the run.
+
+    python benchmarks/run.py --output results.json
+    python benchmarks/run.py --only qt --sizes 96 384 --baseline benchmarks/baseline.json
+    python benchmarks/run.py --save-baseline benchmarks/baseline.json
+
+Baselines are only comparable on the machine that recorded them.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from plateplanner import PlateMap, Project  # noqa: E402
+from plateplanner.csvio import iter_csv  # noqa: E402
+
+SIZES = (96, 384, 1536)
+PLATES = (1, 50, 500)
+
+# Differences below this are timer noise, whatever the ratio
+NOISE_FLOOR = 0.002
+
+
+## Data
+
+def make_plate(wells, seed=0):
+    # A fully used plate: samples repeat across a handful of primer sets, as in a real run
+    rng = np.random.default_rng(seed)
+    plate = PlateMap(wells)
+    samples = np.array([f"S{i:04d}" for i in range(max(wells // 4, 1))], dtype=object)
+    primers = np.array([f"P{i}" for i in range(8)], dtype=object)
+    plate.set(plate.positions, rng.choice(samples, wells), rng.choice(primers, wells))
+    return plate
+
+
+def make_csv(wells, plates):
+    # Multi-plate CSV text with a plate column, the format both apps import
+    plate = make_plate(wells)
+    rows = ((plate_id, *record) for plate_id in range(1, plates + 1) for record in plate.records())
+    return "".join(iter_csv(rows, ["plate", "pos", "sample", "primers"]))
+
+
+## Timing
+
+def measure(fn, setup=None, repeat=5, max_time=10.0):
+    # Time fn() up to `repeat` times (at least once), calling setup() untimed before each run
+    times = []
+    started = time.perf_counter()
+    while len(times) < repeat:
+        if setup:
+            setup()
+        t = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t)
+        if time.perf_counter() - started > max_time:
+            break
+    return {
+        "median": statistics.median(times),
+        "min": min(times),
+        "mean": statistics.fmean(times),
+        "runs": len(times),
+    }
+
+
+def case_name(suite, name, wells, plates=None):
+    params = f"wells={wells}" if plates is None else f"wells={wells},plates={plates}"
+    return f"{suite}.{name}[{params}]"
+
+
+## Qt (app4)
+
+def qt_cases(sizes, plate_counts, workdir):
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PySide6.QtWidgets import QApplication
+
+    import app4
+
+    qapp = QApplication.instance() or QApplication([])
+
+    def fail(parent, title, message, *args):
+        raise RuntimeError(f"{title}: {message}")
+
+    # No one is there to answer dialogs: errors fail the benchmark, and the bulk edit
+    # dialog is answered with fixed values
+    app4.QMessageBox.critical = staticmethod(fail)
+    app4.QMessageBox.warning = staticmethod(fail)
+    app4.QMessageBox.information = staticmethod(lambda *args: None)
+
+    class BulkEdit(app4.BulkEditDialog):
+        def exec(self):
+            return True
+
+        def get_data(self):
+            return "bench", "P-bench"
+
+    app4.BulkEditDialog = BulkEdit
+
+    for wells in sizes:
+        window = app4.MainWindow(wells)
+        window.show()
+        qapp.processEvents()
+        plate = window.plate
+        source = make_plate(wells)
+
+        def refill():
+            plate.set(plate.positions, source.sample.ravel(order="F"), source.primers.ravel(order="F"))
+            window.deselect_all()
+            qapp.processEvents()
+
+        def settled(fn):
+            # Include the repaints the change schedules
+            def run():
+                fn()
+                qapp.processEvents()
+            return run
+
+        # Every plate's CSV is loaded through the app's own path, file dialog aside
+        for plates in plate_counts:
+            path = workdir / f"qt-{wells}-{plates}.csv"
+            path.write_text(make_csv(wells, plates))
+            app4.QFileDialog.getOpenFileName = staticmethod(lambda *args, path=path: (str(path), ""))
+            yield case_name("qt", "load_data", wells, plates), settled(lambda: window.load_data(None)), None
+        project = Project()
+        plate = project.add("1", geometry=wells)
+        window.set_project(project)
+
+        def repaint_plate():
+            window.update_plate()
+            window.plate_view.grab()
+
+        def repaint_table():
+            # A whole-plate edit reaching the well list: PlateTableModel and WellListProxy
+            # signal the changed wells and the table repaints them
+            plate.set(plate.positions, primers=source.sample.ravel(order="F"))
+            qapp.processEvents()
+            window.table_widget.grab()
+
+        yield case_name("qt", "update_plate", wells), repaint_plate, refill
+        yield case_name("qt", "update_table", wells), repaint_table, refill
+
+        # Shift every row but the last down by one, as a block, into the emptied last row
+        rows, _ = plate.coords(plate.positions)
+        block = [pos for pos, row in zip(plate.positions, rows) if row < plate.rows - 1]
+        last_row = [pos for pos, row in zip(plate.positions, rows) if row == plate.rows - 1]
+
+        def select_block():
+            refill()
+            plate.clear(last_row)
+            qapp.processEvents()
+            window.selected_cells[:] = block
+
+        yield case_name("qt", "apply_move", wells), settled(lambda: window.apply_move(1, 0)), select_block
+
+        half = plate.positions[: wells // 2]
+
+        def select_half():
+            refill()
+            window.selected_cells[:] = half
+
+        yield case_name("qt", "bulk_edit_wells", wells), settled(window.bulk_edit_wells), select_half
+
+        pairs = list(zip(plate.positions[: wells // 2], plate.positions[wells // 2:]))[:100]
+
+        def swap_many():
+            for first, second in pairs:
+                window.swap_cells(first, second)
+            qapp.processEvents()
+
+        yield case_name("qt", "swap_cells", wells), swap_many, refill
+        window.close()
+
+
+## Django
+
+def django_cases(sizes, plate_counts, workdir):
+    sys.path.insert(0, str(ROOT / "webapp"))
+    os.environ["DJANGO_SETTINGS_MODULE"] = "webapp.settings"
+    from webapp import settings
+
+    # Never touch the checked-in database
+    settings.DATABASES["default"]["NAME"] = str(workdir / "bench.sqlite3")
+
+    import django
+    django.setup()
+    from django.core.cache import cache
+    from django.core.files.uploadedfile import SimpleUploadedFile
+    from django.core.management import call_command
+    from django.test import Client
+    from django.test.utils import setup_test_environment
+
+    from planner.models import Project
+
+    setup_test_environment()
+    call_command("migrate", verbosity=0)
+    client = Client()
+
+    def get(url):
+        def run():
+            response = client.get(url)
+            assert response.status_code == 200, response.status_code
+            b"".join(response.streaming_content) if response.streaming else response.content
+        return run
+
+    for wells in sizes:
+        for plates in plate_counts:
+            text = make_csv(wells, plates)
+
+            def reset():
+                Project.objects.all().delete()
+                cache.clear()
+
+            def upload(text=text, wells=wells):
+                upload = SimpleUploadedFile("bench.csv", text.encode("utf-8"), content_type="text/csv")
+                response = client.post("/load/", {"file": upload, "project": "bench", "size": wells})
+                assert response.status_code == 302, response.status_code
+
+            yield case_name("django", "load_csv", wells, plates), upload, reset
+
+            # The views below read the project that load_csv leaves behind
+            yield case_name("django", "save_csv", wells, plates), get("/save/"), cache.clear
+            yield case_name("django", "index", wells, plates), get("/"), None
+
+
+SUITES = {"qt": qt_cases, "django": django_cases}
+
+
+## Results
+
+def metadata():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+        ).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "date": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+    }
+
+
+def compare(results, baseline, tolerance=0.25):
+    # (name, median, baseline median, ratio, regressed) for every case in both runs
+    rows = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        median, base = result["median"], before["median"]
+        ratio = median / base if base else float("inf")
+        regressed = ratio > 1 + tolerance and median - base > NOISE_FLOOR
+        rows.append((name, median, base, ratio, regressed))
+    return rows
+
+
+def run(suites, sizes, plate_counts, repeat=5, max_time=10.0, log=print):
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for suite in suites:
+            for name, fn, setup in SUITES[suite](sizes, plate_counts, Path(workdir)):
+                results[name] = measure(fn, setup, repeat, max_time)
+                log(f"{name:<50} {results[name]['median'] * 1000:10.2f} ms")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", nargs="+", choices=sorted(SUITES), default=sorted(SUITES))
+    parser.add_argument("--sizes", nargs="+", type=int, choices=SIZES, default=SIZES)
+    parser.add_argument("--plates", nargs="+", type=int, default=PLATES)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-time", type=float, default=10.0, help="stop repeating a case after this many seconds")
+    parser.add_argument("--output", help="write results JSON here instead of stdout")
+    parser.add_argument("--baseline", help="compare against this results file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown before a case fails")
+    parser.add_argument("--save-baseline", help="also write the results to this file as the new baseline")
+    args = parser.parse_args(argv)
+
+    log = lambda line: print(line, file=sys.stderr)
+    results = run(args.only, args.sizes, args.plates, args.repeat, args.max_time, log)
+    report = json.dumps({"meta": metadata(), "results": results}, indent=2)
+    if args.output:
+        Path(args.output).write_text(report + "\n")
+    else:
+        print(report)
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(report + "\n")
+
+    if not args.baseline:
+        return 0
+    baseline = json.loads(Path(args.baseline).read_text())["results"]
+    rows = compare(results, baseline, args.tolerance)
+    log(f"\n{'case':<50} {'now ms':>10} {'base ms':>10} {'ratio':>7}")
+    for name, median, base, ratio, regressed in rows:
+        log(f"{name:<50} {median * 1000:10.2f} {base * 1000:10.2f} {ratio:7.2f}{'  REGRESSED' if regressed else ''}")
+    regressions = [row for row in rows if row[-1]]
+    if regressions:
+        log(f"\n{len(regressions)} case(s) slower than the baseline by more than {args.tolerance:.0%}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
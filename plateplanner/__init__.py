@@ -0,0 +1,10 @@
+from .geometry import FORMATS, PlateGeometry, get_geometry
+from .history import History
+from .plate import FIELDS, Change, MoveError, PlateMap
+from .project import Project
+from .strings import POOL, StringPool
+
+__all__ = [
+    "FIELDS", "FORMATS", "Change", "History", "MoveError", "PlateGeometry", "PlateMap",
+    "POOL", "Project", "StringPool", "get_geometry",
+]
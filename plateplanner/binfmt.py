@@ -0,0 +1,220 @@
+"""Binary plate/project files (``.plates``).
+
+Layout, all little-endian::
+
+    header       magic, version, plate count, string count, section offsets
+    strings      uint64 offsets (count + 1), then the UTF-8 bytes of every string
+    index        per plate: id (string code), well count, offset of its codes
+    plates       per plate: uint32 string codes, the sample grid then the primers grid
+
+Sample and primer names are stored once in the shared string table and every
+well is two fixed-width codes, so a file is read through ``mmap`` and only the
+plates (and strings) actually asked for are decoded. Code 0 is always "".
+"""
+import mmap
+import os
+import struct
+from pathlib import Path
+
+import numpy as np
+
+from .geometry import get_geometry
+from .plate import PlateMap
+
+MAGIC = b"PLTP"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIIQQ")  # magic, version, reserved, plates, strings, strings offset, index offset
+INDEX = np.dtype([("id", "<u4"), ("wells", "<u4"), ("offset", "<u8")])
+CODE = np.dtype("<u4")
+
+
+class PlateFile:
+    """Read-only view of a ``.plates`` file through a memory map."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mmap) < HEADER.size:
+            self.close()
+            raise ValueError(f"{self.path} is not a plate file")
+        magic, version, _, n_plates, n_strings, strings_at, index_at = HEADER.unpack_from(self._mmap)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{self.path} is not a plate file")
+        if version > VERSION:
+            self.close()
+            raise ValueError(f"{self.path} uses format version {version}, this reader supports {VERSION}")
+        # Only the string offsets and the plate index are read up front
+        self._offsets = np.frombuffer(self._mmap, "<u8", n_strings + 1, strings_at).astype(np.intp)
+        self._blob = strings_at + (n_strings + 1) * 8
+        self.index = np.frombuffer(self._mmap, INDEX, n_plates, index_at).copy()
+        self.ids = [self.string(code) for code in self.index["id"]]
+        self._positions = {plate_id: i for i, plate_id in enumerate(self.ids)}
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, plate_id):
+        return plate_id in self._positions
+
+    def close(self):
+        self._mmap.close()
+
+    def string(self, code):
+        start, end = self._offsets[code], self._offsets[code + 1]
+        return self._mmap[self._blob + start:self._blob + end].decode("utf-8")
+
+    def wells(self, plate_id):
+        return int(self.index["wells"][self._positions[plate_id]])
+
+    def codes(self, plate_id):
+        # (2, rows, cols) array of string codes: sample, then primers
+        entry = self.index[self._positions[plate_id]]
+        geometry = get_geometry(int(entry["wells"]))
+        codes = np.frombuffer(self._mmap, CODE, 2 * geometry.wells, int(entry["offset"]))
+        return codes.reshape(2, geometry.rows, geometry.cols).copy()
+
+    def strings(self, codes):
+        # Decode just the codes in use: (distinct strings, inverse index into them)
+        used, inverse = np.unique(codes, return_inverse=True)
+        table = np.empty(len(used), dtype=object)
+        table[:] = [self.string(code) for code in used]
+        return table, inverse.reshape(codes.shape)
+
+    def read(self, plate_id):
+        codes = self.codes(plate_id)
+        table, inverse = self.strings(codes)
+        plate = PlateMap(self.wells(plate_id))
+        plate.codes[...] = plate.pool.encode(table)[inverse]
+        return plate
+
+
+class _Encoder:
+    # Builds the shared string table while plates are encoded
+    def __init__(self):
+        self.codes = {"": 0}
+
+    def intern(self, strings):
+        return np.fromiter((self.codes.setdefault(s, len(self.codes)) for s in strings), dtype=CODE, count=len(strings))
+
+    def encode(self, plate):
+        # Only the names the plate uses go into the file, not the whole string pool
+        used, inverse = np.unique(plate.codes, return_inverse=True)
+        return self.intern(plate.pool.decode(used).tolist())[inverse].reshape(plate.codes.shape)
+
+    def recode(self, source, plate_id):
+        # Copy a plate from another file without building a PlateMap for it
+        table, inverse = source.strings(source.codes(plate_id))
+        return self.intern(table.tolist())[inverse]
+
+    def table(self):
+        blobs = [s.encode("utf-8") for s in self.codes]
+        offsets = np.zeros(len(blobs) + 1, dtype="<u8")
+        np.cumsum([len(b) for b in blobs], out=offsets[1:])
+        return offsets, b"".join(blobs)
+
+
+def _write(path, entries, encoder):
+    # entries are (plate id, code array) pairs encoded with encoder; the file is
+    # written beside path and the temporary name returned, ready for os.replace
+    ids = encoder.intern([plate_id for plate_id, _ in entries])
+    offsets, blob = encoder.table()
+    strings_at = HEADER.size
+    index_at = strings_at + offsets.nbytes + len(blob)
+    index_at += -index_at % 8
+    index = np.zeros(len(entries), dtype=INDEX)
+    index["id"] = ids
+    index["wells"] = [codes[0].size for _, codes in entries]
+    sizes = np.array([codes.nbytes for _, codes in entries], dtype=np.uint64)
+    index["offset"] = index_at + index.nbytes + np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.uint64)
+
+    tmp = Path(str(path) + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, 0, len(entries), len(offsets) - 1, strings_at, index_at))
+        f.write(offsets.tobytes())
+        f.write(blob)
+        f.write(b"\0" * (index_at - f.tell()))
+        f.write(index.tobytes())
+        for _, codes in entries:
+            f.write(codes.astype(CODE, copy=False).tobytes())
+    return tmp
+
+
+def write_plates(plates, path):
+    """Write a dict of PlateMaps (plate id -> plate) as a ``.plates`` file."""
+    encoder = _Encoder()
+    entries = [(plate_id, encoder.encode(plate)) for plate_id, plate in plates.items()]
+    os.replace(_write(path, entries, encoder), path)
+
+
+def read_plates(path):
+    # Every plate in a file, as a dict of PlateMaps
+    source = PlateFile(path)
+    try:
+        return {plate_id: source.read(plate_id) for plate_id in source.ids}
+    finally:
+        source.close()
+
+
+class BinaryStore:
+    """Project store backed by a single ``.plates`` file.
+
+    Plates saved since the last flush are held in memory; flush rewrites the
+    file, copying untouched plates across as codes without building PlateMaps.
+    """
+
+    suffix = ".plates"
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.file = PlateFile(self.path) if self.path.exists() else None
+        self._order = list(self.file.ids) if self.file else []
+        self._pending = {}
+
+    def ids(self):
+        return list(self._order)
+
+    def info(self, plate_id):
+        if plate_id in self._pending:
+            return {"wells": len(self._pending[plate_id])}
+        if plate_id not in self._order:
+            raise KeyError(plate_id)
+        return {"wells": self.file.wells(plate_id)}
+
+    def load(self, plate_id):
+        if plate_id in self._pending:
+            return self._pending[plate_id]
+        if plate_id not in self._order:
+            raise KeyError(plate_id)
+        return self.file.read(plate_id)
+
+    def save(self, plate_id, plate):
+        if plate_id not in self._order:
+            self._order.append(plate_id)
+        self._pending[plate_id] = plate
+
+    def delete(self, plate_id):
+        self._order.remove(plate_id)
+        self._pending.pop(plate_id, None)
+
+    def flush(self):
+        encoder = _Encoder()
+        entries = []
+        for plate_id in self._order:
+            if plate_id in self._pending:
+                entries.append((plate_id, encoder.encode(self._pending[plate_id])))
+            else:
+                entries.append((plate_id, encoder.recode(self.file, plate_id)))
+        tmp = _write(self.path, entries, encoder)
+        # The old map must be closed before the file is replaced under it
+        if self.file:
+            self.file.close()
+        os.replace(tmp, self.path)
+        self.file = PlateFile(self.path)
+        self._pending.clear()
+
+    def close(self):
+        if self.file:
+            self.file.close()
+            self.file = None
@@ -0,0 +1,356 @@
+"""Batch processing of plate files from the command line.
+
+    python -m plateplanner validate runs/ --report errors.csv
+    python -m plateplanner normalize runs/*.csv -o normalized/
+    python -m plateplanner merge runs/ -o all.plates
+    python -m plateplanner split project.csv -o plates/
+    python -m plateplanner convert runs/ --to pdf -o maps/
+
+Inputs are CSV files (any layout the apps load: pos, row + col, or
+sequential, optionally with a plate column), .plates files, directories
+(searched recursively for both), or @list.txt files naming one input per
+line. Outputs mirror where each input sits under the deepest directory
+holding all the inputs, so runs/a/x.csv and runs/b/x.csv are written to
+OUT/a/... and OUT/b/...; inputs that would still write the same output fail
+before anything is processed. Files are processed in parallel across
+``--jobs`` processes. Progress goes to stderr, along with one line per failed
+file. ``--report`` writes every problem as file,line,message rows. The exit
+status is 1 if any file failed.
+"""
+import argparse
+import csv
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from . import binfmt
+from .csvio import CSVImportError, read_plates, write_csv
+from .geometry import FORMATS
+
+INPUTS = (".csv", ".plates")
+IMAGES = ("svg", "png", "pdf")
+
+
+## Loading and writing
+
+def load(path, geometry=None):
+    # {plate id: PlateMap} from a CSV or .plates file
+    path = Path(path)
+    if path.suffix.lower() == ".plates":
+        return binfmt.read_plates(path)
+    return read_plates(path, geometry).plates
+
+
+def plate_name(template, relative, plate_id, count, whole="{stem}"):
+    # Output name of one plate from {stem} (the file name), {path} (the file's path under
+    # its input, without suffix) and {plate}; by default files holding a single plate
+    # keep their own name
+    if template is None:
+        template = whole if count == 1 else whole + "-{plate}"
+    relative = Path(relative)
+    return template.format(stem=relative.stem, path=relative.with_suffix("").as_posix(), plate=plate_id)
+
+
+def write(plates, dest):
+    # One plate is written as pos/sample/primers, several with a plate column
+    dest = Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    if dest.suffix.lower() == ".plates":
+        binfmt.write_plates(plates, dest)
+    elif len(plates) == 1:
+        write_csv(next(iter(plates.values())), dest)
+    else:
+        geometries = {plate.geometry.wells for plate in plates.values()}
+        if len(geometries) > 1:
+            raise ValueError(
+                f"plates of different formats ({', '.join(map(str, sorted(geometries)))} wells) "
+                "cannot share a CSV; write a .plates file instead")
+        write_csv(plates, dest)
+    return dest
+
+
+## Per-file work, run in the pool
+
+# Each takes the input path and its path relative to the input root, which the
+# outputs mirror under --output
+
+def _validate(path, relative, options):
+    return list(load(path, options["geometry"]))
+
+
+def _normalize(path, relative, options):
+    plates = load(path, options["geometry"])
+    dest = Path(options["output"]) / relative.with_suffix(".csv")
+    return [write(plates, dest)]
+
+
+def _plate_files(plates, relative, options, suffix):
+    # {plate id: output path} for commands writing a file per plate
+    directory = Path(options["output"]) / relative.parent
+    dests = {
+        plate_id: directory / (plate_name(options["name"], relative, plate_id, len(plates)) + suffix)
+        for plate_id in plates
+    }
+    if len(set(dests.values())) < len(dests):
+        raise ValueError(f"--name {options['name']!r} gives several plates the same file name; use {{plate}}")
+    return dests
+
+
+def _split(path, relative, options):
+    plates = load(path, options["geometry"])
+    suffix = ".plates" if options["to"] == "plates" else ".csv"
+    dests = _plate_files(plates, relative, options, suffix)
+    return [write({plate_id: plate}, dests[plate_id]) for plate_id, plate in plates.items()]
+
+
+def _convert(path, relative, options):
+    plates = load(path, options["geometry"])
+    to = options["to"]
+    if to in ("csv", "plates"):
+        return [write(plates, Path(options["output"]) / relative.with_suffix(f".{to}"))]
+
+    from .render import render_plate, render_project
+
+    if to == "pdf":
+        # One document per input file, a page per plate
+        dest = Path(options["output"]) / relative.with_suffix(".pdf")
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        return render_project(plates, dest)
+    outputs = []
+    for plate_id, dest in _plate_files(plates, relative, options, f".{to}").items():
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        render_plate(plates[plate_id], dest, title=plate_id)
+        outputs.append(dest)
+    return outputs
+
+
+def _read(path, relative, options):
+    # For merge: the plates go back to the parent, which writes the single output
+    return load(path, options["geometry"])
+
+
+COMMANDS = {
+    "validate": _validate,
+    "normalize": _normalize,
+    "split": _split,
+    "convert": _convert,
+    "merge": _read,
+}
+
+
+def process(command, path, relative, options):
+    # (path, result, errors); errors are (line, message) pairs, empty on success
+    try:
+        result = COMMANDS[command](path, relative, options)
+    except CSVImportError as e:
+        return path, None, e.errors
+    except (OSError, ValueError, KeyError) as e:
+        return path, None, [(None, str(e) or type(e).__name__)]
+    return path, result, []
+
+
+## Driver
+
+def find_inputs(names):
+    """Expand directories into the plate files below them, in a stable order.
+
+    Returns {path: path relative to the deepest directory holding every input
+    directory and file}, e.g. x.csv for runs/x.csv given ``runs``, but a/x.csv
+    given ``runs/a runs/b``.
+    """
+    paths, bases = [], []
+    for name in names:
+        path = Path(name)
+        if path.is_dir():
+            paths.extend(sorted(p for p in path.rglob("*") if p.suffix.lower() in INPUTS and p.is_file()))
+            bases.append(path)
+        else:
+            paths.append(path)
+            bases.append(path.parent)
+    paths = list(dict.fromkeys(paths))
+    try:
+        root = os.path.commonpath([os.path.abspath(base) for base in bases])
+    except ValueError:  # no inputs, or inputs on different Windows drives
+        return {path: Path(path.name) for path in paths}
+    return {path: Path(os.path.relpath(os.path.abspath(path), root)) for path in paths}
+
+
+def output_clashes(command, inputs):
+    # Inputs that would write the same outputs as another input, with the reason
+    if command not in ("normalize", "split", "convert"):
+        return []
+    claimed = {}
+    for path, relative in inputs.items():
+        claimed.setdefault(relative.with_suffix("").as_posix().lower(), []).append(path)
+    return [
+        (path, [(None, f"writes the same output as {', '.join(str(other) for other in paths if other != path)}")])
+        for paths in claimed.values() if len(paths) > 1 for path in paths
+    ]
+
+
+class Progress:
+    # Streams "[done/total]" to stderr: an updating line on a terminal, a line every
+    # `every` files otherwise. Failures are always printed as they arrive.
+    def __init__(self, total, stream=None, quiet=False, every=100):
+        self.total = total
+        self.stream = stream or sys.stderr
+        self.quiet = quiet
+        self.every = every
+        self.done = 0
+        self.failed = 0
+        self.started = time.perf_counter()
+        self.tty = self.stream.isatty()
+
+    def update(self, path, errors):
+        self.done += 1
+        if errors:
+            self.failed += 1
+            line, message = errors[0]
+            where = f":{line}" if line else ""
+            more = f" (+{len(errors) - 1} more)" if len(errors) > 1 else ""
+            self._print(f"FAIL {path}{where}: {message.splitlines()[0]}{more}")
+        if self.quiet:
+            return
+        if self.tty:
+            self.stream.write(f"\r{self._status()}")
+            self.stream.flush()
+        elif self.done % self.every == 0 or self.done == self.total:
+            self.stream.write(self._status() + "\n")
+
+    def finish(self):
+        if not self.quiet and self.tty:
+            self.stream.write("\n")
+        elapsed = time.perf_counter() - self.started
+        self.stream.write(f"{self.done} file(s), {self.done - self.failed} ok, {self.failed} failed in {elapsed:.1f}s\n")
+
+    def _status(self):
+        return f"[{self.done}/{self.total}] {self.failed} failed"
+
+    def _print(self, line):
+        if self.tty and not self.quiet:
+            self.stream.write("\r\033[K")
+        self.stream.write(line + "\n")
+
+
+def run(command, inputs, options, jobs=None, progress=None):
+    """Process {path: relative path} inputs in a pool, yielding (path, result, errors) as each finishes."""
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1 or len(inputs) < 2:
+        for path, relative in inputs.items():
+            try:
+                outcome = process(command, path, relative, options)
+            except Exception as e:
+                outcome = crashed(path, e)
+            if progress:
+                progress.update(path, outcome[2])
+            yield outcome
+        return
+    with ProcessPoolExecutor(jobs) as pool:
+        futures = {pool.submit(process, command, path, relative, options): path for path, relative in inputs.items()}
+        for future in as_completed(futures):
+            try:
+                outcome = future.result()
+            except Exception as e:  # also a worker that died or a result that would not pickle
+                outcome = crashed(futures[future], e)
+            if progress:
+                progress.update(outcome[0], outcome[2])
+            yield outcome
+
+
+def crashed(path, error):
+    # An unexpected error fails its own file rather than the whole batch
+    return path, None, [(None, f"{type(error).__name__}: {error}")]
+
+
+def write_report(dest, failures):
+    with open(dest, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(["file", "line", "message"])
+        for path, errors in failures:
+            writer.writerows((str(path), line or "", message) for line, message in errors)
+
+
+def merge(outcomes, template, failures, inputs):
+    # Collect every plate under a unique name; clashing names are reported against the later file
+    merged, sources = {}, {}
+    for path, plates in sorted(outcomes, key=lambda outcome: str(outcome[0])):
+        clashes = []
+        for plate_id, plate in plates.items():
+            name = plate_name(template, inputs[path], plate_id, len(plates), whole="{path}")
+            if name in merged:
+                clashes.append((None, f"plate {name!r} is already taken by {sources[name]}"))
+                continue
+            merged[name], sources[name] = plate, path
+        if clashes:
+            failures.append((path, clashes))
+            print(f"FAIL {path}: {clashes[0][1]}", file=sys.stderr)
+    return merged
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m plateplanner", description=__doc__.splitlines()[0], fromfile_prefix_chars="@")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def command(name, help, output=True, output_help="output directory"):
+        sub = commands.add_parser(name, help=help)
+        sub.add_argument("inputs", nargs="+", help="CSV or .plates files, or directories of them")
+        if output:
+            sub.add_argument("-o", "--output", required=True, help=output_help)
+        sub.add_argument("--geometry", type=int, choices=FORMATS, help="plate format (default: inferred per file)")
+        sub.add_argument("-j", "--jobs", type=int, help="worker processes (default: one per CPU)")
+        sub.add_argument("--report", help="write every problem to this CSV")
+        sub.add_argument("-q", "--quiet", action="store_true", help="only print failures and the summary")
+        return sub
+
+    command("validate", "check that files load", output=False)
+    command("normalize", "rewrite files as pos/sample/primers CSVs")
+    sub = command("merge", "combine files into one multi-plate CSV or .plates file", output_help="output .csv or .plates file")
+    sub.add_argument("--name", help="plate names, from {stem}, {path} and {plate} (default: the file's path "
+                                    "under its input, plus the plate for files holding several)")
+    sub = command("split", "write each plate to its own file")
+    sub.add_argument("--name", default="{stem}-{plate}", help="file names, from {stem}, {path} and {plate}")
+    sub.add_argument("--to", choices=("csv", "plates"), default="csv")
+    sub = command("convert", "convert files to CSV, .plates or plate map images")
+    sub.add_argument("--to", choices=("csv", "plates", *IMAGES), required=True)
+    sub.add_argument("--name", help="image names for multi-plate files, from {stem}, {path} and {plate}")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    inputs = find_inputs(args.inputs)
+    options = {
+        "geometry": args.geometry,
+        "output": getattr(args, "output", None),
+        "name": getattr(args, "name", None),
+        "to": getattr(args, "to", None),
+    }
+    # Inputs that would overwrite each other's outputs are failed up front, not raced
+    failures, outcomes = output_clashes(args.command, inputs), []
+    for path, errors in failures:
+        del inputs[path]
+        print(f"FAIL {path}: {errors[0][1]}", file=sys.stderr)
+    progress = Progress(len(inputs), quiet=args.quiet)
+    for outcome in run(args.command, inputs, options, args.jobs, progress):
+        path, result, errors = outcome
+        if errors:
+            failures.append((path, errors))
+        elif args.command == "merge":
+            outcomes.append((path, result))
+    progress.finish()
+
+    if args.command == "merge":
+        merged = merge(outcomes, args.name, failures, inputs)
+        if merged:
+            try:
+                write(merged, args.output)
+                print(f"{len(merged)} plate(s) written to {args.output}", file=sys.stderr)
+            except (OSError, ValueError) as e:
+                failures.append((Path(args.output), [(None, str(e))]))
+                print(f"FAIL {args.output}: {e}", file=sys.stderr)
+    if args.report:
+        write_report(args.report, failures)
+    return 1 if failures else 0
@@ -0,0 +1,94 @@
+import colorsys
+from functools import lru_cache
+
+# matplotlib's tab20, so colours match the earlier plots without importing matplotlib
+PALETTE = (
+    "#1f77b4", "#aec7e8", "#ff7f0e", "#ffbb78", "#2ca02c", "#98df8a", "#d62728", "#ff9896",
+    "#9467bd", "#c5b0d5", "#8c564b", "#c49c94", "#e377c2", "#f7b6d2", "#7f7f7f", "#c7c7c7",
+    "#bcbd22", "#dbdb8d", "#17becf", "#9edae5",
+)
+
+
+@lru_cache(maxsize=None)
+def slot_colour(slot, palette=PALETTE):
+    # Colour for the nth primer: the palette first, then hues spaced by the golden
+    # ratio, so however many primers there are the earlier colours never change
+    if slot < len(palette):
+        return palette[slot]
+    n = slot - len(palette)
+    hue = (n * 0.618033988749895) % 1
+    lightness = (0.45, 0.65, 0.8)[n % 3]
+    r, g, b = colorsys.hls_to_rgb(hue, lightness, 0.6)
+    return f"#{round(r * 255):02x}{round(g * 255):02x}{round(b * 255):02x}"
+
+
+@lru_cache(maxsize=None)
+def text_colour(colour):
+    # Black or white, whichever reads better on the given background
+    r, g, b = (int(colour[i:i + 2], 16) for i in (1, 3, 5))
+    return "#000000" if 0.299 * r + 0.587 * g + 0.114 * b > 150 else "#ffffff"
+
+
+class ColourMap:
+    """Stable primer -> colour assignment.
+
+    A primer keeps its colour for as long as it is in use. New primers take the
+    lowest free palette slot, so adding or removing primers never recolours the
+    others, and hex colours are computed once per slot.
+    """
+
+    def __init__(self, palette=PALETTE, empty="white"):
+        self.palette = tuple(palette)
+        self.empty = empty
+        self.slots = {}
+        self._free = []  # released slots, reused lowest first
+        self._next = 0
+
+    def __len__(self):
+        return len(self.slots)
+
+    def __contains__(self, primer):
+        return primer in self.slots
+
+    def colour(self, primer):
+        # Hex colour for a primer, assigning one on first use; empty primers get the empty colour
+        if not primer:
+            return self.empty
+        slot = self.slots.get(primer)
+        if slot is None:
+            slot = self._assign(primer)
+        return slot_colour(slot, self.palette)
+
+    get = colour
+
+    def mapping(self):
+        return {primer: slot_colour(slot, self.palette) for primer, slot in self.slots.items()}
+
+    def update(self, primers):
+        # Sync with the primers currently in use: only new primers are assigned and only
+        # primers that have gone are released
+        primers = [primer for primer in dict.fromkeys(primers) if primer]
+        self.release(set(self.slots).difference(primers))
+        for primer in primers:
+            if primer not in self.slots:
+                self._assign(primer)
+
+    def release(self, primers):
+        for primer in primers:
+            slot = self.slots.pop(primer, None)
+            if slot is not None:
+                self._free.append(slot)
+        self._free.sort(reverse=True)
+
+    def clear(self):
+        self.slots.clear()
+        self._free.clear()
+        self._next = 0
+
+    def _assign(self, primer):
+        if self._free:
+            slot = self._free.pop()
+        else:
+            slot, self._next = self._next, self._next + 1
+        self.slots[primer] = slot
+        return slot
@@ -0,0 +1,246 @@
+import csv
+import io
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from .geometry import FORMATS, get_geometry
+from .plate import PlateMap
+from .strings import POOL
+from .trace import traced
+
+# How a CSV locates its wells: a "pos" column, "row" + "col" columns, or neither
+# (wells are filled column-major in file order, spilling onto further plates)
+LAYOUTS = ("pos", "row_col", "sequential")
+
+ImportResult = namedtuple("ImportResult", ["plates", "layout", "geometry"])
+
+
+class CSVImportError(ValueError):
+    """Raised with every problem found in a file, as (line number, message) pairs."""
+
+    def __init__(self, errors, source=None):
+        self.errors = list(errors)
+        self.source = source
+        where = f" in {source}" if source else ""
+        lines = "\n".join(f"  line {line}: {message}" if line else f"  {message}" for line, message in self.errors[:20])
+        more = f"\n  ... and {len(self.errors) - 20} more" if len(self.errors) > 20 else ""
+        super().__init__(f"{len(self.errors)} problem(s){where}:\n{lines}{more}")
+
+
+def open_text(source):
+    # Paths, text streams and binary streams (e.g. Django uploads) all become text streams
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, newline="", encoding="utf-8-sig")
+    if isinstance(source, io.TextIOBase):
+        return source
+    return io.TextIOWrapper(source, encoding="utf-8-sig", newline="")
+
+
+def detect_layout(header):
+    columns = {name.strip().lower() for name in header}
+    if "pos" in columns:
+        return "pos"
+    if "row" in columns and "col" in columns:
+        return "row_col"
+    return "sequential"
+
+
+def _rows(reader):
+    # A malformed row (e.g. a field over the csv module's size limit) is a problem with the file
+    while True:
+        try:
+            values = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as e:
+            raise CSVImportError([(reader.line_num, str(e))]) from e
+        yield values
+
+
+def iter_records(source, plate_column="plate"):
+    """Stream (line, plate id, position label, sample, primers) tuples from a CSV.
+
+    Yields the detected layout first. Position labels are not validated here;
+    for the sequential layout they are None.
+    """
+    stream = open_text(source)
+    try:
+        reader = _rows(csv.reader(stream))
+        header = next(reader, None)
+        if header is None:
+            raise CSVImportError([(1, "file is empty")])
+        names = [name.strip().lower() for name in header]
+        layout = detect_layout(names)
+        if "sample" not in names and "primers" not in names:
+            raise CSVImportError([(1, "missing 'sample' and 'primers' columns")])
+
+        def column(name):
+            return names.index(name) if name in names else None
+
+        i_plate, i_sample, i_primers = column(plate_column), column("sample"), column("primers")
+        i_pos, i_row, i_col = column("pos"), column("row"), column("col")
+        width = len(names)
+        yield layout
+
+        for line, values in enumerate(reader, start=2):
+            if not values or (len(values) == 1 and not values[0].strip()):
+                continue  # blank line
+            if len(values) < width:
+                values = values + [""] * (width - len(values))
+            plate = values[i_plate].strip() if i_plate is not None else ""
+            if layout == "pos":
+                pos = values[i_pos].strip()
+            elif layout == "row_col":
+                pos = values[i_row].strip() + values[i_col].strip()
+            else:
+                pos = None
+            yield (
+                line, plate, pos,
+                values[i_sample] if i_sample is not None else "",
+                values[i_primers] if i_primers is not None else "",
+            )
+    finally:
+        if stream is not source:
+            stream.close()
+
+
+def _infer_geometry(labels, minimum=96):
+    # Smallest standard format (96 wells or more) holding every label that is a well
+    # on some format; labels that fit no format at all are reported as errors later
+    largest = get_geometry(max(FORMATS)).lookup
+    labels = {label.upper() for label in labels if label and label.upper() in largest}
+    for wells in (n for n in FORMATS if n >= minimum):
+        lookup = get_geometry(wells).lookup
+        if all(label in lookup for label in labels):
+            return get_geometry(wells)
+
+
+@traced("csv.read_plates", "csv")
+def read_plates(source, geometry=None, plate_column="plate"):
+    """Read one or more plates from a CSV in a single streaming pass.
+
+    ``geometry`` may be a well count or PlateGeometry; if None it is inferred
+    from the positions in the file (96 wells unless they need a larger plate). Every invalid row is collected and reported
+    together in one CSVImportError.
+    """
+    records = iter_records(source, plate_column)
+    layout = next(records)
+    lines, plate_ids, labels, samples, primers = [], [], [], [], []
+    for line, plate, pos, sample, primer in records:
+        lines.append(line)
+        plate_ids.append(plate)
+        labels.append(pos)
+        samples.append(sample)
+        primers.append(primer)
+
+    errors = []
+    if layout == "sequential":
+        geometry = get_geometry(geometry or 96)
+        # Without positions, fill wells in order and start a new plate when one is full
+        n = geometry.wells
+        order_cols, order_rows = np.divmod(np.arange(n), geometry.rows)
+        flat_order = order_rows * geometry.cols + order_cols  # column-major fill
+        if any(plate_ids):
+            ids = np.asarray(plate_ids, dtype=object)
+        else:
+            ids = np.asarray([str(i // n + 1) for i in range(len(lines))], dtype=object)
+        # Position within each plate is the running count of rows with that plate id
+        flat = np.empty(len(lines), dtype=np.intp)
+        counts = {}
+        for i, plate in enumerate(ids):
+            k = counts.get(plate, 0)
+            counts[plate] = k + 1
+            if k >= n:
+                errors.append((lines[i], f"plate {plate or '1'} already has {n} wells"))
+                flat[i] = -1
+            else:
+                flat[i] = flat_order[k]
+    else:
+        geometry = get_geometry(geometry) if geometry else _infer_geometry(set(labels))
+        lookup = geometry.lookup
+        ids = np.asarray(plate_ids, dtype=object)
+        flat = np.empty(len(lines), dtype=np.intp)
+        seen = {}
+        for i, pos in enumerate(labels):
+            k = lookup.get(pos)
+            if k is None:
+                k = lookup.get(pos.upper())
+            if k is None:
+                what = "missing position" if not pos else f"{pos!r} is not a well on a {geometry.wells}-well plate"
+                errors.append((lines[i], what))
+                flat[i] = -1
+                continue
+            key = (ids[i], k)
+            if key in seen:
+                errors.append((lines[i], f"{pos} already assigned on line {seen[key]}"))
+                flat[i] = -1
+                continue
+            seen[key] = lines[i]
+            flat[i] = k
+
+    if errors:
+        raise CSVImportError(errors, source=source if isinstance(source, (str, os.PathLike)) else None)
+
+    # Group rows by plate id (in order of first appearance) and fill each plate in one go
+    plates = {}
+    # Intern each column once for the whole file; plates then just take their slice of codes
+    codes = np.stack([POOL.encode(samples), POOL.encode(primers)])
+    first_seen = {}
+    group = np.fromiter((first_seen.setdefault(i, len(first_seen)) for i in ids), dtype=np.intp, count=len(ids))
+    order = np.argsort(group, kind="stable")
+    bounds = np.searchsorted(group[order], np.arange(len(first_seen) + 1))
+    for plate_id, start, end in zip(first_seen, bounds[:-1], bounds[1:]):
+        rows_in_plate = order[start:end]
+        plate = PlateMap(geometry)
+        rows, cols = np.divmod(flat[rows_in_plate], geometry.cols)
+        plate.set_codes((rows, cols), codes[:, rows_in_plate])
+        plates[plate_id or "1"] = plate
+    return ImportResult(plates, layout, geometry)
+
+
+def read_plate(source, geometry=None):
+    # Single-plate convenience wrapper; extra plates in the file are an error
+    result = read_plates(source, geometry)
+    if len(result.plates) > 1:
+        raise CSVImportError([(None, f"file holds {len(result.plates)} plates, expected one")])
+    plates = result.plates or {"1": PlateMap(result.geometry)}
+    return next(iter(plates.values()))
+
+
+def iter_csv(rows, header, batch=1000):
+    # Yield CSV text a batch of rows at a time, e.g. to stream a response
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(header)
+    for i, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if i % batch == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+@traced("csv.write", "csv")
+def write_csv(plates, dest, plate_column="plate"):
+    """Write one PlateMap, or a dict of them, as pos/sample/primers rows.
+
+    A dict adds a leading plate column so the file reads back as several plates.
+    """
+    multi = isinstance(plates, dict)
+    stream = open(dest, "w", newline="", encoding="utf-8") if isinstance(dest, (str, os.PathLike)) else dest
+    try:
+        writer = csv.writer(stream, lineterminator="\n")
+        if multi:
+            writer.writerow([plate_column, "pos", "sample", "primers"])
+            for plate_id, plate in plates.items():
+                writer.writerows((plate_id, *record) for record in plate.records())
+        else:
+            writer.writerow(["pos", "sample", "primers"])
+            writer.writerows(plates.records())
+    finally:
+        if stream is not dest:
+            stream.close()
@@ -0,0 +1,102 @@
+from functools import lru_cache
+
+import numpy as np
+
+# Standard SBS plate formats, wells: (rows, cols)
+FORMATS = {
+    24: (4, 6),
+    48: (6, 8),
+    96: (8, 12),
+    384: (16, 24),
+    1536: (32, 48),
+}
+
+
+def row_label(i):
+    # Spreadsheet-style row letters: A..Z, AA, AB, ...
+    label = ""
+    i += 1
+    while i:
+        i, rem = divmod(i - 1, 26)
+        label = chr(65 + rem) + label
+    return label
+
+
+class PlateGeometry:
+    """Row/column layout of a plate with precomputed label lookup tables.
+
+    Use ``get_geometry`` for the standard formats so that every plate of a given
+    size shares one set of tables.
+    """
+
+    def __init__(self, rows, cols):
+        self.rows = rows
+        self.cols = cols
+        self.row_labels = tuple(row_label(i) for i in range(rows))
+        self.col_labels = tuple(str(j+1) for j in range(cols))
+
+        # labels[r, c] -> "A1"; lookup["A1"] -> flat index r*cols + c
+        self.labels = np.array(
+            [[f"{r}{c}" for c in self.col_labels] for r in self.row_labels], dtype=object
+        )
+        self.lookup = {}
+        width = len(self.col_labels[-1])
+        for r, row in enumerate(self.row_labels):
+            for c, col in enumerate(self.col_labels):
+                flat = r*cols + c
+                self.lookup[f"{row}{col}"] = flat
+                self.lookup[f"{row}{col.zfill(width)}"] = flat  # A01 style
+        # Column-major well order used by tables and CSV export (A1, B1, ..., H12)
+        self.positions = list(self.labels.T.ravel())
+
+    @property
+    def wells(self):
+        return self.rows * self.cols
+
+    def __len__(self):
+        return self.wells
+
+    def __eq__(self, other):
+        return isinstance(other, PlateGeometry) and (self.rows, self.cols) == (other.rows, other.cols)
+
+    def __hash__(self):
+        return hash((self.rows, self.cols))
+
+    def __repr__(self):
+        return f"PlateGeometry({self.rows}, {self.cols})"
+
+    def index(self, pos):
+        # Flat index for a single label, tolerating case and surrounding whitespace
+        try:
+            return self.lookup[pos]
+        except KeyError:
+            key = pos.strip().upper()
+            if key not in self.lookup:
+                raise ValueError(f"{pos!r} is not a well on a {self.wells}-well plate") from None
+            return self.lookup[key]
+
+    def parse(self, positions):
+        if isinstance(positions, str):
+            positions = [positions]
+        lookup = self.lookup
+        try:
+            flat = np.fromiter((lookup[p] for p in positions), dtype=np.intp, count=len(positions))
+        except KeyError:
+            flat = np.fromiter((self.index(p) for p in positions), dtype=np.intp, count=len(positions))
+        return np.divmod(flat, self.cols)
+
+    def format(self, rows, cols):
+        return list(self.labels[rows, cols])
+
+    def contains(self, rows, cols):
+        rows, cols = np.asarray(rows), np.asarray(cols)
+        return (rows >= 0) & (rows < self.rows) & (cols >= 0) & (cols < self.cols)
+
+
+@lru_cache(maxsize=None)
+def get_geometry(wells=96):
+    if isinstance(wells, PlateGeometry):
+        return wells
+    if wells not in FORMATS:
+        raise ValueError(f"Unsupported plate format: {wells} wells (expected one of {sorted(FORMATS)})")
+    return PlateGeometry(*FORMATS[wells])
@@ -0,0 +1,103 @@
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class History:
+    """Undo/redo stack for a PlateMap.
+
+    Each step is a compacted Change holding only the wells it touched. Changes
+    recorded within ``merge_window`` seconds of each other are folded into one
+    step, and the oldest steps are dropped once the stack exceeds ``max_bytes``.
+    """
+
+    def __init__(self, plate, max_bytes=8 * 2**20, merge_window=0.5):
+        self.plate = plate
+        self.max_bytes = max_bytes
+        self.merge_window = merge_window
+        self.undo_stack = deque()
+        self.redo_stack = []
+        self.nbytes = 0
+        self._last = float("-inf")
+        self._applying = False
+        self._group = None
+        plate.subscribe(self.record)
+
+    def close(self):
+        self.plate.unsubscribe(self.record)
+
+    @property
+    def can_undo(self):
+        return bool(self.undo_stack)
+
+    @property
+    def can_redo(self):
+        return bool(self.redo_stack)
+
+    def record(self, change):
+        if self._applying:
+            return
+        change = change.compact()
+        if not len(change):
+            return
+        self.redo_stack.clear()
+
+        now = time.monotonic()
+        if self._group is not None:
+            # The first change in a group starts a new step, the rest join it
+            merge, self._group = self._group, True
+        else:
+            merge = now - self._last < self.merge_window
+        if merge and self.undo_stack:
+            last = self.undo_stack.pop()
+            self.nbytes -= last.nbytes
+            change = last.merged(change)
+        self._push(change)
+        self._last = now
+
+    @contextmanager
+    def group(self):
+        # Record everything inside the block as a single undo step
+        self._group = False
+        try:
+            yield
+        finally:
+            self._group = None
+            self._last = float("-inf")
+
+    def _push(self, change):
+        self.undo_stack.append(change)
+        self.nbytes += change.nbytes
+        while self.nbytes > self.max_bytes and len(self.undo_stack) > 1:
+            self.nbytes -= self.undo_stack.popleft().nbytes
+
+    def undo(self):
+        if not self.undo_stack:
+            return None
+        change = self.undo_stack.pop()
+        self.nbytes -= change.nbytes
+        self._replay(change, reverse=True)
+        self.redo_stack.append(change)
+        return change
+
+    def redo(self):
+        if not self.redo_stack:
+            return None
+        change = self.redo_stack.pop()
+        self._replay(change)
+        self._push(change)
+        return change
+
+    def _replay(self, change, reverse=False):
+        self._applying = True
+        try:
+            self.plate.apply(change, reverse=reverse)
+        finally:
+            self._applying = False
+        # Never merge the next edit into a step that was just undone or redone
+        self._last = float("-inf")
+
+    def clear(self):
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.nbytes = 0
@@ -0,0 +1,151 @@
+"""Automatic sample x primer plate layouts.
+
+Each primer set gets one block of reactions: every sample ``replicates``
+times in a row, then the control wells. Blocks are laid down the columns in
+the order the apps list wells (A1, B1, ..., H1, A2, ...), so each primer's
+wells are contiguous and its master mix can be dispensed in one run.
+
+Layouts always use the fewest plates the reaction count allows. Blocks
+larger than a plate fill whole plates first. The rest are packed whole,
+largest first. Only when whole blocks would need an extra plate are they
+continued from the end of one plate onto the start of the next.
+
+    plan = plan_plates(samples, ["F1/R1", "F2/R2"], replicates=2, controls=["NTC"], geometry=384)
+    project = Project(MemoryStore(plan.plates))
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from .geometry import get_geometry
+from .plate import PlateMap
+
+Plan = namedtuple("Plan", ["plates", "blocks"])
+# Where (part of) a primer's block landed: wells counts reactions, not padding
+Block = namedtuple("Block", ["primers", "plate", "first", "last", "wells"])
+
+
+def _names(values, what):
+    names = [str(value).strip() for value in values]
+    if not all(names):
+        raise ValueError(f"{what} names cannot be empty")
+    seen = set()
+    repeated = sorted({name for name in names if name in seen or seen.add(name)})
+    if repeated:
+        raise ValueError(f"Repeated {what} names: {', '.join(repeated[:10])}")
+    return names
+
+
+def fill_order(geometry, reserved=()):
+    # Flat (row * cols + col) indices of the usable wells, column by column
+    order = np.arange(geometry.wells).reshape(geometry.rows, geometry.cols).T.ravel()
+    if len(reserved):
+        rows, cols = geometry.parse(list(reserved))
+        order = order[~np.isin(order, rows * geometry.cols + cols)]
+    return order
+
+
+def pack(sizes, capacity):
+    """Assign blocks of the given sizes to plates of ``capacity`` wells.
+
+    Returns one list per plate of (block, start within block, count) segments,
+    in the order they are laid out.
+    """
+    if capacity < 1:
+        raise ValueError("No usable wells on the plate")
+    plates, rest = [], []
+    for block, size in enumerate(sizes):
+        start = 0
+        while size - start >= capacity:
+            plates.append([(block, start, capacity)])
+            start += capacity
+        if size > start:
+            rest.append((block, start, size - start))
+
+    # Whole blocks, first-fit decreasing, each plate then listed in block order
+    minimum = -(-sum(count for _, _, count in rest) // capacity)
+    bins, free = [], []
+    for segment in sorted(rest, key=lambda segment: -segment[2]):
+        for i, space in enumerate(free):
+            if segment[2] <= space:
+                bins[i].append(segment)
+                free[i] -= segment[2]
+                break
+        else:
+            bins.append([segment])
+            free.append(capacity - segment[2])
+    if len(bins) <= minimum:
+        return plates + [sorted(segments) for segments in bins]
+
+    # Otherwise run the blocks on end, splitting at plate boundaries; the largest go
+    # first so the blocks that get split are the ones that span most wells anyway
+    bins, current, space = [], [], capacity
+    for block, start, count in sorted(rest, key=lambda segment: (-segment[2], segment[0])):
+        while count:
+            take = min(count, space)
+            current.append((block, start, take))
+            start, count, space = start + take, count - take, space - take
+            if not space:
+                bins.append(current)
+                current, space = [], capacity
+    if current:
+        bins.append(current)
+    return plates + bins
+
+
+def plan_plates(samples, primers, replicates=1, controls=(), geometry=96, reserved=(), align_columns=False,
+                first_plate=1):
+    """Lay out every sample x primer reaction (plus controls) on as few plates as possible.
+
+    ``replicates`` is a count for every primer or a {primer: count} dict.
+    ``controls`` (e.g. NTC) are added once to each primer's block.
+    ``reserved`` wells (e.g. a ladder) are left empty on every plate.
+    ``align_columns`` starts every block at the top of a column, for
+    multichannel pipetting, at the cost of some empty wells.
+
+    Returns a Plan of {plate id: PlateMap} and the Blocks each primer covers.
+    """
+    geometry = get_geometry(geometry)
+    samples = _names(samples, "sample")
+    primers = _names(primers, "primer")
+    controls = _names(controls, "control")
+    if not primers:
+        raise ValueError("No primers to lay out")
+    if not samples and not controls:
+        raise ValueError("No samples or controls to lay out")
+    counts = [replicates.get(primer, 1) if isinstance(replicates, dict) else replicates for primer in primers]
+    if any(int(count) != count or count < 1 for count in counts):
+        raise ValueError("Replicates must be whole numbers of at least 1")
+
+    if align_columns and len(reserved):
+        raise ValueError("Column alignment needs whole columns, so no wells can be reserved")
+
+    order = fill_order(geometry, reserved)
+    capacity = len(order)
+    sizes = [len(samples) * int(count) + len(controls) for count in counts]
+    padded = [-(-size // geometry.rows) * geometry.rows if align_columns else size for size in sizes]
+
+    # One sample pattern per replicate count: s1 s1 s2 s2 ... then the controls
+    sample_names = np.asarray(samples, dtype=object)
+    control_names = np.asarray(controls, dtype=object)
+    patterns = {}
+    for count in set(counts):
+        patterns[count] = np.concatenate([np.repeat(sample_names, int(count)), control_names])
+
+    plates, blocks = {}, []
+    for number, segments in enumerate(pack(padded, capacity), start=first_plate):
+        plate_id = str(number)
+        plate = plates[plate_id] = PlateMap(geometry)
+        offset = 0
+        for block, start, count in segments:
+            # Only the part of the segment that holds reactions is written; padding stays empty
+            pattern = patterns[counts[block]]
+            used = max(min(start + count, sizes[block]) - start, 0)
+            if used:
+                flat = order[offset:offset + used]
+                rows, cols = np.divmod(flat, geometry.cols)
+                plate.set((rows, cols), pattern[start:start + used], primers[block])
+                first, last = geometry.format(rows[[0, -1]], cols[[0, -1]])
+                blocks.append(Block(primers[block], plate_id, first, last, used))
+            offset += count
+    return Plan(plates, blocks)
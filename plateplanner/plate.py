@@ -0,0 +1,390 @@
+from contextlib import contextmanager
+
+import numpy as np
+
+from .geometry import get_geometry
+from .strings import CODE, POOL
+from .trace import traced
+
+FIELDS = ("sample", "primers")
+
+
+class MoveError(ValueError):
+    # Raised before anything is written, listing every target that cannot be used
+    def __init__(self, message, outside=(), blocked=()):
+        super().__init__(message)
+        self.outside = list(outside)
+        self.blocked = list(blocked)
+
+
+class Change:
+    """Per-well diff produced by one plate operation.
+
+    ``old`` and ``new`` are (2, n) arrays of string codes (sample, then primers)
+    aligned with ``rows`` and ``cols``, so the change can be replayed in either
+    direction. ``values`` decodes them through the plate's string pool.
+    """
+
+    __slots__ = ("rows", "cols", "old", "new", "pool")
+
+    def __init__(self, rows, cols, old, new, pool=POOL):
+        self.rows = rows
+        self.cols = cols
+        self.old = old
+        self.new = new
+        self.pool = pool
+
+    def __len__(self):
+        return len(self.rows)
+
+    def values(self, new=True):
+        # (sample, primers) arrays of strings before (new=False) or after the change
+        codes = self.new if new else self.old
+        return self.pool.decode(codes[0]), self.pool.decode(codes[1])
+
+    def inverted(self):
+        return Change(self.rows, self.cols, self.new, self.old, self.pool)
+
+    def compact(self):
+        # Drop wells whose values did not actually change
+        keep = (self.old != self.new).any(axis=0)
+        return Change(
+            self.rows[keep].astype(np.int16), self.cols[keep].astype(np.int16),
+            self.old[:, keep], self.new[:, keep], self.pool,
+        )
+
+    def merged(self, later):
+        # One change equivalent to applying self and then later
+        rows = np.concatenate([self.rows, later.rows])
+        cols = np.concatenate([self.cols, later.cols])
+        flat = rows.astype(np.intp) * 65536 + cols
+        # Old values come from the first change to touch a well, new ones from the last
+        _, first = np.unique(flat, return_index=True)
+        _, last = np.unique(flat[::-1], return_index=True)
+        last = len(flat) - 1 - last
+        old = np.concatenate([self.old, later.old], axis=1)[:, first]
+        new = np.concatenate([self.new, later.new], axis=1)[:, last]
+        return Change(rows[first], cols[first], old, new, self.pool)
+
+    @property
+    def nbytes(self):
+        return self.rows.nbytes + self.cols.nbytes + self.old.nbytes + self.new.nbytes
+
+
+class PlateMap:
+    """Headless plate layout.
+
+    Sample and primer names are dictionary-encoded: ``codes`` is a (2, rows,
+    cols) array of integer codes into a StringPool shared by every plate (sample
+    codes first, then primers), so bulk reads and writes are single
+    fancy-indexing operations on integers. ``sample`` and ``primers`` are
+    read-only string views of the codes, decoded on demand. Wells can be
+    addressed either by position label ("A1", or a list of labels) or by a
+    (rows, cols) tuple of index arrays.
+    """
+
+    def __init__(self, geometry=96, pool=None):
+        # geometry is a well count from FORMATS or a PlateGeometry
+        self.geometry = get_geometry(geometry)
+        self.pool = pool if pool is not None else POOL
+        self.codes = np.zeros((2, self.rows, self.cols), dtype=CODE)
+        self._decoded = None
+        self._listeners = []
+        self._batch_depth = 0
+        self._pending = None
+
+    def __getstate__(self):
+        # A plate on the shared pool is pickled with the strings it uses and rebuilt against
+        # the shared pool of whichever process loads it; a plate with a pool of its own keeps
+        # that pool (plates pickled together still share it)
+        if self.pool is not POOL:
+            return {"wells": self.geometry.wells, "pool": self.pool, "codes": self.codes}
+        used, inverse = np.unique(self.codes, return_inverse=True)
+        return {
+            "wells": self.geometry.wells,
+            "strings": self.pool.decode(used).tolist(),
+            "codes": inverse.reshape(self.codes.shape).astype(CODE),
+        }
+
+    def __setstate__(self, state):
+        self.__init__(state["wells"], state.get("pool"))
+        if "strings" in state:
+            self.codes[...] = self.pool.encode(state["strings"])[state["codes"]]
+        else:
+            self.codes[...] = state["codes"]
+
+    def __len__(self):
+        return self.geometry.wells
+
+    @property
+    def rows(self):
+        return self.geometry.rows
+
+    @property
+    def cols(self):
+        return self.geometry.cols
+
+    @property
+    def row_labels(self):
+        return self.geometry.row_labels
+
+    @property
+    def col_labels(self):
+        return self.geometry.col_labels
+
+    @property
+    def positions(self):
+        # Column-major, matching the order the apps list wells in (A1, B1, ..., H12)
+        return self.geometry.positions
+
+    ## Addressing
+    def coords(self, wells):
+        if isinstance(wells, tuple) and len(wells) == 2 and not isinstance(wells[0], str):
+            rows, cols = wells
+            return np.asarray(rows, dtype=np.intp), np.asarray(cols, dtype=np.intp)
+        return self.geometry.parse(wells)
+
+    def label(self, rows, cols):
+        return self.geometry.format(rows, cols)
+
+    def region(self, first, last):
+        # All wells in the rectangle spanned by two corner wells, e.g. region("A1", "H12")
+        (r0, r1), (c0, c1) = self.coords([first, last])
+        rows, cols = np.mgrid[min(r0, r1):max(r0, r1)+1, min(c0, c1):max(c0, c1)+1]
+        return rows.ravel(), cols.ravel()
+
+    ## Strings
+    @property
+    def sample(self):
+        return self._strings()[0]
+
+    @property
+    def primers(self):
+        return self._strings()[1]
+
+    def _strings(self):
+        # Decoded once per change and shared until the next one; read-only, so a stray
+        # in-place write fails instead of silently missing the codes
+        if self._decoded is None:
+            decoded = self.pool.decode(self.codes)
+            decoded.flags.writeable = False
+            self._decoded = decoded
+        return self._decoded
+
+    ## Bulk access
+    def get(self, wells):
+        rows, cols = self.coords(wells)
+        return self.pool.decode(self.codes[0, rows, cols]), self.pool.decode(self.codes[1, rows, cols])
+
+    @traced("plate.set", "plate")
+    def set(self, wells, sample=None, primers=None):
+        # None leaves that field untouched; scalars are broadcast over the wells
+        rows, cols = self.coords(wells)
+        with self._changing(rows, cols):
+            if sample is not None:
+                self.codes[0, rows, cols] = self.pool.encode(sample)
+            if primers is not None:
+                self.codes[1, rows, cols] = self.pool.encode(primers)
+
+    def set_codes(self, wells, codes):
+        # Write (2, n) sample and primer codes from this plate's pool, e.g. when copying between plates
+        rows, cols = self.coords(wells)
+        with self._changing(rows, cols):
+            self.codes[:, rows, cols] = codes
+
+    def clear(self, wells=None):
+        if wells is None:
+            wells = np.indices((self.rows, self.cols)).reshape(2, -1)
+            wells = (wells[0], wells[1])
+        self.set(wells, "", "")
+
+    def apply(self, change, reverse=False):
+        # Replay a Change (or undo it with reverse=True)
+        self.set_codes((change.rows, change.cols), change.old if reverse else change.new)
+
+    @traced("plate.move", "plate")
+    def move(self, wells, targets):
+        # Validate the whole destination set first, so a failed move leaves the plate untouched
+        rows, cols = self.coords(wells)
+        new_rows, new_cols = self.coords(targets)
+        if len(rows) != len(new_rows):
+            raise ValueError(f"Cannot move {len(rows)} wells to {len(new_rows)} targets.")
+
+        inside = self.geometry.contains(new_rows, new_cols)
+        if not inside.all():
+            outside = list(zip(new_rows[~inside].tolist(), new_cols[~inside].tolist()))
+            raise MoveError(f"Cannot move {(~inside).sum()} wells outside the plate.", outside=outside)
+
+        flat = rows * self.cols + cols
+        new_flat = new_rows * self.cols + new_cols
+        if len(np.unique(new_flat)) != len(new_flat):
+            raise ValueError("Cannot move several wells to the same target.")
+        # Targets that are also sources are vacated by the move, so they don't block it
+        blocked = self.codes[0].ravel()[new_flat] != 0
+        blocked &= ~np.isin(new_flat, flat)
+        if blocked.any():
+            blocked = self.label(new_rows[blocked], new_cols[blocked])
+            raise MoveError(f"Cannot move to {', '.join(blocked)} because it is already occupied.", blocked=blocked)
+
+        # Read everything before writing so overlapping regions are not clobbered
+        with self._changing(np.concatenate([rows, new_rows]), np.concatenate([cols, new_cols])):
+            codes = self.codes[:, rows, cols]
+            self.codes[:, rows, cols] = 0
+            self.codes[:, new_rows, new_cols] = codes
+
+    def shift(self, wells, d_rows=0, d_cols=0):
+        # Move a block of wells by an offset, e.g. a whole 384-well quadrant
+        rows, cols = self.coords(wells)
+        self.move((rows, cols), (rows + d_rows, cols + d_cols))
+
+    @traced("plate.swap", "plate")
+    def swap(self, wells, others):
+        # Pairwise exchange; the two sets must pair up one to one and not share a well
+        rows, cols = self.coords(wells)
+        other_rows, other_cols = self.coords(others)
+        if len(rows) != len(other_rows):
+            raise ValueError(f"Cannot swap {len(rows)} wells with {len(other_rows)}.")
+        flat = np.concatenate([rows * self.cols + cols, other_rows * self.cols + other_cols])
+        if len(np.unique(flat)) != len(flat):
+            raise ValueError("Cannot swap wells that appear more than once.")
+        with self._changing(np.concatenate([rows, other_rows]), np.concatenate([cols, other_cols])):
+            a, b = self.codes[:, rows, cols], self.codes[:, other_rows, other_cols]
+            self.codes[:, rows, cols] = b
+            self.codes[:, other_rows, other_cols] = a
+
+    def pattern_fill(self, wells, values, field="sample", along="row"):
+        # Repeat values across the wells, walking row by row or column by column
+        rows, cols = self.coords(wells)
+        order = np.lexsort((cols, rows) if along == "row" else (rows, cols))
+        filled = np.empty(len(order), dtype=object)
+        filled[order] = np.resize(np.asarray(values, dtype=object), len(order))
+        self.set((rows, cols), **{field: filled})
+
+    def dilution_series(self, wells, name, start=1, factor=10, field="sample", along="col"):
+        # Name wells "<name> <concentration>", diluting by factor at each step along
+        # the given direction: along="col" runs each column top to bottom
+        rows, cols = self.coords(wells)
+        step = rows - rows.min() if along == "col" else cols - cols.min()
+        levels = [f"{name} {start / factor**i:g}" for i in range(step.max() + 1)]
+        self.set((rows, cols), **{field: np.asarray(levels, dtype=object)[step]})
+
+    def occupied(self, wells=None):
+        if wells is None:
+            return self.codes[0] != 0
+        rows, cols = self.coords(wells)
+        return self.codes[0, rows, cols] != 0
+
+    def records(self):
+        # (pos, sample, primers) for every well, column-major
+        sample, primers = self.sample.T.ravel(), self.primers.T.ravel()
+        return zip(self.positions, sample, primers)
+
+    ## Grouping and filtering, all on codes
+    def distinct(self, field="primers"):
+        # Names used on the plate (without ""), in code order
+        codes = np.unique(self.codes[FIELDS.index(field)])
+        return self.pool.decode(codes[codes != 0]).tolist()
+
+    def find(self, sample=None, primers=None):
+        # Mask of the wells matching every given name
+        mask = np.ones((self.rows, self.cols), dtype=bool)
+        for i, name in enumerate((sample, primers)):
+            if name is not None:
+                code = self.pool.lookup(name)
+                if code is None:
+                    return np.zeros_like(mask)
+                mask &= self.codes[i] == code
+        return mask
+
+    def groups(self, field="primers"):
+        # {name: (rows, cols)} of the wells holding each name, empty wells left out
+        codes = self.codes[FIELDS.index(field)].ravel()
+        order = np.argsort(codes, kind="stable")
+        used, starts = np.unique(codes[order], return_index=True)
+        groups = {}
+        for code, wells in zip(used.tolist(), np.split(order, starts[1:])):
+            if code:
+                groups[self.pool[code]] = np.divmod(wells, self.cols)
+        return groups
+
+    ## Change notification
+    def subscribe(self, callback):
+        self._listeners.append(callback)
+
+    def unsubscribe(self, callback):
+        self._listeners.remove(callback)
+
+    @contextmanager
+    def batch(self):
+        """Apply several operations as one transaction.
+
+        Listeners receive a single merged Change when the outermost batch exits,
+        and an exception inside the batch rolls every operation back.
+        """
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            if self._batch_depth == 1 and self._pending is not None:
+                pending, self._pending = self._pending, None
+                self.codes[:, pending.rows, pending.cols] = pending.old
+                self._decoded = None
+            raise
+        finally:
+            self._batch_depth -= 1
+        if self._batch_depth == 0 and self._pending is not None:
+            change, self._pending = self._pending, None
+            self._notify(change)
+
+    @contextmanager
+    def _changing(self, rows, cols):
+        # Capture the touched wells before and after an operation and notify listeners once.
+        # An operation that fails partway is undone, so it never leaves half its writes behind.
+        flat = np.unique(np.asarray(rows) * self.cols + np.asarray(cols))
+        rows, cols = np.divmod(flat, self.cols)
+        old = self.codes[:, rows, cols]
+        try:
+            yield
+        except BaseException:
+            self.codes[:, rows, cols] = old
+            raise
+        finally:
+            self._decoded = None
+        change = Change(rows, cols, old, self.codes[:, rows, cols], self.pool)
+        if self._batch_depth:
+            self._pending = change if self._pending is None else self._pending.merged(change)
+        else:
+            self._notify(change)
+
+    @traced("plate.notify", "plate")  # time spent in listeners, e.g. Qt models
+    def _notify(self, change):
+        for callback in self._listeners:
+            callback(change)
+
+    ## pandas interop
+    def to_frame(self):
+        import pandas as pd
+        df = pd.DataFrame(
+            {"sample": self.sample.T.ravel(), "primers": self.primers.T.ravel()},
+            index=pd.Index(self.positions, name="pos"),
+        )
+        return df
+
+    @classmethod
+    def from_frame(cls, df, geometry=96):
+        plate = cls(geometry)
+        if "pos" in df.columns:
+            pos = df["pos"]
+        elif "row" in df.columns and "col" in df.columns:
+            pos = df["row"].astype(str) + df["col"].astype(str)
+        else:
+            # No position information, fill wells in order
+            df = df[:len(plate)]
+            pos = plate.positions[:len(df)]
+        wells = list(pos)
+        plate.set(
+            wells,
+            sample=df["sample"].to_numpy(dtype=object) if "sample" in df.columns else None,
+            primers=df["primers"].to_numpy(dtype=object) if "primers" in df.columns else None,
+        )
+        return plate
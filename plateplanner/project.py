@@ -0,0 +1,235 @@
+import json
+import os
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+
+from .binfmt import BinaryStore
+from .csvio import read_plate, read_plates, write_csv
+from .geometry import get_geometry
+from .plate import PlateMap
+from .trace import span, traced
+
+
+class MemoryStore:
+    """Plates kept in a dict, e.g. straight from a multi-plate CSV import."""
+
+    def __init__(self, plates=None):
+        self.plates = dict(plates or {})
+
+    def ids(self):
+        return list(self.plates)
+
+    def info(self, plate_id):
+        return {"wells": len(self.plates[plate_id])}
+
+    def load(self, plate_id):
+        return self.plates[plate_id]
+
+    def save(self, plate_id, plate):
+        self.plates[plate_id] = plate
+
+    def delete(self, plate_id):
+        del self.plates[plate_id]
+
+    def flush(self):
+        pass
+
+
+class DirectoryStore:
+    """One CSV per plate in a directory, indexed by a small project.json manifest.
+
+    The manifest records each plate's file and format so that listing a project
+    never reads the plate files themselves.
+    """
+
+    manifest_name = "project.json"
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        manifest = self.path / self.manifest_name
+        if manifest.exists():
+            with open(manifest) as f:
+                self.manifest = json.load(f)["plates"]
+        else:
+            # No manifest yet: every CSV in the directory is a plate of unknown format
+            self.manifest = {p.stem: {"file": p.name, "wells": None} for p in sorted(self.path.glob("*.csv"))}
+
+    def ids(self):
+        return list(self.manifest)
+
+    def info(self, plate_id):
+        return self.manifest[plate_id]
+
+    def load(self, plate_id):
+        entry = self.manifest[plate_id]
+        plate = read_plate(self.path / entry["file"], entry["wells"])
+        entry["wells"] = len(plate)
+        return plate
+
+    def save(self, plate_id, plate):
+        entry = self.manifest.setdefault(plate_id, {"file": f"{plate_id}.csv"})
+        entry["wells"] = len(plate)
+        write_csv(plate, self.path / entry["file"])
+
+    def delete(self, plate_id):
+        entry = self.manifest.pop(plate_id)
+        (self.path / entry["file"]).unlink(missing_ok=True)
+
+    def flush(self):
+        tmp = self.path / (self.manifest_name + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"plates": self.manifest}, f, indent=1)
+        os.replace(tmp, self.path / self.manifest_name)
+
+
+class Project:
+    """A run of many plates, loaded lazily and kept in memory under an LRU policy.
+
+    At most ``max_loaded`` plates are held at once; the least recently used
+    plate is written back (if it was edited) and dropped when another is opened.
+    A dropped plate that someone still holds (e.g. the one on screen) stays
+    tracked: opening it again returns the same object, and editing it brings
+    it back into the LRU so the edits are saved.
+    """
+
+    def __init__(self, store=None, max_loaded=16):
+        self.store = store if store is not None else MemoryStore()
+        self.max_loaded = max_loaded
+        self._loaded = OrderedDict()
+        self._evicted = weakref.WeakValueDictionary()  # dropped from the LRU but still referenced
+        self._dirty = set()
+        self._listeners = {}
+
+    @classmethod
+    def open(cls, path, **kwargs):
+        # A .plates file is a binary project, anything else a directory of CSVs
+        if Path(path).suffix == BinaryStore.suffix:
+            return cls(BinaryStore(path), **kwargs)
+        return cls(DirectoryStore(path), **kwargs)
+
+    @classmethod
+    def from_csv(cls, source, geometry=None, **kwargs):
+        # Every plate in a (multi-plate) CSV, held in memory
+        return cls(MemoryStore(read_plates(source, geometry).plates), **kwargs)
+
+    def __len__(self):
+        return len(self.store.ids())
+
+    def __iter__(self):
+        return iter(self.store.ids())
+
+    def __contains__(self, plate_id):
+        return plate_id in self.store.ids()
+
+    def ids(self):
+        return self.store.ids()
+
+    def geometry(self, plate_id):
+        # Format of a plate without loading it (None if the store does not know yet)
+        if plate_id in self._loaded:
+            return self._loaded[plate_id].geometry
+        wells = self.store.info(plate_id)["wells"]
+        return get_geometry(wells) if wells else None
+
+    def is_loaded(self, plate_id):
+        return plate_id in self._loaded
+
+    def __getitem__(self, plate_id):
+        if plate_id in self._loaded:
+            self._loaded.move_to_end(plate_id)
+            return self._loaded[plate_id]
+        plate = self._evicted.pop(plate_id, None)
+        if plate is not None:
+            self._attach(plate_id, plate)
+            return plate
+        with span("project.load", "project"):
+            plate = self.store.load(plate_id)
+        self._track(plate_id, plate)
+        return plate
+
+    def peek(self, plate_id):
+        # The plate in memory if it is, else a copy read from the store, leaving the LRU alone
+        plate = self._loaded.get(plate_id)
+        if plate is None:
+            plate = self._evicted.get(plate_id)
+        return plate if plate is not None else self.store.load(plate_id)
+
+    def items(self):
+        # (id, plate) for every plate, for read-only passes over the whole project
+        for plate_id in self.ids():
+            yield plate_id, self.peek(plate_id)
+
+    def add(self, plate_id, plate=None, geometry=96):
+        if plate_id in self:
+            raise KeyError(f"Plate {plate_id!r} already exists")
+        plate = plate if plate is not None else PlateMap(geometry)
+        self.store.save(plate_id, plate)
+        self._track(plate_id, plate)
+        return plate
+
+    def remove(self, plate_id):
+        self._untrack(plate_id)
+        self._dirty.discard(plate_id)
+        self.store.delete(plate_id)
+
+    @traced("project.save_as", "project")
+    def save_as(self, path):
+        # Copy every plate into a project directory and return the project backed by it
+        target = Project.open(path, max_loaded=self.max_loaded)
+        for plate_id in target.ids():
+            if plate_id not in self:
+                target.store.delete(plate_id)
+        for plate_id, plate in self.items():
+            target.store.save(plate_id, plate)
+        target.store.flush()
+        self._dirty.clear()
+        return target
+
+    @traced("project.save", "project")
+    def save(self):
+        # Write back every edited plate that is still in memory, then the index
+        for plate_id in list(self._dirty):
+            self.store.save(plate_id, self._loaded[plate_id])
+        self._dirty.clear()
+        self.store.flush()
+
+    @property
+    def dirty(self):
+        return set(self._dirty)
+
+    def _track(self, plate_id, plate):
+        listener = lambda change: self._edited(plate_id)
+        self._listeners[plate_id] = listener  # replaces the listener of an evicted plate since collected
+        plate.subscribe(listener)
+        self._attach(plate_id, plate)
+
+    def _attach(self, plate_id, plate):
+        self._loaded[plate_id] = plate
+        while len(self._loaded) > self.max_loaded:
+            self._evict(next(iter(self._loaded)))
+
+    def _edited(self, plate_id):
+        self._dirty.add(plate_id)
+        # An evicted plate edited by whoever still holds it must be kept until it is saved
+        plate = self._evicted.pop(plate_id, None)
+        if plate is not None:
+            self._attach(plate_id, plate)
+
+    def _untrack(self, plate_id):
+        plate = self._loaded.pop(plate_id, None)
+        if plate is None:
+            plate = self._evicted.pop(plate_id, None)
+        listener = self._listeners.pop(plate_id, None)
+        if plate is not None:
+            plate.unsubscribe(listener)
+        return plate
+
+    def _evict(self, plate_id):
+        plate = self._loaded.pop(plate_id)
+        if plate_id in self._dirty:
+            self.store.save(plate_id, plate)
+            self._dirty.discard(plate_id)
+        # Still subscribed: if nobody else holds the plate it is collected along with its listener
+        self._evicted[plate_id] = plate
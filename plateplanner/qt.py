@@ -0,0 +1,271 @@
+import numpy as np
+from PySide6.QtCore import QAbstractProxyModel, QAbstractTableModel, QModelIndex, QRectF, Qt
+from PySide6.QtGui import QColor, QPen
+from PySide6.QtWidgets import QAbstractItemView, QHeaderView, QStyle, QStyledItemDelegate, QTableView
+
+from .colours import text_colour
+from .trace import traced
+
+# Extra item data roles exposed by PlateTableModel
+PositionRole = Qt.UserRole + 1
+PrimersRole = Qt.UserRole + 2
+
+
+class PlateTableModel(QAbstractTableModel):
+    """Qt table model over a PlateMap, one cell per well.
+
+    The model subscribes to the plate and emits dataChanged only for the wells a
+    change touched, so views repaint just those cells. Given a ColourMap, wells
+    are coloured by primer through the background and foreground roles, and the
+    map follows the primers on the plate: primers that are no longer used give
+    up their colour, the rest keep theirs.
+    """
+
+    def __init__(self, plate, parent=None, colours=None):
+        super().__init__(parent)
+        self.plate = plate
+        self.colours = colours
+        self._qcolours = {}
+        plate.subscribe(self.on_plate_changed)
+        self.sync_colours()
+
+    def set_plate(self, plate):
+        self.beginResetModel()
+        self.plate.unsubscribe(self.on_plate_changed)
+        self.plate = plate
+        plate.subscribe(self.on_plate_changed)
+        self.sync_colours()
+        self.endResetModel()
+
+    def sync_colours(self):
+        if self.colours is not None:
+            self.colours.update(self.plate.distinct("primers"))
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.plate.rows
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.plate.cols
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row, col = index.row(), index.column()
+        if role == Qt.DisplayRole:
+            return self.plate.sample[row, col]
+        if role == PrimersRole:
+            return self.plate.primers[row, col]
+        if role == PositionRole:
+            return self.plate.geometry.labels[row, col]
+        if role in (Qt.BackgroundRole, Qt.ForegroundRole) and self.colours is not None:
+            code = self.plate.codes[1, row, col]
+            if not code:
+                return None
+            colour = self.colours.colour(self.plate.pool[code])
+            return self._qcolour(colour if role == Qt.BackgroundRole else text_colour(colour))
+        if role == Qt.ToolTipRole:
+            sample, primers = self.plate.sample[row, col], self.plate.primers[row, col]
+            if sample or primers:
+                return f"{self.plate.geometry.labels[row, col]}: {sample} / {primers}"
+        return None
+
+    def _qcolour(self, colour):
+        qcolour = self._qcolours.get(colour)
+        if qcolour is None:
+            qcolour = self._qcolours[colour] = QColor(colour)
+        return qcolour
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.plate.col_labels[section]
+        return self.plate.row_labels[section]
+
+    def flags(self, index):
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsEditable
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role not in (Qt.EditRole, PrimersRole):
+            return False
+        wells = ([index.row()], [index.column()])
+        if role == PrimersRole:
+            self.plate.set(wells, primers=value)
+        else:
+            self.plate.set(wells, sample=value)
+        return True
+
+    def index_of(self, pos):
+        (row,), (col,) = self.plate.coords(pos)
+        return self.index(row, col)
+
+    # Above this many separate runs a change is sent as one bounding rectangle
+    max_spans = 16
+
+    @traced("qt.plate_changed", "qt")
+    def on_plate_changed(self, change):
+        if len(change) == 0:
+            return
+        if (change.old[1] != change.new[1]).any():
+            self.sync_colours()
+        # One dataChanged per run of adjacent changed wells within a plate row
+        n = self.plate.cols
+        flat = np.unique(change.rows * n + change.cols)
+        rows, cols = np.divmod(flat, n)
+        breaks = (np.diff(flat) != 1) | (rows[1:] != rows[:-1])
+        starts = np.flatnonzero(np.r_[True, breaks])
+        if len(starts) > self.max_spans:
+            # Large bulk edits repaint as a single region rather than many small ones
+            self.dataChanged.emit(
+                self.index(int(rows.min()), int(cols.min())), self.index(int(rows.max()), int(cols.max())))
+            return
+        ends = np.r_[starts[1:], len(flat)] - 1
+        for start, end in zip(starts, ends):
+            row = int(rows[start])
+            self.dataChanged.emit(self.index(row, int(cols[start])), self.index(row, int(cols[end])))
+
+    @traced("qt.refresh", "qt")
+    def refresh(self):
+        self.dataChanged.emit(self.index(0, 0), self.index(self.plate.rows - 1, self.plate.cols - 1))
+
+
+class WellListProxy(QAbstractProxyModel):
+    """Flattens a PlateTableModel into a Position/Sample/Primers list.
+
+    Wells are listed column-major (A1, B1, ..., H12). Changes in the source are
+    forwarded as dataChanged for just the list rows they map to.
+    """
+
+    headers = ("Position", "Sample", "Primers")
+    roles = (PositionRole, Qt.DisplayRole, PrimersRole)
+
+    def setSourceModel(self, model):
+        self.beginResetModel()
+        if self.sourceModel() is not None:
+            self.sourceModel().dataChanged.disconnect(self.on_source_changed)
+            self.sourceModel().modelAboutToBeReset.disconnect(self.beginResetModel)
+            self.sourceModel().modelReset.disconnect(self.endResetModel)
+        super().setSourceModel(model)
+        model.dataChanged.connect(self.on_source_changed)
+        model.modelAboutToBeReset.connect(self.beginResetModel)
+        model.modelReset.connect(self.endResetModel)
+        self.endResetModel()
+
+    def _plate_rows(self):
+        return self.sourceModel().rowCount()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.sourceModel() is None:
+            return 0
+        return self.sourceModel().rowCount() * self.sourceModel().columnCount()
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or not (0 <= row < self.rowCount() and 0 <= column < len(self.headers)):
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=QModelIndex()):
+        return QModelIndex()
+
+    def mapToSource(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        col, row = divmod(index.row(), self._plate_rows())
+        return self.sourceModel().index(row, col)
+
+    def mapFromSource(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        return self.index(index.column() * self._plate_rows() + index.row(), 1)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.EditRole):
+            return None
+        return self.mapToSource(index).data(self.roles[index.column()])
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if not index.isValid() or role != Qt.EditRole or index.column() == 0:
+            return False
+        source_role = Qt.EditRole if index.column() == 1 else PrimersRole
+        return self.sourceModel().setData(self.mapToSource(index), value, source_role)
+
+    def flags(self, index):
+        if index.column() == 0:
+            return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsEditable
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.headers[section]
+        return None
+
+    @traced("qt.list_changed", "qt")
+    def on_source_changed(self, top_left, bottom_right, roles=()):
+        # Map the source rectangle to list rows and emit one dataChanged per contiguous run
+        n = self._plate_rows()
+        rows, cols = np.mgrid[top_left.row():bottom_right.row() + 1, top_left.column():bottom_right.column() + 1]
+        flat = np.sort((cols * n + rows).ravel())
+        starts = np.flatnonzero(np.r_[True, np.diff(flat) != 1])
+        ends = np.r_[starts[1:], len(flat)] - 1
+        last = len(self.headers) - 1
+        for start, end in zip(starts, ends):
+            self.dataChanged.emit(self.index(int(flat[start]), 0), self.index(int(flat[end]), last))
+
+
+class WellDelegate(QStyledItemDelegate):
+    """Paints each well as a circle labelled with its sample name.
+
+    Wells are filled with the model's background colour when it provides one.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.fill = QColor("white")
+        self.outline = QPen(QColor("darkgrey"), 1)
+        self.highlight = QPen(QColor("grey"), 3)
+
+    def paint(self, painter, option, index):
+        painter.save()
+        painter.setRenderHint(painter.RenderHint.Antialiasing)
+        rect = QRectF(option.rect)
+        size = min(rect.width(), rect.height()) - 2
+        well = QRectF(0, 0, size, size)
+        well.moveCenter(rect.center())
+
+        selected = bool(option.state & QStyle.State_Selected)
+        painter.setPen(self.highlight if selected else self.outline)
+        fill = index.data(Qt.BackgroundRole)
+        painter.setBrush(fill if fill is not None else self.fill)
+        painter.drawEllipse(well)
+
+        sample = index.data(Qt.DisplayRole)
+        if sample and size > 12:
+            text_colour = index.data(Qt.ForegroundRole)
+            painter.setPen(text_colour if text_colour is not None else option.palette.text().color())
+            text = option.fontMetrics.elidedText(sample, Qt.ElideRight, int(size) - 2)
+            painter.drawText(well, Qt.AlignCenter, text)
+        painter.restore()
+
+
+class PlateView(QTableView):
+    """Table view that lays a plate out as a grid of wells sized to fit."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setItemDelegate(WellDelegate(self))
+        self.setShowGrid(False)
+        # Selection is driven by the application (ctrl-click), not by plain clicks
+        self.setSelectionMode(QAbstractItemView.NoSelection)
+        self.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAsNeeded)
+        for header in (self.horizontalHeader(), self.verticalHeader()):
+            header.setSectionResizeMode(QHeaderView.Stretch)
+            header.setMinimumSectionSize(8)
+            header.setDefaultAlignment(Qt.AlignCenter)
+
+    @traced("qt.paint_plate", "qt")
+    def paintEvent(self, event):
+        super().paintEvent(event)
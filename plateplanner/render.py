@@ -0,0 +1,265 @@
+"""Plate map rendering to SVG, PNG and PDF.
+
+Wells are drawn as circles coloured by primer and labelled with their sample.
+Everything that depends only on the plate format (well centres, label text,
+font sizes, the static part of the SVG) is computed once per format and
+cached. SVG is written directly; PNG and PDF are drawn with matplotlib
+figures that bypass pyplot and are built once per format, each plate only
+updating the well colours and labels. Labels are drawn as glyph outlines
+cached per distinct string rather than as text laid out on every draw.
+matplotlib is only imported when needed.
+
+Projects are rendered in a process pool, one file per plate, or sequentially
+into a single multi-page PDF.
+"""
+import os
+import threading
+from collections import namedtuple
+from functools import lru_cache
+from pathlib import Path
+from html import escape
+
+import numpy as np
+
+from .colours import ColourMap, text_colour
+from .geometry import get_geometry
+from .trace import traced
+
+FORMATS = ("svg", "png", "pdf")
+
+Layout = namedtuple("Layout", [
+    "geometry", "pitch", "margin", "width", "height", "x", "y", "radius", "font_size", "max_chars", "svg_static",
+])
+
+
+@lru_cache(maxsize=32)
+def plate_layout(geometry, pitch=36):
+    """Positions and sizes for drawing a plate format, in points."""
+    geometry = get_geometry(geometry)
+    margin = pitch  # room for the row and column labels
+    title = pitch
+    width = margin + geometry.cols * pitch + pitch / 2
+    height = title + margin + geometry.rows * pitch + pitch / 2
+    cols, rows = np.meshgrid(np.arange(geometry.cols), np.arange(geometry.rows))
+    x = margin + (cols + 0.5) * pitch
+    y = title + margin + (rows + 0.5) * pitch
+    radius = pitch * 0.45
+    font_size = max(pitch / 4.5, 1)
+    max_chars = max(int(2 * radius / (0.7 * font_size)), 1)
+
+    # Header, axis labels and every well as an empty circle; plates only add their filled wells
+    label_size = pitch / 2.5
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width:g}pt" height="{height:g}pt" '
+        f'viewBox="0 0 {width:g} {height:g}" font-family="Helvetica, Arial, sans-serif">',
+        f'<rect width="{width:g}" height="{height:g}" fill="white"/>',
+        f'<g font-size="{label_size:.3g}" text-anchor="middle" dominant-baseline="central" fill="#404040">',
+    ]
+    parts += [f'<text x="{x[0, c]:g}" y="{title + margin / 2:g}">{label}</text>' for c, label in enumerate(geometry.col_labels)]
+    parts += [f'<text x="{margin / 2:g}" y="{y[r, 0]:g}">{label}</text>' for r, label in enumerate(geometry.row_labels)]
+    parts.append(f'</g><g fill="white" stroke="darkgrey" stroke-width="{max(pitch / 36, 0.5):.3g}">')
+    parts += [f'<circle cx="{cx:g}" cy="{cy:g}" r="{radius:g}"/>' for cx, cy in zip(x.ravel(), y.ravel())]
+    parts.append("</g>")
+    svg_static = "".join(parts)
+    return Layout(geometry, pitch, margin, width, height, x, y, radius, font_size, max_chars, svg_static)
+
+
+def _elide(text, max_chars):
+    return text if len(text) <= max_chars else text[:max_chars - 1] + "…"
+
+
+def _wells(sample, primers, colours):
+    # (row, col, fill, text colour, label) for every well that has a sample or primers.
+    # colours is a ColourMap or a plain primer -> colour dict
+    rows, cols = np.nonzero((sample != "") | (primers != ""))
+    for row, col in zip(rows.tolist(), cols.tolist()):
+        fill = (colours.get(primers[row, col]) if primers[row, col] else None) or "#ffffff"
+        yield row, col, fill, text_colour(fill), sample[row, col]
+
+
+def to_svg(sample, primers, layout, colours, title=""):
+    parts = [layout.svg_static]
+    if title:
+        parts.append(f'<text x="{layout.margin / 2:g}" y="{layout.pitch / 2:g}" font-size="{layout.pitch / 2:.3g}" '
+                     f'dominant-baseline="central">{escape(str(title))}</text>')
+    circles, labels = [], []
+    for row, col, fill, ink, label in _wells(sample, primers, colours):
+        cx, cy = layout.x[row, col], layout.y[row, col]
+        circles.append(f'<circle cx="{cx:g}" cy="{cy:g}" r="{layout.radius:g}" fill="{fill}"/>')
+        if label and layout.font_size >= 4:
+            labels.append(f'<text x="{cx:g}" y="{cy:g}" fill="{ink}">{escape(_elide(label, layout.max_chars))}</text>')
+    parts.append(f'<g stroke="dimgrey" stroke-width="{max(layout.pitch / 36, 0.5):.3g}">{"".join(circles)}</g>')
+    parts.append(f'<g font-size="{layout.font_size:.3g}" text-anchor="middle" dominant-baseline="central">{"".join(labels)}</g>')
+    parts.append("</svg>")
+    return "".join(parts)
+
+
+@lru_cache(maxsize=4096)
+def _glyphs(text, size):
+    # Outline of a label centred on (0, 0), y pointing down like the plate axes. Sample
+    # names repeat across wells and plates, so each is laid out by FreeType only once.
+    from matplotlib.textpath import TextPath
+
+    path = TextPath((0, 0), text, size=size)
+    vertices = path.vertices * (1, -1)
+    if len(vertices):
+        vertices = vertices - (vertices.min(axis=0) + vertices.max(axis=0)) / 2
+    return vertices, path.codes
+
+
+def _labels(texts, x, y, size):
+    # One compound path per label, already placed in data coordinates
+    from matplotlib.path import Path as MplPath
+
+    paths = []
+    for text, cx, cy in zip(texts, x, y):
+        vertices, codes = _glyphs(text, size)
+        paths.append(MplPath(vertices + (cx, cy), codes))
+    return paths
+
+
+class _Template:
+    # A figure for one layout with the axes, well outlines and row/column labels set up
+    # once. Plates only swap the well colours and the label paths.
+    def __init__(self, layout):
+        from matplotlib.collections import EllipseCollection, PathCollection
+        from matplotlib.figure import Figure
+
+        self.layout = layout
+        self.lock = threading.Lock()
+        self.figure = Figure(figsize=(layout.width / 72, layout.height / 72))
+        ax = self.figure.add_axes((0, 0, 1, 1))
+        ax.set_xlim(0, layout.width)
+        ax.set_ylim(layout.height, 0)
+        ax.set_axis_off()
+
+        diameter = 2 * layout.radius
+        self.wells = ax.add_collection(EllipseCollection(
+            diameter, diameter, 0, units="xy", offsets=np.column_stack([layout.x.ravel(), layout.y.ravel()]),
+            offset_transform=ax.transData, facecolors="#ffffff", edgecolors="darkgrey",
+            linewidths=max(layout.pitch / 36, 0.5),
+        ))
+        geometry = layout.geometry
+        label_y = layout.pitch + layout.margin / 2
+        axis_labels = _labels(
+            [*geometry.col_labels, *geometry.row_labels],
+            [*layout.x[0].tolist(), *[layout.margin / 2] * geometry.rows],
+            [*[label_y] * geometry.cols, *layout.y[:, 0].tolist()],
+            layout.pitch / 2.5,
+        )
+        ax.add_collection(PathCollection(axis_labels, facecolors="#404040", linewidths=0, transform=ax.transData))
+        self.labels = ax.add_collection(PathCollection([], linewidths=0, transform=ax.transData))
+        self.title = ax.text(layout.margin / 2, layout.pitch / 2, "", ha="left", va="center", fontsize=layout.pitch / 2)
+
+    def fill(self, sample, primers, colours, title=""):
+        layout = self.layout
+        fills = np.full(sample.size, "#ffffff", dtype=object)
+        texts, x, y, inks = [], [], [], []
+        cols = layout.geometry.cols
+        for row, col, fill, ink, text in _wells(sample, primers, colours):
+            fills[row * cols + col] = fill
+            if text and layout.font_size >= 4:
+                texts.append(_elide(text, layout.max_chars))
+                x.append(layout.x[row, col])
+                y.append(layout.y[row, col])
+                inks.append(ink)
+        self.wells.set_facecolors(fills.tolist())
+        self.labels.set_paths(_labels(texts, x, y, layout.font_size))
+        self.labels.set_facecolors(inks)
+        self.title.set_text(str(title))
+        return self.figure
+
+
+@lru_cache(maxsize=8)
+def _template(geometry, pitch):
+    return _Template(plate_layout(geometry, pitch))
+
+
+@traced("render.plate", "render")
+def render(sample, primers, dest, format=None, title="", colours=None, geometry=None, pitch=36, dpi=100):
+    """Render one plate's sample and primers arrays to a path or binary stream."""
+    format = (format or Path(dest).suffix.lstrip(".")).lower()
+    if format not in FORMATS:
+        raise ValueError(f"Unknown image format {format!r}, expected one of {', '.join(FORMATS)}")
+    layout = plate_layout(get_geometry(geometry or sample.size), pitch)
+    colours = colours if colours is not None else ColourMap()
+    if format == "svg":
+        data = to_svg(sample, primers, layout, colours, title).encode("utf-8")
+        if isinstance(dest, (str, os.PathLike)):
+            Path(dest).write_bytes(data)
+        else:
+            dest.write(data)
+        return
+    template = _template(layout.geometry, pitch)
+    with template.lock:
+        figure = template.fill(sample, primers, colours, title)
+        # Plate maps are mostly flat colour, so light compression is nearly as small and much faster
+        options = {"pil_kwargs": {"compress_level": 1}} if format == "png" else {}
+        figure.savefig(dest, format=format, dpi=dpi, **options)
+
+
+def render_plate(plate, dest, format=None, title="", colours=None, **kwargs):
+    """Render a PlateMap to SVG, PNG or PDF (from dest's extension unless format is given)."""
+    render(plate.sample, plate.primers, dest, format, title, colours, plate.geometry, **kwargs)
+
+
+def _render_jobs(jobs, mapping, kwargs):
+    # Worker: render (path, title, sample, primers) jobs with a fixed primer -> colour mapping
+    for path, title, sample, primers in jobs:
+        render(sample, primers, path, title=title, colours=mapping, **kwargs)
+    return len(jobs)
+
+
+@traced("render.project", "render")
+def render_project(plates, dest, format="pdf", name="{id}.{format}", colours=None, workers=None, progress=None, **kwargs):
+    """Render many plates (a dict of PlateMaps or a Project).
+
+    If ``dest`` is a .pdf file every plate becomes one page of it. Otherwise
+    ``dest`` is a directory and each plate is written to its own file, named
+    from ``name``, across a pool of ``workers`` processes. Primer colours are
+    shared by all plates. ``progress(done, total)`` is called as plates finish.
+    Returns the paths written.
+    """
+    colours = colours if colours is not None else ColourMap()
+    total = len(plates)
+    if Path(dest).suffix.lower() == ".pdf":
+        from matplotlib.backends.backend_pdf import PdfPages
+        with PdfPages(dest) as pdf:
+            # A Project hands its plates out one at a time without churning its LRU
+            for done, (plate_id, plate) in enumerate(plates.items(), start=1):
+                template = _template(get_geometry(plate.geometry), kwargs.get("pitch", 36))
+                with template.lock:
+                    pdf.savefig(template.fill(plate.sample, plate.primers, colours, plate_id))
+                if progress:
+                    progress(done, total)
+        return [Path(dest)]
+
+    format = format.lower()
+    directory = Path(dest)
+    directory.mkdir(parents=True, exist_ok=True)
+    jobs = []
+    for plate_id, plate in plates.items():
+        for primer in sorted(plate.distinct("primers")):
+            colours.colour(primer)
+        jobs.append((directory / name.format(id=plate_id, format=format), plate_id, plate.sample, plate.primers))
+    mapping = colours.mapping()
+    kwargs = dict(kwargs, format=format)
+
+    workers = workers if workers is not None else min(os.cpu_count() or 1, 8)
+    if workers <= 1 or len(jobs) < 8:
+        _render_jobs(jobs, mapping, kwargs)
+        if progress:
+            progress(len(jobs), len(jobs))
+    else:
+        from concurrent.futures import ProcessPoolExecutor  # pulls in multiprocessing, so only for batches
+
+        # A few chunks per worker keeps the pool busy without pickling per plate
+        size = max(len(jobs) // (workers * 4), 1)
+        chunks = [jobs[i:i + size] for i in range(0, len(jobs), size)]
+        done = 0
+        with ProcessPoolExecutor(workers) as pool:
+            for count in pool.map(_render_jobs, chunks, [mapping] * len(chunks), [kwargs] * len(chunks)):
+                done += count
+                if progress:
+                    progress(done, len(jobs))
+    return [path for path, _, _, _ in jobs]
@@ -0,0 +1,91 @@
+import threading
+
+import numpy as np
+
+CODE = np.dtype(np.uint32)
+
+
+class StringPool:
+    """Append-only table of distinct sample and primer names.
+
+    Plates store integer codes into a pool instead of strings, so a name used in
+    hundreds of wells is held once, and grouping, filtering and colouring by name
+    are integer comparisons. Code 0 is always "". Codes never change once given
+    out, so code arrays from plates sharing a pool can be compared directly.
+    """
+
+    def __init__(self, strings=()):
+        self.codes = {"": 0}
+        self._strings = np.empty(64, dtype=object)  # grows by doubling; decoding is one take()
+        self._strings[0] = ""
+        self._size = 1
+        self._lock = threading.Lock()
+        self.encode(list(strings))
+
+    def __reduce__(self):
+        # Codes stay valid: re-adding the strings in order gives them the same codes
+        return StringPool, (self.strings(),)
+
+    def __len__(self):
+        return self._size
+
+    def __contains__(self, string):
+        return string in self.codes
+
+    def __getitem__(self, code):
+        return self._strings[code]
+
+    def code(self, string):
+        # Code of a string, adding it if new; non-strings are stored as their str()
+        code = self.codes.get(string)
+        if code is None:
+            code = self._add(string if isinstance(string, str) else str(string))
+        return code
+
+    def lookup(self, string):
+        # Code of a string already in the pool, or None, without adding it
+        return self.codes.get(string)
+
+    def encode(self, strings):
+        # Array of codes for any array-like of strings (same shape), or one code for a scalar
+        if isinstance(strings, str) or np.ndim(strings) == 0:
+            return CODE.type(self.code(strings))
+        values = np.asarray(strings, dtype=object)
+        flat = values.ravel().tolist()
+        # Add the new names first, in order of first use, then one dict lookup per
+        # well: linear in the wells
+        missing = [s for s in dict.fromkeys(flat) if s not in self.codes]
+        if missing:
+            if not all(isinstance(s, str) for s in missing):
+                flat = [s if isinstance(s, str) else str(s) for s in flat]
+                missing = [s for s in dict.fromkeys(flat) if s not in self.codes]
+            for s in missing:
+                self._add(s)
+        codes = np.fromiter(map(self.codes.__getitem__, flat), dtype=CODE, count=len(flat))
+        return codes.reshape(values.shape)
+
+    def decode(self, codes):
+        return self._strings[:self._size].take(codes)
+
+    def strings(self):
+        return self._strings[:self._size].tolist()
+
+    def _add(self, string):
+        with self._lock:
+            code = self.codes.get(string)
+            if code is not None:
+                return code
+            if self._size == len(self._strings):
+                grown = np.empty(2 * len(self._strings), dtype=object)
+                grown[:self._size] = self._strings[:self._size]
+                self._strings = grown
+            code = self._size
+            self._strings[code] = string
+            # Publish the code only once the string is in place, for readers in other threads
+            self._size += 1
+            self.codes[string] = code
+            return code
+
+
+# Shared by every plate unless one is given its own
+POOL = StringPool()
@@ -0,0 +1,151 @@
+"""Opt-in timing of hot paths.
+
+Functions wrapped with :func:`traced` and blocks wrapped in :func:`span` record
+their wall time into an in-process ring buffer while tracing is enabled. When
+it is disabled a traced call costs one flag check and nothing is stored.
+
+    from plateplanner import trace
+    trace.enable()
+    ...
+    print(trace.format_summary())
+    trace.write_chrome("trace.json")  # open in chrome://tracing or ui.perfetto.dev
+
+Setting PLATEPLANNER_TRACE in the environment enables tracing at import. If
+its value ends in .json the Chrome trace is written there at exit; any other
+value prints the summary table to stderr at exit.
+"""
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+from functools import wraps
+
+CAPACITY = 100_000
+
+enabled = False
+# (name, category, start ns, duration ns, thread id); old events fall off the end
+_events = deque(maxlen=CAPACITY)
+_NULL = nullcontext()
+
+
+def enable(capacity=None):
+    global enabled, _events
+    if capacity is not None and capacity != _events.maxlen:
+        _events = deque(_events, maxlen=capacity)
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def clear():
+    _events.clear()
+
+
+def events():
+    return list(_events)
+
+
+def record(name, start, duration, category="app"):
+    # start and duration in perf_counter_ns units
+    _events.append((name, category, start, duration, threading.get_ident()))
+
+
+def traced(name=None, category="app"):
+    """Decorator timing every call of a function under ``name`` (its qualified name by default)."""
+    def decorate(fn):
+        label = name or fn.__qualname__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _events.append((label, category, start, time.perf_counter_ns() - start, threading.get_ident()))
+        return wrapper
+    return decorate
+
+
+class _Span:
+    __slots__ = ("name", "category", "start")
+
+    def __init__(self, name, category):
+        self.name = name
+        self.category = category
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        _events.append((self.name, self.category, self.start, time.perf_counter_ns() - self.start, threading.get_ident()))
+
+
+def span(name, category="app"):
+    # Time a block: with trace.span("csv.parse"): ...
+    return _Span(name, category) if enabled else _NULL
+
+
+def chrome_trace(events=None):
+    # Complete ("X") events in microseconds, the Trace Event Format Chrome and Perfetto read
+    pid = os.getpid()
+    return {"traceEvents": [
+        {"name": name, "cat": category, "ph": "X", "ts": start / 1000, "dur": duration / 1000, "pid": pid, "tid": tid}
+        for name, category, start, duration, tid in (_events if events is None else events)
+    ]}
+
+
+def write_chrome(dest, events=None):
+    data = json.dumps(chrome_trace(events))
+    if isinstance(dest, (str, os.PathLike)):
+        with open(dest, "w", encoding="utf-8") as f:
+            f.write(data)
+    else:
+        dest.write(data)
+
+
+def summary(events=None):
+    # [(name, calls, total ms, mean ms, p95 ms, max ms)], most total time first
+    durations = {}
+    for name, _, _, duration, _ in (_events if events is None else events):
+        durations.setdefault(name, []).append(duration / 1e6)
+    rows = []
+    for name, times in durations.items():
+        times.sort()
+        total = sum(times)
+        p95 = times[min(int(len(times) * 0.95), len(times) - 1)]
+        rows.append((name, len(times), total, total / len(times), p95, times[-1]))
+    rows.sort(key=lambda row: row[2], reverse=True)
+    return rows
+
+
+def format_summary(events=None):
+    rows = summary(events)
+    width = max([len(row[0]) for row in rows] + [4])
+    lines = [f"{'name':<{width}} {'calls':>7} {'total ms':>10} {'mean ms':>9} {'p95 ms':>9} {'max ms':>9}"]
+    lines += [
+        f"{name:<{width}} {calls:>7} {total:10.2f} {mean:9.3f} {p95:9.3f} {longest:9.3f}"
+        for name, calls, total, mean, p95, longest in rows
+    ]
+    return "\n".join(lines)
+
+
+def _report_at_exit(dest):
+    if dest.endswith(".json"):
+        write_chrome(dest)
+    else:
+        print(format_summary(), file=sys.stderr)
+
+
+if os.environ.get("PLATEPLANNER_TRACE"):
+    enable()
+    atexit.register(_report_at_exit, os.environ["PLATEPLANNER_TRACE"])
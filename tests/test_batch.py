@@ -0,0 +1,89 @@
+import contextlib
+import unittest
+
+from plateplanner import MoveError, PlateMap
+
+
+def filled(*wells):
+    # 96-well plate with each named well holding its own label as the sample
+    plate = PlateMap(96)
+    plate.set(list(wells), list(wells), "P")
+    return plate
+
+
+class BatchTest(unittest.TestCase):
+    def test_one_notification_per_batch(self):
+        plate = PlateMap(96)
+        changes = []
+        plate.subscribe(changes.append)
+        with plate.batch():
+            plate.set("A1", "x")
+            plate.set("A2", "y")
+        self.assertEqual(len(changes), 1)
+        self.assertEqual(len(changes[0]), 2)
+
+    def test_error_rolls_back(self):
+        plate = filled("A1")
+        changes = []
+        plate.subscribe(changes.append)
+        with self.assertRaises(MoveError):
+            with plate.batch():
+                plate.set("A2", "x")
+                plate.move(["A1"], ["A2"])
+        self.assertEqual(plate.get(["A1", "A2"])[0].tolist(), ["A1", ""])
+        self.assertEqual(changes, [])
+
+    def test_failed_operation_leaves_no_partial_writes(self):
+        plate = filled("A1", "A2")
+        changes = []
+        plate.subscribe(changes.append)
+        for batch in (False, True):
+            with self.subTest(batch=batch), self.assertRaises(ValueError):
+                with plate.batch() if batch else contextlib.nullcontext():
+                    plate.set(["A1", "A2"], ["x", "y"], ["p", "q", "r"])
+            self.assertEqual(plate.get(["A1", "A2"])[0].tolist(), ["A1", "A2"])
+        self.assertEqual(changes, [])
+
+    def test_nested_batches_notify_once(self):
+        plate = filled("A1", "A2")
+        changes = []
+        plate.subscribe(changes.append)
+        with plate.batch():
+            plate.swap(["A1"], ["A2"])
+            with plate.batch():
+                plate.set("B1", "x")
+            self.assertEqual(changes, [])
+        self.assertEqual(len(changes), 1)
+        self.assertEqual(plate.label(changes[0].rows, changes[0].cols), ["A1", "A2", "B1"])
+
+
+class FillTest(unittest.TestCase):
+    def test_pattern_fill_by_row(self):
+        plate = PlateMap(96)
+        plate.pattern_fill(plate.region("A1", "B3"), ["x", "y"])
+        self.assertEqual(plate.sample[:2, :3].tolist(), [["x", "y", "x"], ["y", "x", "y"]])
+
+    def test_pattern_fill_by_column(self):
+        plate = PlateMap(96)
+        plate.pattern_fill(["B1", "A1", "A2", "B2"], ["p", "q"], field="primers", along="col")
+        self.assertEqual(plate.primers[:2, :2].tolist(), [["p", "p"], ["q", "q"]])
+        self.assertFalse(plate.occupied().any())
+
+    def test_dilution_series(self):
+        plate = PlateMap(96)
+        plate.dilution_series(plate.region("A1", "C2"), "std", start=100)
+        self.assertEqual(plate.sample[:3, 0].tolist(), ["std 100", "std 10", "std 1"])
+        self.assertEqual(plate.sample[:3, 1].tolist(), plate.sample[:3, 0].tolist())
+        plate.dilution_series(plate.region("D1", "D3"), "d", factor=2, along="row")
+        self.assertEqual(plate.sample[3, :3].tolist(), ["d 1", "d 0.5", "d 0.25"])
+
+    def test_fill_is_one_change(self):
+        plate = PlateMap(96)
+        changes = []
+        plate.subscribe(changes.append)
+        plate.pattern_fill(plate.region("A1", "H12"), ["x", "y", "z"])
+        self.assertEqual([len(change) for change in changes], [96])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from plateplanner import PlateMap, Project
+from plateplanner.binfmt import BinaryStore, read_plates, write_plates
+
+
+class BinaryFormatTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.dir.name) / "run.plates"
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def plates(self):
+        a, b = PlateMap(96), PlateMap(1536)
+        a.set(["A1", "H12"], ["x", "ü"], "p")
+        b.set(["AF48"], "x", "q")
+        return {"a": a, "b": b}
+
+    def test_round_trip(self):
+        plates = self.plates()
+        write_plates(plates, self.path)
+        loaded = read_plates(self.path)
+        self.assertEqual(list(loaded), ["a", "b"])
+        for plate_id, plate in plates.items():
+            self.assertEqual(len(loaded[plate_id]), len(plate))
+            np.testing.assert_array_equal(loaded[plate_id].sample, plate.sample)
+            np.testing.assert_array_equal(loaded[plate_id].primers, plate.primers)
+
+    def test_store_copies_untouched_plates(self):
+        write_plates(self.plates(), self.path)
+        project = Project.open(self.path)
+        project["a"].set("B1", "new")
+        project.add("c", geometry=384)
+        project.save()
+        project.store.close()
+        loaded = read_plates(self.path)
+        self.assertEqual(list(loaded), ["a", "b", "c"])
+        self.assertEqual(loaded["a"].get(["A1", "B1"])[0].tolist(), ["x", "new"])
+        self.assertEqual(loaded["b"].get("AF48")[1].tolist(), ["q"])
+
+    def test_delete(self):
+        write_plates(self.plates(), self.path)
+        store = BinaryStore(self.path)
+        store.delete("a")
+        store.flush()
+        store.close()
+        self.assertEqual(list(read_plates(self.path)), ["b"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,87 @@
+import io
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+from pathlib import Path
+from unittest import mock
+
+from plateplanner import cli
+from plateplanner.binfmt import read_plates
+
+CSV = "pos,sample,primers\nA1,{sample},p\n"
+
+
+class CLITest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.dir.name)
+        for name in ("runs/a/metadata.csv", "runs/b/metadata.csv"):
+            path = self.root / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(CSV.format(sample=path.parent.name))
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def main(self, *args):
+        with redirect_stderr(io.StringIO()) as err:
+            status = cli.main([*args, "-q", "-j", "1"])
+        return status, err.getvalue()
+
+    def test_inputs_are_relative_to_their_common_directory(self):
+        runs = self.root / "runs"
+        relative = lambda *names: sorted(p.as_posix() for p in cli.find_inputs(names).values())
+        self.assertEqual(relative(runs), ["a/metadata.csv", "b/metadata.csv"])
+        self.assertEqual(relative(runs / "a", runs / "b"), ["a/metadata.csv", "b/metadata.csv"])
+        self.assertEqual(relative(runs / "a" / "metadata.csv"), ["metadata.csv"])
+
+    def test_normalize_mirrors_directories(self):
+        out = self.root / "out"
+        status, _ = self.main("normalize", str(self.root / "runs"), "-o", str(out))
+        self.assertEqual(status, 0)
+        self.assertEqual(sorted(p.relative_to(out).as_posix() for p in out.rglob("*.csv")),
+                         ["a/metadata.csv", "b/metadata.csv"])
+        self.assertIn("A1,b,p", (out / "b" / "metadata.csv").read_text())
+
+    def test_clashing_outputs_fail_before_writing(self):
+        (self.root / "runs/a/metadata.plates").write_bytes(b"")
+        status, err = self.main("normalize", str(self.root / "runs"), "-o", str(self.root / "out"))
+        self.assertEqual(status, 1)
+        self.assertIn("writes the same output", err)
+        self.assertFalse((self.root / "out/a").exists())
+        self.assertTrue((self.root / "out/b/metadata.csv").exists())
+
+    def test_merge_names_plates_by_path(self):
+        dest = self.root / "all.plates"
+        status, _ = self.main("merge", str(self.root / "runs"), "-o", str(dest))
+        self.assertEqual(status, 0)
+        self.assertEqual(sorted(read_plates(dest)), ["a/metadata", "b/metadata"])
+
+    def test_failures_are_reported(self):
+        (self.root / "runs/bad.csv").write_text("pos,sample\nZ99,x\n")
+        report = self.root / "report.csv"
+        status, err = self.main("validate", str(self.root / "runs"), "--report", str(report))
+        self.assertEqual(status, 1)
+        self.assertIn("FAIL", err)
+        self.assertIn("bad.csv,2,", report.read_text())
+
+    def test_malformed_csv_fails_only_its_file(self):
+        (self.root / "runs/huge.csv").write_text("pos,sample\nA1," + "x" * 200000 + "\n")
+        out = self.root / "out"
+        status, err = self.main("normalize", str(self.root / "runs"), "-o", str(out))
+        self.assertEqual(status, 1)
+        self.assertIn("field larger than field limit", err)
+        self.assertTrue((out / "b/metadata.csv").exists())
+
+    def test_unexpected_errors_fail_only_their_file(self):
+        def validate(path, relative, options):
+            if path.parent.name == "a":
+                raise RuntimeError("boom")
+        with mock.patch.dict(cli.COMMANDS, validate=validate):
+            outcomes = {path.parent.name: errors for path, _, errors in
+                        cli.run("validate", cli.find_inputs([self.root / "runs"]), None, jobs=1)}
+        self.assertEqual(outcomes, {"a": [(None, "RuntimeError: boom")], "b": []})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+
+from plateplanner.colours import PALETTE, ColourMap, slot_colour, text_colour
+
+
+class ColourMapTest(unittest.TestCase):
+    def test_colours_follow_first_use(self):
+        colours = ColourMap()
+        self.assertEqual([colours.colour(p) for p in ("b", "a", "b")], [PALETTE[0], PALETTE[1], PALETTE[0]])
+        self.assertEqual(colours.get("a"), PALETTE[1])
+        self.assertEqual(colours.colour(""), "white")
+        self.assertEqual(len(colours), 2)
+
+    def test_update_keeps_colours_of_primers_still_in_use(self):
+        colours = ColourMap()
+        colours.update(["a", "b", "c"])
+        before = colours.mapping()
+        colours.update(["c", "a", "d", ""])
+        self.assertEqual({p: colours.colour(p) for p in "ac"}, {p: before[p] for p in "ac"})
+        self.assertNotIn("b", colours)
+        # The new primer takes the slot b gave up
+        self.assertEqual(colours.colour("d"), before["b"])
+
+    def test_released_slots_are_reused_lowest_first(self):
+        colours = ColourMap()
+        colours.update("abcd")
+        colours.release(["d", "b"])
+        colours.update("acxy")
+        self.assertEqual(colours.mapping(), {"a": PALETTE[0], "c": PALETTE[2], "x": PALETTE[1], "y": PALETTE[3]})
+
+    def test_clear_starts_over(self):
+        colours = ColourMap()
+        colours.update("ab")
+        colours.clear()
+        self.assertEqual(colours.colour("b"), PALETTE[0])
+
+    def test_colours_past_the_palette_are_distinct_and_stable(self):
+        extra = [slot_colour(slot) for slot in range(len(PALETTE), len(PALETTE) + 60)]
+        self.assertEqual(len(set(extra + list(PALETTE))), len(PALETTE) + 60)
+        self.assertTrue(all(len(colour) == 7 and colour.startswith("#") for colour in extra))
+        colours = ColourMap()
+        colours.update(str(i) for i in range(30))
+        self.assertEqual(colours.colour("25"), extra[5])
+
+    def test_text_colour(self):
+        self.assertEqual(text_colour("#ffffff"), "#000000")
+        self.assertEqual(text_colour("#1f77b4"), "#ffffff")
+
+
+if __name__ == "__main__":
+    unittest.main()
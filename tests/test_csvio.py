@@ -0,0 +1,53 @@
+import io
+import unittest
+
+from plateplanner import PlateMap
+from plateplanner.csvio import CSVImportError, read_plate, read_plates, write_csv
+
+
+def read(text, **kwargs):
+    return read_plates(io.StringIO(text), **kwargs)
+
+
+class ReadTest(unittest.TestCase):
+    def test_positions_and_plates(self):
+        result = read("plate,pos,sample,primers\n1,A1,x,p\n2,b2,y,q\n1,H12,z,p\n")
+        self.assertEqual(result.layout, "pos")
+        self.assertEqual(list(result.plates), ["1", "2"])
+        self.assertEqual(result.plates["1"].get(["A1", "H12"])[0].tolist(), ["x", "z"])
+        self.assertEqual(result.plates["2"].get("B2")[1].tolist(), ["q"])
+
+    def test_geometry_is_inferred(self):
+        self.assertEqual(read("pos,sample\nP24,x\n").geometry.wells, 384)
+
+    def test_sequential_spills_onto_new_plates(self):
+        text = "sample,primers\n" + "".join(f"s{i},p\n" for i in range(100))
+        result = read(text)
+        self.assertEqual(result.layout, "sequential")
+        self.assertEqual(result.plates["2"].get("D1")[0].tolist(), ["s99"])
+
+    def test_every_error_is_reported(self):
+        with self.assertRaises(CSVImportError) as caught:
+            read("pos,sample\nA1,x\nZ99,y\nA1,z\n,w\n")
+        self.assertEqual([line for line, _ in caught.exception.errors], [3, 4, 5])
+        self.assertIn("already assigned on line 2", caught.exception.errors[1][1])
+
+    def test_missing_columns(self):
+        with self.assertRaises(CSVImportError):
+            read("pos,notes\nA1,x\n")
+
+    def test_round_trip(self):
+        plate = PlateMap(384)
+        plate.set(["A1", "P24"], ["x, with comma", "y"], ["p", 'q "quoted"'])
+        out = io.StringIO()
+        write_csv({"a": plate, "b": PlateMap(384)}, out)
+        plates = read(out.getvalue()).plates
+        self.assertEqual(list(plates), ["a", "b"])
+        self.assertEqual(list(plates["a"].records()), list(plate.records()))
+
+    def test_read_plate_without_rows(self):
+        self.assertEqual(len(read_plate(io.StringIO("pos,sample\n"))), 96)
+
+
+if __name__ == "__main__":
+    unittest.main()
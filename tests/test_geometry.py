@@ -0,0 +1,51 @@
+import unittest
+
+import numpy as np
+
+from plateplanner import FORMATS, PlateGeometry, PlateMap, get_geometry
+from plateplanner.geometry import row_label
+
+
+class GeometryTest(unittest.TestCase):
+    def test_row_labels_run_past_z(self):
+        self.assertEqual([row_label(i) for i in (0, 25, 26, 27, 31, 701, 702)],
+                         ["A", "Z", "AA", "AB", "AF", "ZZ", "AAA"])
+
+    def test_formats(self):
+        for wells, (rows, cols) in FORMATS.items():
+            geometry = get_geometry(wells)
+            self.assertEqual((geometry.rows, geometry.cols, len(geometry)), (rows, cols, wells))
+            self.assertEqual(len(set(geometry.positions)), wells)
+        self.assertIs(get_geometry(384), get_geometry(384))
+        with self.assertRaises(ValueError):
+            get_geometry(100)
+
+    def test_1536_well_labels(self):
+        geometry = get_geometry(1536)
+        self.assertEqual(geometry.row_labels[-6:], ("AA", "AB", "AC", "AD", "AE", "AF"))
+        self.assertEqual(geometry.positions[:2], ["A1", "B1"])
+        self.assertEqual(geometry.positions[-1], "AF48")
+        self.assertEqual(geometry.format([26, 31], [0, 47]), ["AA1", "AF48"])
+
+    def test_parse(self):
+        geometry = get_geometry(1536)
+        rows, cols = geometry.parse(["AA1", "af48", " B07 ", "Z10"])
+        self.assertEqual((rows.tolist(), cols.tolist()), ([26, 31, 1, 25], [0, 47, 6, 9]))
+        for bad in ("AG1", "A49", "A0", ""):
+            with self.subTest(pos=bad), self.assertRaises(ValueError):
+                geometry.parse([bad])
+
+    def test_contains(self):
+        geometry = get_geometry(96)
+        np.testing.assert_array_equal(geometry.contains([0, 7, 8, -1], [11, 0, 0, 0]), [True, True, False, False])
+
+    def test_plates_of_other_formats(self):
+        plate = PlateMap(1536)
+        plate.set(["AF48", "AA1"], ["x", "y"])
+        self.assertEqual(plate.sample[31, 47], "x")
+        self.assertEqual(plate.label(*np.nonzero(plate.occupied())), ["AA1", "AF48"])
+        self.assertEqual(PlateMap(PlateGeometry(4, 6)).geometry, get_geometry(24))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+
+from plateplanner import History, PlateMap
+
+
+class ChangeTest(unittest.TestCase):
+    def test_merged_keeps_first_old_and_last_new(self):
+        plate = PlateMap(96)
+        changes = []
+        plate.subscribe(changes.append)
+        plate.set(["A1", "A2"], ["a", "b"])
+        plate.set(["A2", "A3"], ["c", "d"])
+        merged = changes[0].merged(changes[1])
+        values = dict(zip(plate.label(merged.rows, merged.cols), zip(*merged.values(), *merged.values(new=False))))
+        self.assertEqual(values, {
+            "A1": ("a", "", "", ""),
+            "A2": ("c", "", "", ""),
+            "A3": ("d", "", "", ""),
+        })
+
+    def test_compact_drops_unchanged_wells(self):
+        plate = PlateMap(96)
+        plate.set("A1", "A1", "P")
+        changes = []
+        plate.subscribe(changes.append)
+        plate.set(["A1", "B1"], ["A1", "x"], "P")
+        compact = changes[0].compact()
+        self.assertEqual(plate.label(compact.rows, compact.cols), ["B1"])
+
+    def test_apply_and_reverse(self):
+        plate = PlateMap(96)
+        plate.set("A1", "A1", "P")
+        changes = []
+        plate.subscribe(changes.append)
+        plate.set("A1", "x")
+        plate.apply(changes[0], reverse=True)
+        self.assertEqual(plate.sample[0, 0], "A1")
+        plate.apply(changes[0])
+        self.assertEqual(plate.sample[0, 0], "x")
+
+
+class HistoryTest(unittest.TestCase):
+    def setUp(self):
+        self.plate = PlateMap(96)
+        self.history = History(self.plate, merge_window=0)
+
+    def samples(self, *wells):
+        return self.plate.get(list(wells))[0].tolist()
+
+    def test_undo_redo(self):
+        self.plate.set("A1", "x")
+        self.plate.shift(["A1"], d_cols=1)
+        self.history.undo()
+        self.assertEqual(self.samples("A1", "A2"), ["x", ""])
+        self.history.undo()
+        self.assertEqual(self.samples("A1"), [""])
+        self.assertFalse(self.history.can_undo)
+        self.history.redo()
+        self.history.redo()
+        self.assertEqual(self.samples("A1", "A2"), ["", "x"])
+
+    def test_new_edit_clears_redo(self):
+        self.plate.set("A1", "x")
+        self.history.undo()
+        self.plate.set("A2", "y")
+        self.assertFalse(self.history.can_redo)
+
+    def test_edits_within_window_merge(self):
+        history = History(PlateMap(96), merge_window=60)
+        history.plate.set("A1", "x")
+        history.plate.set("A1", "y")
+        history.plate.set("A2", "z")
+        self.assertEqual(len(history.undo_stack), 1)
+        history.undo()
+        self.assertEqual(history.plate.get(["A1", "A2"])[0].tolist(), ["", ""])
+
+    def test_group_is_one_step(self):
+        with self.history.group():
+            self.plate.set("A1", "x")
+            self.plate.set("A2", "y")
+        self.plate.set("A3", "z")
+        self.assertEqual(len(self.history.undo_stack), 2)
+
+    def test_no_op_is_not_recorded(self):
+        self.plate.set("A1", "")
+        self.assertFalse(self.history.can_undo)
+
+    def test_oldest_steps_are_evicted(self):
+        history = History(PlateMap(96), max_bytes=1, merge_window=0)
+        for i in range(5):
+            history.plate.set("A1", str(i))
+        # Over budget, only the newest step is kept
+        self.assertEqual(len(history.undo_stack), 1)
+        self.assertEqual(history.nbytes, history.undo_stack[0].nbytes)
+        history.undo()
+        self.assertEqual(history.plate.sample[0, 0], "3")
+
+
+if __name__ == "__main__":
+    unittest.main()
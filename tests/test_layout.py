@@ -0,0 +1,70 @@
+import unittest
+
+from plateplanner.layout import pack, plan_plates
+
+
+def plate_count(sizes, capacity):
+    return -(-sum(sizes) // capacity)
+
+
+class PackTest(unittest.TestCase):
+    def check(self, sizes, capacity):
+        plates = pack(sizes, capacity)
+        self.assertEqual(len(plates), plate_count(sizes, capacity))
+        for segments in plates:
+            self.assertLessEqual(sum(count for _, _, count in segments), capacity)
+        # Every well of every block is placed exactly once
+        placed = {}
+        for segments in plates:
+            for block, start, count in segments:
+                placed.setdefault(block, []).append((start, count))
+        for block, size in enumerate(sizes):
+            spans = sorted(placed[block])
+            self.assertEqual(spans[0][0], 0)
+            self.assertEqual(sum(count for _, count in spans), size)
+        return plates
+
+    def test_whole_blocks_when_they_fit(self):
+        plates = self.check([50, 40, 46, 50], 96)
+        self.assertTrue(all(len({block for block, _, _ in segments}) == len(segments) for segments in plates))
+
+    def test_large_blocks_fill_whole_plates(self):
+        self.check([250, 10], 96)
+
+    def test_split_when_whole_blocks_need_an_extra_plate(self):
+        self.check([60, 60, 60], 96)
+
+    def test_many_sizes(self):
+        for n in range(1, 40):
+            self.check([(i * 37) % 90 + 1 for i in range(n)], 96)
+
+    def test_no_capacity(self):
+        with self.assertRaises(ValueError):
+            pack([1], 0)
+
+
+class PlanTest(unittest.TestCase):
+    def test_blocks_and_replicates(self):
+        plan = plan_plates(["s1", "s2"], ["F1", "F2"], replicates={"F2": 2}, controls=["NTC"])
+        plate = plan.plates["1"]
+        self.assertEqual(len(plan.plates), 1)
+        self.assertEqual(sorted(plate.distinct("primers")), ["F1", "F2"])
+        self.assertEqual([(block.primers, block.wells) for block in plan.blocks], [("F1", 3), ("F2", 5)])
+        self.assertEqual(plate.find(sample="s2", primers="F2").sum(), 2)
+
+    def test_reserved_wells_stay_empty(self):
+        plan = plan_plates([f"s{i}" for i in range(95)], ["F1"], reserved=["A1"])
+        self.assertEqual(len(plan.plates), 1)
+        self.assertFalse(plan.plates["1"].occupied("A1")[0])
+
+    def test_bad_input(self):
+        with self.assertRaises(ValueError):
+            plan_plates(["s1", "s1"], ["F1"])
+        with self.assertRaises(ValueError):
+            plan_plates(["s1"], [])
+        with self.assertRaises(ValueError):
+            plan_plates(["s1"], ["F1"], replicates=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import unittest
+
+import numpy as np
+
+from plateplanner import MoveError, PlateMap
+
+
+def filled(*wells, geometry=96):
+    # Plate with each named well holding its own label as the sample
+    plate = PlateMap(geometry)
+    plate.set(list(wells), list(wells), "P")
+    return plate
+
+
+class MoveTest(unittest.TestCase):
+    def test_overlapping_shift(self):
+        plate = filled("A1", "A2", "A3")
+        plate.shift(["A1", "A2", "A3"], d_cols=1)
+        self.assertEqual(plate.get(["A1", "A2", "A3", "A4"])[0].tolist(), ["", "A1", "A2", "A3"])
+
+    def test_occupied_target_leaves_plate_untouched(self):
+        plate = filled("A1", "A2", "B2")
+        before = plate.codes.copy()
+        with self.assertRaises(MoveError) as caught:
+            plate.move(["A1", "A2"], ["B1", "B2"])
+        self.assertEqual(caught.exception.blocked, ["B2"])
+        np.testing.assert_array_equal(plate.codes, before)
+
+    def test_outside_plate(self):
+        plate = filled("H12")
+        with self.assertRaises(MoveError):
+            plate.shift(["H12"], d_rows=1)
+
+    def test_several_wells_to_one_target(self):
+        plate = filled("A1", "A2")
+        with self.assertRaises(ValueError):
+            plate.move(["A1", "A2"], ["B1", "B1"])
+
+    def test_block_shift_into_vacated_wells(self):
+        # Every row but the last, down by one, as app4's apply_move does it
+        plate = filled("A1", "B1", "G12")
+        rows, cols = np.nonzero(np.ones((7, 12), dtype=bool))
+        changes = []
+        plate.subscribe(changes.append)
+        plate.shift((rows, cols), d_rows=1)
+        self.assertEqual(plate.get(["A1", "B1", "C1", "H12"])[0].tolist(), ["", "A1", "B1", "G12"])
+        self.assertEqual(len(changes), 1)
+
+    def test_quadrant_shift_on_384_wells(self):
+        plate = filled("A1", "H12", geometry=384)
+        plate.shift(plate.region("A1", "H12"), d_rows=8, d_cols=12)
+        self.assertEqual(plate.label(*np.nonzero(plate.occupied())), ["I13", "P24"])
+        self.assertEqual(plate.get("P24")[0].tolist(), ["H12"])
+
+
+if __name__ == "__main__":
+    unittest.main()
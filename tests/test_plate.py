@@ -0,0 +1,77 @@
+import unittest
+
+import numpy as np
+
+from plateplanner import PlateMap
+
+
+def filled(*wells):
+    # 96-well plate with each named well holding its own label as the sample
+    plate = PlateMap(96)
+    plate.set(list(wells), list(wells), "P")
+    return plate
+
+
+class PlateMapTest(unittest.TestCase):
+    def test_set_and_get(self):
+        plate = PlateMap(96)
+        plate.set(["A1", "B1"], ["x", "y"], "P")
+        plate.set("B1", primers="Q")
+        sample, primers = plate.get(["A1", "B1", "C1"])
+        self.assertEqual(sample.tolist(), ["x", "y", ""])
+        self.assertEqual(primers.tolist(), ["P", "Q", ""])
+        self.assertEqual(plate.sample[1, 0], "y")
+
+    def test_wells_by_label_or_coordinates(self):
+        plate = PlateMap(96)
+        plate.set(plate.region("B2", "A1"), "x")
+        self.assertEqual(plate.label(*np.nonzero(plate.occupied())), ["A1", "A2", "B1", "B2"])
+        self.assertEqual(plate.get(([0], [1]))[0].tolist(), ["x"])
+
+    def test_clear(self):
+        plate = filled("A1", "A2")
+        plate.clear(["A1"])
+        self.assertEqual(plate.get(["A1", "A2"])[0].tolist(), ["", "A2"])
+        plate.clear()
+        self.assertFalse(plate.occupied().any())
+
+    def test_records_are_column_major(self):
+        records = list(filled("A2", "B1").records())
+        self.assertEqual(len(records), 96)
+        self.assertEqual(records[:2], [("A1", "", ""), ("B1", "B1", "P")])
+        self.assertEqual(records[8], ("A2", "A2", "P"))
+
+    def test_listeners_see_each_change(self):
+        plate = PlateMap(96)
+        changes = []
+        plate.subscribe(changes.append)
+        plate.set(["A1", "A2"], "x")
+        plate.unsubscribe(changes.append)
+        plate.set("A3", "y")
+        self.assertEqual(len(changes), 1)
+        self.assertEqual(plate.label(changes[0].rows, changes[0].cols), ["A1", "A2"])
+
+    def test_frame_round_trip(self):
+        plate = filled("A1", "H12")
+        np.testing.assert_array_equal(PlateMap.from_frame(plate.to_frame()).sample, plate.sample)
+
+
+class SwapTest(unittest.TestCase):
+    def test_swap(self):
+        plate = filled("A1", "A2")
+        plate.swap(["A1"], ["A2"])
+        self.assertEqual(plate.get(["A1", "A2"])[0].tolist(), ["A2", "A1"])
+
+    def test_overlapping_sets_are_rejected(self):
+        plate = filled("A1", "A2", "A3")
+        with self.assertRaises(ValueError):
+            plate.swap(["A1", "A2"], ["A2", "A3"])
+        self.assertEqual(plate.get(["A1", "A2", "A3"])[0].tolist(), ["A1", "A2", "A3"])
+
+    def test_lengths_must_match(self):
+        with self.assertRaises(ValueError):
+            filled("A1").swap(["A1"], ["A2", "A3"])
+
+
+if __name__ == "__main__":
+    unittest.main()
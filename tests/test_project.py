@@ -0,0 +1,74 @@
+import gc
+import tempfile
+import unittest
+from pathlib import Path
+
+from plateplanner import PlateMap, Project
+from plateplanner.binfmt import read_plates, write_plates
+
+
+class ProjectTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.dir.name) / "run.plates"
+        write_plates({str(i): PlateMap(96) for i in range(20)}, self.path)
+        self.project = Project.open(self.path, max_loaded=4)
+
+    def tearDown(self):
+        self.project.store.close()
+        self.dir.cleanup()
+
+    def saved(self, plate_id, well="A1"):
+        self.project.store.close()
+        return read_plates(self.path)[plate_id].get(well)[0].tolist()
+
+    def test_lru_writes_back_evicted_edits(self):
+        self.project["0"].set("A1", "x")
+        for plate_id in self.project:
+            self.project[plate_id]
+        self.assertFalse(self.project.is_loaded("0"))
+        self.assertEqual(self.project.dirty, set())
+        self.project.save()
+        self.assertEqual(self.saved("0"), ["x"])
+
+    def test_held_plate_survives_eviction(self):
+        shown = self.project["0"]
+        for plate_id in self.project:
+            self.project[plate_id]
+        self.assertIs(self.project["0"], shown)
+        for plate_id in self.project:
+            self.project[plate_id]
+        shown.set("A1", "edited")
+        self.assertEqual(self.project.dirty, {"0"})
+        self.project.save()
+        self.assertEqual(self.saved("0"), ["edited"])
+
+    def test_items_leave_the_lru_alone(self):
+        shown = self.project["0"]
+        shown.set("A1", "edited")
+        self.assertEqual(dict(self.project.items())["0"].get("A1")[0].tolist(), ["edited"])
+        self.assertEqual([p for p in self.project if self.project.is_loaded(p)], ["0"])
+
+    def test_save_as_keeps_tracking_the_open_plate(self):
+        shown = self.project["0"]
+        target = self.project.save_as(Path(self.dir.name) / "copy")
+        self.assertEqual(sorted(target, key=int), [str(i) for i in range(20)])
+        shown.set("A1", "edited")
+        self.project.save()
+        self.assertEqual(self.saved("0"), ["edited"])
+
+    def test_unreferenced_plates_are_reloaded(self):
+        self.project["0"].set("A1", "x")
+        for plate_id in self.project:
+            self.project[plate_id]
+        gc.collect()
+        plate = self.project["0"]
+        self.assertEqual(plate.get("A1")[0].tolist(), ["x"])
+        plate.set("A2", "y")
+        self.assertEqual(self.project.dirty, {"0"})
+        self.project.remove("0")
+        self.assertNotIn("0", self.project)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import unittest
+
+from plateplanner import PlateMap
+from plateplanner.colours import ColourMap
+
+try:
+    from PySide6.QtCore import QCoreApplication, Qt
+except ImportError:
+    QCoreApplication = None
+else:
+    from plateplanner.qt import PlateTableModel, PositionRole, PrimersRole, WellListProxy
+
+
+def spans(model, changed):
+    # Run changed() and return the (top, left, bottom, right) rectangles the model signals
+    emitted = []
+    slot = lambda top_left, bottom_right, roles=(): emitted.append(
+        (top_left.row(), top_left.column(), bottom_right.row(), bottom_right.column()))
+    model.dataChanged.connect(slot)
+    try:
+        changed()
+    finally:
+        model.dataChanged.disconnect(slot)
+    return emitted
+
+
+@unittest.skipIf(QCoreApplication is None, "PySide6 is not installed")
+class PlateTableModelTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QCoreApplication([])
+
+    def setUp(self):
+        self.plate = PlateMap(96)
+        self.plate.set(["A1", "B2"], ["x", "y"], ["p", "q"])
+        self.colours = ColourMap()
+        self.model = PlateTableModel(self.plate, colours=self.colours)
+
+    def test_data(self):
+        index = self.model.index(1, 1)
+        self.assertEqual((self.model.rowCount(), self.model.columnCount()), (8, 12))
+        self.assertEqual(index.data(), "y")
+        self.assertEqual(index.data(PrimersRole), "q")
+        self.assertEqual(index.data(PositionRole), "B2")
+        self.assertEqual(index.data(Qt.BackgroundRole).name(), self.colours.colour("q").lower())
+        self.assertIsNone(self.model.index(0, 1).data(Qt.BackgroundRole))
+        self.assertEqual(self.model.headerData(0, Qt.Vertical), "A")
+
+    def test_set_data_writes_the_plate(self):
+        self.assertTrue(self.model.setData(self.model.index_of("C3"), "z"))
+        self.assertTrue(self.model.setData(self.model.index_of("C3"), "r", PrimersRole))
+        self.assertEqual([a.tolist() for a in self.plate.get("C3")], [["z"], ["r"]])
+
+    def test_changes_signal_only_the_changed_wells(self):
+        emitted = spans(self.model, lambda: self.plate.set(["A3", "A4", "A6", "C1"], "z"))
+        self.assertEqual(emitted, [(0, 2, 0, 3), (0, 5, 0, 5), (2, 0, 2, 0)])
+
+    def test_large_changes_signal_one_rectangle(self):
+        wells = [f"{row}{col}" for row in "BCDEF" for col in (2, 5, 8, 11)]
+        emitted = spans(self.model, lambda: self.plate.set(wells, "z"))
+        self.assertEqual(emitted, [(1, 1, 5, 10)])
+
+    def test_colours_follow_the_primers_on_the_plate(self):
+        self.plate.set("B2", primers="")
+        self.assertEqual(set(self.colours.mapping()), {"p"})
+        self.plate.set("C1", primers="r")
+        self.assertEqual(set(self.colours.mapping()), {"p", "r"})
+
+    def test_set_plate_resets(self):
+        other = PlateMap(384)
+        resets = []
+        self.model.modelReset.connect(lambda: resets.append(True))
+        self.model.set_plate(other)
+        self.assertEqual((resets, self.model.rowCount()), ([True], 16))
+        self.assertEqual(spans(self.model, lambda: self.plate.set("A1", "z")), [])
+        self.assertEqual(spans(self.model, lambda: other.set("P24", "z")), [(15, 23, 15, 23)])
+
+
+@unittest.skipIf(QCoreApplication is None, "PySide6 is not installed")
+class WellListProxyTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QCoreApplication.instance() or QCoreApplication([])
+
+    def setUp(self):
+        self.plate = PlateMap(96)
+        self.plate.set(["A1", "B2"], ["x", "y"], ["p", "q"])
+        self.model = PlateTableModel(self.plate)
+        self.proxy = WellListProxy()
+        self.proxy.setSourceModel(self.model)
+
+    def row(self, i):
+        return [self.proxy.index(i, column).data() for column in range(3)]
+
+    def test_wells_are_listed_column_major(self):
+        self.assertEqual((self.proxy.rowCount(), self.proxy.columnCount()), (96, 3))
+        self.assertEqual(self.row(0), ["A1", "x", "p"])
+        self.assertEqual(self.row(1), ["B1", "", ""])
+        self.assertEqual(self.row(9), ["B2", "y", "q"])
+        self.assertEqual(self.proxy.headerData(2, Qt.Horizontal), "Primers")
+
+    def test_edits_go_to_the_plate(self):
+        self.assertFalse(self.proxy.setData(self.proxy.index(0, 0), "Z9"))
+        self.assertTrue(self.proxy.setData(self.proxy.index(2, 1), "z"))
+        self.assertTrue(self.proxy.setData(self.proxy.index(2, 2), "r"))
+        self.assertEqual([a.tolist() for a in self.plate.get("C1")], [["z"], ["r"]])
+
+    def test_changes_signal_only_the_listed_rows(self):
+        emitted = spans(self.proxy, lambda: self.plate.set(["A1", "B1", "C1", "A2"], "z"))
+        self.assertEqual(emitted, [(0, 0, 0, 2), (8, 0, 8, 2), (1, 0, 1, 2), (2, 0, 2, 2)])
+
+    def test_rectangles_become_runs_of_rows(self):
+        emitted = spans(self.proxy, lambda: self.model.dataChanged.emit(self.model.index(0, 0), self.model.index(7, 1)))
+        self.assertEqual(emitted, [(0, 0, 15, 2)])
+        emitted = spans(self.proxy, lambda: self.model.dataChanged.emit(self.model.index(1, 0), self.model.index(2, 1)))
+        self.assertEqual(emitted, [(1, 0, 2, 2), (9, 0, 10, 2)])
+
+    def test_plate_switch_resets_the_list(self):
+        resets = []
+        self.proxy.modelReset.connect(lambda: resets.append(True))
+        self.model.set_plate(PlateMap(384))
+        self.assertEqual((resets, self.proxy.rowCount()), ([True], 384))
+
+
+if __name__ == "__main__":
+    unittest.main()
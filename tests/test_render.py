@@ -0,0 +1,99 @@
+import io
+import re
+import struct
+import tempfile
+import unittest
+from pathlib import Path
+
+from plateplanner import PlateMap, Project
+from plateplanner.colours import ColourMap
+from plateplanner.render import plate_layout, render_plate, render_project
+
+try:
+    import matplotlib
+except ImportError:
+    matplotlib = None
+
+
+def filled(*samples):
+    # 96-well plate with the samples along row A, all on primer "P"
+    plate = PlateMap(96)
+    plate.set([f"A{i + 1}" for i in range(len(samples))], list(samples), "P")
+    return plate
+
+
+def pages(pdf):
+    return len(re.findall(rb"/Type\s*/Page\b(?!s)", pdf))
+
+
+class SvgTest(unittest.TestCase):
+    def test_wells_titles_and_labels(self):
+        colours = ColourMap()
+        buffer = io.BytesIO()
+        render_plate(filled("x & y", "a very long sample name"), buffer, "svg", title="<run 1>", colours=colours)
+        svg = buffer.getvalue().decode()
+        self.assertTrue(svg.startswith("<svg") and svg.endswith("</svg>"))
+        self.assertIn("&lt;run 1&gt;", svg)
+        self.assertEqual(svg.count(f'fill="{colours.colour("P")}"'), 2)
+        self.assertIn(">x &amp; y</text>", svg)
+        self.assertIn("…</text>", svg)
+
+    def test_layout_is_shared_per_format(self):
+        self.assertIs(plate_layout(384), plate_layout(384))
+        layout = plate_layout(1536, pitch=12)
+        self.assertEqual(layout.x.shape, (32, 48))
+        self.assertIn(">AF</text>", layout.svg_static)
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            render_plate(filled("x"), io.BytesIO(), "gif")
+
+
+@unittest.skipIf(matplotlib is None, "matplotlib is not installed")
+class RasterTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.dir.name)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_png(self):
+        path = self.root / "plate.png"
+        render_plate(filled("x"), path, dpi=72)
+        data = path.read_bytes()
+        self.assertEqual(data[:8], b"\x89PNG\r\n\x1a\n")
+        layout = plate_layout(96)
+        self.assertEqual(struct.unpack(">II", data[16:24]), (round(layout.width), round(layout.height)))
+
+    def test_pdf(self):
+        buffer = io.BytesIO()
+        render_plate(PlateMap(384), buffer, "pdf")
+        self.assertTrue(buffer.getvalue().startswith(b"%PDF"))
+        self.assertEqual(pages(buffer.getvalue()), 1)
+
+    def test_project_pdf_has_a_page_per_plate(self):
+        project = Project()
+        for i in range(3):
+            project.add(str(i), filled(str(i)))
+        project.add("big", geometry=1536)
+        done = []
+        paths = render_project(project, self.root / "all.pdf", progress=lambda *args: done.append(args))
+        self.assertEqual(paths, [self.root / "all.pdf"])
+        self.assertEqual(pages(paths[0].read_bytes()), 4)
+        self.assertEqual(done[-1], (4, 4))
+
+    def test_project_files(self):
+        plates = {f"p{i}": filled(f"s{i}") for i in range(9)}
+        for workers in (1, 2):
+            with self.subTest(workers=workers):
+                out = self.root / f"w{workers}"
+                done = []
+                paths = render_project(plates, out, "png", workers=workers, progress=lambda *args: done.append(args))
+                self.assertEqual(sorted(p.name for p in out.iterdir()), sorted(f"{i}.png" for i in plates))
+                self.assertEqual(len(paths), 9)
+                self.assertEqual(done[-1], (9, 9))
+
+
+if __name__ == "__main__":
+    unittest.main()
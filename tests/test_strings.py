@@ -0,0 +1,82 @@
+import pickle
+import unittest
+
+import numpy as np
+
+from plateplanner import POOL, PlateMap, StringPool
+
+
+def filled(*wells):
+    # 96-well plate with each named well holding its own label as the sample
+    plate = PlateMap(96)
+    plate.set(list(wells), list(wells), "P")
+    return plate
+
+
+class StringPoolTest(unittest.TestCase):
+    def test_codes_are_stable(self):
+        pool = StringPool(["a"])
+        self.assertEqual(pool.code(""), 0)
+        self.assertEqual(pool.encode([["b", "a"], ["", "b"]]).tolist(), [[2, 1], [0, 2]])
+        self.assertEqual(pool.encode("a"), 1)
+        self.assertEqual(pool.strings(), ["", "a", "b"])
+        self.assertEqual(pool.decode(np.array([2, 0, 1])).tolist(), ["b", "", "a"])
+
+    def test_lookup_does_not_add(self):
+        pool = StringPool()
+        self.assertIsNone(pool.lookup("x"))
+        self.assertNotIn("x", pool)
+        self.assertEqual(len(pool), 1)
+
+    def test_growth_keeps_codes(self):
+        pool = StringPool()
+        names = [f"s{i}" for i in range(1000)]
+        codes = pool.encode(names)
+        self.assertEqual(codes.tolist(), list(range(1, 1001)))
+        self.assertEqual(pool[500], "s499")
+
+    def test_pickle_keeps_codes(self):
+        pool = StringPool(["x", "y"])
+        copy = pickle.loads(pickle.dumps(pool))
+        self.assertEqual((copy.strings(), copy.code("y")), (pool.strings(), 2))
+
+
+class StringsTest(unittest.TestCase):
+    def test_decoded_arrays_are_read_only(self):
+        plate = filled("A1")
+        with self.assertRaises(ValueError):
+            plate.sample[0, 0] = "x"
+
+    def test_groups_find_distinct(self):
+        plate = PlateMap(96)
+        plate.set(["A1", "B1", "C1"], ["s1", "s2", "s1"], ["p1", "p2", "p1"])
+        rows, cols = plate.groups("sample")["s1"]
+        self.assertEqual(plate.label(rows, cols), ["A1", "C1"])
+        self.assertEqual(plate.find(sample="s1", primers="p1").sum(), 2)
+        self.assertEqual(plate.find(sample="never used").sum(), 0)
+        self.assertEqual(sorted(plate.distinct("primers")), ["p1", "p2"])
+
+    def test_non_strings_are_stored_as_text(self):
+        plate = PlateMap(96)
+        plate.set(["A1", "A2"], [7, "7"])
+        self.assertEqual(plate.codes[0, 0, 0], plate.codes[0, 0, 1])
+
+    def test_pickle_shared_pool(self):
+        plate = filled("A1")
+        copy = pickle.loads(pickle.dumps(plate))
+        self.assertIs(copy.pool, POOL)
+        np.testing.assert_array_equal(copy.sample, plate.sample)
+
+    def test_pickle_own_pool(self):
+        pool = StringPool()
+        a, b = PlateMap(96, pool=pool), PlateMap(96, pool=pool)
+        a.set("A1", "x")
+        b.set("A1", "y")
+        a2, b2 = pickle.loads(pickle.dumps([a, b]))
+        self.assertIs(a2.pool, b2.pool)
+        self.assertIsNot(a2.pool, POOL)
+        self.assertEqual((a2.sample[0, 0], b2.sample[0, 0]), ("x", "y"))
+
+
+if __name__ == "__main__":
+    unittest.main()
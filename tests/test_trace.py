@@ -0,0 +1,71 @@
+import io
+import json
+import unittest
+
+from plateplanner import PlateMap, trace
+
+
+@trace.traced("test.work", "test")
+def work(x):
+    return x * 2
+
+
+class TraceTest(unittest.TestCase):
+    def setUp(self):
+        self.was_enabled = trace.enabled
+        trace.clear()
+
+    def tearDown(self):
+        trace.enable(trace.CAPACITY)
+        if not self.was_enabled:
+            trace.disable()
+        trace.clear()
+
+    def test_nothing_is_recorded_while_disabled(self):
+        trace.disable()
+        self.assertEqual(work(2), 4)
+        with trace.span("test.block"):
+            pass
+        self.assertEqual(trace.events(), [])
+
+    def test_calls_and_spans_are_recorded(self):
+        trace.enable()
+        work(1)
+        with trace.span("test.block", "test"):
+            PlateMap(96).set("A1", "x")
+        # Events are stored as they finish, so nested ones come first
+        names = [event[0] for event in trace.events()]
+        self.assertEqual(names, ["test.work", "plate.notify", "plate.set", "test.block"])
+        self.assertTrue(all(event[3] >= 0 for event in trace.events()))
+
+    def test_errors_are_still_timed(self):
+        trace.enable()
+        with self.assertRaises(TypeError):
+            work(None)
+        self.assertEqual([event[0] for event in trace.events()], ["test.work"])
+
+    def test_ring_buffer_keeps_the_newest_events(self):
+        trace.enable(capacity=5)
+        for i in range(8):
+            trace.record(f"e{i}", i, 1)
+        self.assertEqual([event[0] for event in trace.events()], ["e3", "e4", "e5", "e6", "e7"])
+        trace.enable(capacity=3)
+        self.assertEqual([event[0] for event in trace.events()], ["e5", "e6", "e7"])
+
+    def test_summary(self):
+        events = [("a", "x", 0, ms * 1_000_000, 1) for ms in (1, 2, 3)] + [("b", "x", 0, 10_000_000, 1)]
+        self.assertEqual(trace.summary(events), [("b", 1, 10.0, 10.0, 10.0, 10.0), ("a", 3, 6.0, 2.0, 3.0, 3.0)])
+        lines = trace.format_summary(events).splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[1].startswith("b "))
+
+    def test_chrome_trace(self):
+        buffer = io.StringIO()
+        trace.write_chrome(buffer, [("a", "x", 2000, 5000, 7)])
+        (event,) = json.loads(buffer.getvalue())["traceEvents"]
+        self.assertEqual({k: event[k] for k in ("name", "cat", "ph", "ts", "dur", "tid")},
+                         {"name": "a", "cat": "x", "ph": "X", "ts": 2.0, "dur": 5.0, "tid": 7})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,17 @@
 from django import forms
-from .models import Plate
 
-class PlateForm(forms.ModelForm):
-    class Meta:
-        model = Plate
-        fields = ['sample', 'primers']
\ No newline at end of file
+from plateplanner import FORMATS
+
+
+class WellForm(forms.Form):
+    sample = forms.CharField(max_length=100, required=False)
+    primers = forms.CharField(max_length=100, required=False)
+    # The plate revision the form was filled in against, so a concurrent edit is caught
+    revision = forms.IntegerField(min_value=0, widget=forms.HiddenInput)
+
+
+class UploadForm(forms.Form):
+    file = forms.FileField()
+    project = forms.CharField(max_length=100, initial='Default')
+    size = forms.TypedChoiceField(
+        choices=[(wells, f'{wells}-well') for wells in FORMATS], coerce=int, initial=96, label='Format')
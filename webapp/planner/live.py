@@ -0,0 +1,106 @@
+"""Live plate updates over websockets.
+
+Each plate has a channel at ``/ws/plate/<id>/``. Writes publish the wells
+they changed to the in-process hub, which coalesces a burst of updates to a
+plate into one message per ``window`` and pushes it to every socket watching
+that plate::
+
+    {"revision": 12, "wells": [{"pos": "A1", "sample": "x", "primers": "y"}, ...]}
+
+Writes that touch too much to list (CSV imports) send ``{"reload": true}``
+instead, and clients fetch the plate again. The hub lives in memory, so all
+clients of a plate must be served by the same process.
+"""
+import asyncio
+import json
+import re
+from collections import defaultdict
+
+SOCKET_PATH = re.compile(r'^/ws/plate/(?P<plate_id>\d+)/$')
+
+
+class Hub:
+    def __init__(self, window=0.05):
+        self.window = window
+        self.loop = None
+        self.groups = defaultdict(set)  # plate id -> queues of the sockets watching it
+        self.pending = {}  # plate id -> update being coalesced
+
+    def subscribe(self, plate_id):
+        self.loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        self.groups[plate_id].add(queue)
+        return queue
+
+    def unsubscribe(self, plate_id, queue):
+        self.groups[plate_id].discard(queue)
+        if not self.groups[plate_id]:
+            del self.groups[plate_id]
+
+    def publish(self, plate_id, revision=None, wells=None):
+        # Safe to call from any thread, e.g. sync views running in a worker thread.
+        # wells=None asks clients to reload the whole plate.
+        loop = self.loop
+        if loop is None or loop.is_closed() or plate_id not in self.groups:
+            return
+        wells = None if wells is None else [{'pos': pos, 'sample': sample, 'primers': primers} for pos, sample, primers in wells]
+        loop.call_soon_threadsafe(self._add, plate_id, revision, wells)
+
+    def _add(self, plate_id, revision, wells):
+        pending = self.pending.get(plate_id)
+        if pending is None:
+            pending = self.pending[plate_id] = {'revision': revision, 'wells': {}, 'reload': False}
+            self.loop.call_later(self.window, self._flush, plate_id)
+        if revision is not None:
+            pending['revision'] = max(revision, pending['revision'] or 0)
+        if wells is None:
+            pending['reload'] = True
+        else:
+            # Later updates to a well replace earlier ones
+            pending['wells'].update((well['pos'], well) for well in wells)
+
+    def _flush(self, plate_id):
+        pending = self.pending.pop(plate_id)
+        if pending['reload']:
+            message = {'revision': pending['revision'], 'reload': True}
+        else:
+            message = {'revision': pending['revision'], 'wells': list(pending['wells'].values())}
+        for queue in self.groups.get(plate_id, ()):
+            queue.put_nowait(message)
+
+
+hub = Hub()
+
+
+async def plate_socket(scope, receive, send, plate_id):
+    message = await receive()
+    if message['type'] != 'websocket.connect':
+        return
+    await send({'type': 'websocket.accept'})
+    queue = hub.subscribe(plate_id)
+    receiving = asyncio.ensure_future(receive())
+    update = asyncio.ensure_future(queue.get())
+    try:
+        while True:
+            done, _ = await asyncio.wait({receiving, update}, return_when=asyncio.FIRST_COMPLETED)
+            if update in done:
+                await send({'type': 'websocket.send', 'text': json.dumps(update.result())})
+                update = asyncio.ensure_future(queue.get())
+            if receiving in done:
+                # Clients only listen; edits go through the JSON API or the edit form
+                if receiving.result()['type'] == 'websocket.disconnect':
+                    break
+                receiving = asyncio.ensure_future(receive())
+    finally:
+        receiving.cancel()
+        update.cancel()
+        hub.unsubscribe(plate_id, queue)
+
+
+async def websocket_application(scope, receive, send):
+    match = SOCKET_PATH.match(scope['path'])
+    if match is None:
+        await receive()
+        await send({'type': 'websocket.close', 'code': 4404})
+        return
+    await plate_socket(scope, receive, send, int(match['plate_id']))
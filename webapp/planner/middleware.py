@@ -0,0 +1,23 @@
+import time
+
+from django.core.exceptions import MiddlewareNotUsed
+
+from plateplanner import trace
+
+
+class TraceMiddleware:
+    # Records each request's time under its view name while tracing is on (PLATEPLANNER_TRACE
+    # set at startup). When it is off Django drops the middleware, so it costs nothing.
+    # Streamed responses are timed up to their first byte.
+    def __init__(self, get_response):
+        if not trace.enabled:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter_ns()
+        response = self.get_response(request)
+        match = request.resolver_match
+        name = f'view.{match.view_name}' if match else f'path.{request.path}'
+        trace.record(name, start, time.perf_counter_ns() - start, 'django')
+        return response
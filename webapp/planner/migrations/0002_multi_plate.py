@@ -0,0 +1,109 @@
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def row_col(pos):
+    # 96-well label, e.g. "H12" -> (7, 11)
+    return ord(pos[0].upper()) - ord('A'), int(pos[1:]) - 1
+
+
+def copy_wells(apps, schema_editor):
+    # The single plate of the old schema becomes plate "1" of a default project
+    LegacyWell = apps.get_model('planner', 'LegacyWell')
+    if not LegacyWell.objects.exists():
+        return
+    Project = apps.get_model('planner', 'Project')
+    Plate = apps.get_model('planner', 'Plate')
+    Sample = apps.get_model('planner', 'Sample')
+    Primer = apps.get_model('planner', 'Primer')
+    Well = apps.get_model('planner', 'Well')
+
+    plate = Plate.objects.create(project=Project.objects.create(name='Default'), name='1', size=96)
+    legacy = list(LegacyWell.objects.values_list('pos', 'sample', 'primers'))
+    samples = {name for _, name, _ in legacy if name}
+    primers = {name for _, _, name in legacy if name}
+    Sample.objects.bulk_create([Sample(name=name) for name in samples])
+    Primer.objects.bulk_create([Primer(name=name) for name in primers])
+    sample_ids = dict(Sample.objects.values_list('name', 'id'))
+    primer_ids = dict(Primer.objects.values_list('name', 'id'))
+    Well.objects.bulk_create([
+        Well(plate=plate, row=row_col(pos)[0], col=row_col(pos)[1],
+             sample_id=sample_ids.get(sample), primers_id=primer_ids.get(primer))
+        for pos, sample, primer in legacy
+    ])
+
+
+def copy_wells_back(apps, schema_editor):
+    # Only one plate fits the old schema: keep the first
+    LegacyWell = apps.get_model('planner', 'LegacyWell')
+    Plate = apps.get_model('planner', 'Plate')
+    Well = apps.get_model('planner', 'Well')
+    plate = Plate.objects.order_by('id').first()
+    if plate is None:
+        return
+    LegacyWell.objects.bulk_create([
+        LegacyWell(pos=f'{chr(ord("A") + row)}{col + 1}', sample=sample or '', primers=primers or '')
+        for row, col, sample, primers in Well.objects.filter(plate=plate, row__lt=8, col__lt=12)
+        .values_list('row', 'col', 'sample__name', 'primers__name')
+    ])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('planner', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RenameModel('Plate', 'LegacyWell'),
+        migrations.CreateModel(
+            name='Project',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Sample',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Primer',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Plate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('size', models.PositiveSmallIntegerField(default=96)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='plates', to='planner.project')),
+            ],
+            options={
+                'ordering': ['project', 'name'],
+                'constraints': [models.UniqueConstraint(fields=('project', 'name'), name='unique_plate_name')],
+            },
+        ),
+        migrations.CreateModel(
+            name='Well',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('row', models.PositiveSmallIntegerField()),
+                ('col', models.PositiveSmallIntegerField()),
+                ('plate', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='wells', to='planner.plate')),
+                ('sample', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='wells', to='planner.sample')),
+                ('primers', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='wells', to='planner.primer')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('plate', 'row', 'col'), name='unique_well')],
+            },
+        ),
+        migrations.RunPython(copy_wells, copy_wells_back),
+        migrations.DeleteModel('LegacyWell'),
+    ]
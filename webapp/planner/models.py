@@ -1,10 +1,67 @@
 from django.db import models
 
-# Create your models here.
+from plateplanner import get_geometry
+
+
+class Project(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+
+    def __str__(self):
+        return self.name
+
+
 class Plate(models.Model):
-    pos = models.CharField(max_length=3, primary_key=True)
-    sample = models.CharField(max_length=100, blank=True)
-    primers = models.CharField(max_length=100, blank=True)
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='plates')
+    name = models.CharField(max_length=100)
+    size = models.PositiveSmallIntegerField(default=96)  # wells, one of plateplanner.FORMATS
+    # Bumped on every write to the plate's wells, so clients can tell when it changed
+    revision = models.PositiveIntegerField(default=0)
+    updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['project', 'name']
+        constraints = [
+            models.UniqueConstraint(fields=['project', 'name'], name='unique_plate_name'),
+        ]
+
+    def __str__(self):
+        return f'{self.project} / {self.name}'
+
+    @property
+    def geometry(self):
+        return get_geometry(self.size)
+
+
+# Sample and primer names are stored once and referenced by id from every well
+class Sample(models.Model):
+    name = models.CharField(max_length=100, unique=True)
+
+    def __str__(self):
+        return self.name
+
+
+class Primer(models.Model):
+    name = models.CharField(max_length=100, unique=True)
 
     def __str__(self):
-        return self.pos
\ No newline at end of file
+        return self.name
+
+
+class Well(models.Model):
+    plate = models.ForeignKey(Plate, on_delete=models.CASCADE, related_name='wells')
+    row = models.PositiveSmallIntegerField()  # 0-based, as in PlateMap
+    col = models.PositiveSmallIntegerField()
+    sample = models.ForeignKey(Sample, on_delete=models.PROTECT, null=True, blank=True, related_name='wells')
+    primers = models.ForeignKey(Primer, on_delete=models.PROTECT, null=True, blank=True, related_name='wells')
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['plate', 'row', 'col'], name='unique_well'),
+        ]
+
+    def __str__(self):
+        return self.pos
+
+    @property
+    def pos(self):
+        return self.plate.geometry.labels[self.row, self.col]
@@ -0,0 +1,234 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+import numpy as np
+
+from plateplanner import PlateMap, StringPool, get_geometry
+from plateplanner.csvio import CSVImportError, iter_records
+from plateplanner.trace import traced
+from .live import hub
+from .models import Plate, Primer, Sample, Well
+
+
+class Conflict(Exception):
+    # The plate changed since the client read it
+    def __init__(self, revision):
+        super().__init__(f'plate is at revision {revision}')
+        self.revision = revision
+
+
+class Interner:
+    """Maps sample or primer names to row ids, creating missing rows in bulk."""
+
+    def __init__(self, model):
+        self.model = model
+        self.ids = {}
+
+    def add(self, names):
+        missing = {name for name in names if name and name not in self.ids}
+        if missing:
+            self.model.objects.bulk_create([self.model(name=name) for name in missing], ignore_conflicts=True)
+            self.ids.update(self.model.objects.filter(name__in=missing).values_list('name', 'id'))
+
+    def get(self, name):
+        # Empty names are stored as NULL
+        return self.ids[name] if name else None
+
+
+def touch(plate_ids):
+    # Record a write to these plates
+    Plate.objects.filter(id__in=plate_ids).update(revision=F('revision') + 1, updated=timezone.now())
+
+
+@traced('db.import_csv', 'django')
+def import_csv(source, project, geometry=96, default_plate='1', chunk_size=500):
+    """Upsert the wells of an uploaded CSV into a project in a single transaction.
+
+    Rows go to the plate named in their ``plate`` column (``default_plate`` if
+    the file has none), creating plates as needed. The file is streamed and
+    written in chunks of ``chunk_size`` wells with bulk upserts. Every invalid
+    row is collected and raised together in one CSVImportError, which rolls the
+    whole import back. Returns the number of wells written.
+    """
+    geometry = get_geometry(geometry)
+    records = iter_records(source)
+    layout = next(records)
+    plates = {plate.name: plate for plate in project.plates.all()}
+    samples, primers = Interner(Sample), Interner(Primer)
+    errors, seen, filled, touched = [], {}, {}, set()
+    chunk, written = [], 0
+
+    with transaction.atomic():
+        for line, plate_name, pos, sample, primer in records:
+            plate_name = plate_name or default_plate
+            touched.add(plate_name)
+            plate = plates.get(plate_name)
+            if plate is None:
+                plate = plates[plate_name] = Plate.objects.create(project=project, name=plate_name, size=geometry.wells)
+            elif plate.size != geometry.wells:
+                errors.append((line, f'plate {plate_name} is a {plate.size}-well plate'))
+                continue
+            if layout == 'sequential':
+                # No positions: fill wells column-major in file order
+                n = filled[plate_name] = filled.get(plate_name, 0) + 1
+                if n > geometry.wells:
+                    errors.append((line, f'plate {plate_name} already has {geometry.wells} wells'))
+                    continue
+                col, row = divmod(n - 1, geometry.rows)
+            else:
+                k = geometry.lookup.get(pos.upper())
+                if k is None:
+                    errors.append((line, 'missing position' if not pos else f'{pos!r} is not a well on a {geometry.wells}-well plate'))
+                    continue
+                if (plate_name, k) in seen:
+                    errors.append((line, f'{pos} already assigned on line {seen[plate_name, k]}'))
+                    continue
+                seen[plate_name, k] = line
+                row, col = divmod(k, geometry.cols)
+            if errors:
+                continue  # keep validating, but nothing more will be written
+            chunk.append((plate, row, col, sample, primer))
+            if len(chunk) >= chunk_size:
+                written += _upsert(chunk, samples, primers)
+                chunk = []
+        if errors:
+            raise CSVImportError(errors)
+        if chunk:
+            written += _upsert(chunk, samples, primers)
+        plate_ids = [plate.id for plate in plates.values() if plate.name in touched]
+        touch(plate_ids)
+        # Too many wells to push individually: watchers reload the plates
+        transaction.on_commit(lambda: [hub.publish(plate_id) for plate_id in plate_ids])
+    return written
+
+
+def _upsert(chunk, samples, primers):
+    samples.add(sample for _, _, _, sample, _ in chunk)
+    primers.add(primer for _, _, _, _, primer in chunk)
+    Well.objects.bulk_create(
+        [Well(plate=plate, row=row, col=col, sample_id=samples.get(sample), primers_id=primers.get(primer))
+         for plate, row, col, sample, primer in chunk],
+        update_conflicts=True, unique_fields=['plate', 'row', 'col'], update_fields=['sample', 'primers'])
+    return len(chunk)
+
+
+@traced('db.plate_map', 'django')
+def plate_map(plate, with_ids=False):
+    # The stored wells of a plate as a PlateMap, from one query; with_ids also
+    # returns {(row, col): well id} for the wells that have a row. Each map gets its own
+    # string pool, so the names a request brings in (rejected edits too) go with it
+    layout = PlateMap(plate.size, pool=StringPool())
+    ids = {}
+    wells = list(plate.wells.values_list('id', 'row', 'col', 'sample__name', 'primers__name'))
+    if wells:
+        well_ids, rows, cols, samples, primers = zip(*wells)
+        ids = dict(zip(zip(rows, cols), well_ids))
+        layout.set((np.array(rows), np.array(cols)),
+                   [sample or '' for sample in samples], [primer or '' for primer in primers])
+    return (layout, ids) if with_ids else layout
+
+
+SCALARS = (str, int, float)
+
+
+def _names(value, count, field):
+    # Sample/primer values from JSON: None (leave alone), a name, or one name per well
+    if value is None:
+        return None
+    if isinstance(value, list):
+        if len(value) != count or not all(isinstance(v, SCALARS) for v in value):
+            raise ValueError(f'{field} must be a name or a list of one name per well ({count})')
+        return [str(v) for v in value]
+    if not isinstance(value, SCALARS):
+        raise ValueError(f'{field} must be a name or a list of one name per well ({count})')
+    return str(value)
+
+
+def _wells(edit, key):
+    # A well label or a list of them, as JSON gives them; parsed by the plate afterwards
+    wells = edit.get(key)
+    if wells is None:
+        raise ValueError(f'missing {key}')
+    if isinstance(wells, str):
+        return [wells]
+    if not isinstance(wells, list) or not all(isinstance(well, str) for well in wells):
+        raise ValueError(f'{key} must be a well label or a list of well labels')
+    return wells
+
+
+def _offset(edit, key, limit):
+    offset = edit.get(key, 0)
+    if isinstance(offset, bool) or not isinstance(offset, int):
+        raise ValueError(f'{key} must be a whole number')
+    if abs(offset) >= limit:
+        raise ValueError(f'{key} must be between {1 - limit} and {limit - 1} on this plate')
+    return offset
+
+
+def _apply_edit(layout, edit):
+    if not isinstance(edit, dict):
+        raise ValueError('edits must be objects')
+    op, wells = edit.get('op'), _wells(edit, 'wells')
+    if op == 'set':
+        layout.set(wells, _names(edit.get('sample'), len(wells), 'sample'),
+                   _names(edit.get('primers'), len(wells), 'primers'))
+    elif op == 'clear':
+        layout.clear(wells)
+    elif op == 'move':
+        layout.move(wells, _wells(edit, 'to'))
+    elif op == 'shift':
+        layout.shift(wells, _offset(edit, 'rows', layout.rows), _offset(edit, 'cols', layout.cols))
+    elif op == 'swap':
+        layout.swap(wells, _wells(edit, 'with'))
+    else:
+        raise ValueError(f'unknown op {op!r}')
+
+
+@traced('db.apply_edits', 'django')
+def apply_edits(plate, revision, edits):
+    """Apply a batch of well edits to a plate atomically.
+
+    ``edits`` is a list of dicts such as ``{"op": "set", "wells": ["A1"],
+    "sample": "x"}``, ``{"op": "move", "wells": [...], "to": [...]}`` or
+    ``{"op": "shift", "wells": [...], "rows": 1, "cols": 0}``. ``revision`` is
+    the plate revision the client last saw; if the plate has moved on,
+    Conflict is raised and nothing is written. Invalid edits raise ValueError.
+    Returns the new revision and the changed wells as (pos, sample, primers).
+    """
+    with transaction.atomic():
+        # Claim the revision first: a concurrent writer makes this update match nothing
+        claimed = Plate.objects.filter(pk=plate.pk, revision=revision).update(
+            revision=F('revision') + 1, updated=timezone.now())
+        if not claimed:
+            raise Conflict(Plate.objects.values_list('revision', flat=True).get(pk=plate.pk))
+
+        layout, ids = plate_map(plate, with_ids=True)
+        changes = []
+        layout.subscribe(changes.append)
+        with layout.batch():
+            for i, edit in enumerate(edits):
+                try:
+                    _apply_edit(layout, edit)
+                except (ValueError, TypeError, AttributeError) as e:
+                    raise ValueError(f'edit {i}: {e}') from e
+        if not changes:
+            return revision + 1, []
+        change = changes[0].compact()
+
+        sample, primers = change.values()
+        sample_ids, primer_ids = Interner(Sample), Interner(Primer)
+        sample_ids.add(sample)
+        primer_ids.add(primers)
+        updated, created = [], []
+        for row, col, s, p in zip(change.rows.tolist(), change.cols.tolist(), sample, primers):
+            well = Well(plate=plate, row=row, col=col, sample_id=sample_ids.get(s), primers_id=primer_ids.get(p))
+            if (row, col) in ids:
+                well.id = ids[row, col]
+                updated.append(well)
+            else:
+                created.append(well)
+        Well.objects.bulk_update(updated, ['sample', 'primers'])
+        Well.objects.bulk_create(created)
+        changed = list(zip(layout.label(change.rows, change.cols), sample, primers))
+        transaction.on_commit(lambda: hub.publish(plate.pk, revision + 1, changed))
+    return revision + 1, changed
@@ -0,0 +1,5 @@
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+
+def upload(text, name='run.csv'):
+    return SimpleUploadedFile(name, text.encode('utf-8'), content_type='text/csv')
@@ -0,0 +1,95 @@
+import io
+import json
+
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Plate, Project
+from ..services import Conflict, apply_edits, import_csv, plate_map
+from . import upload
+
+
+class ApplyEditsTests(TestCase):
+    def setUp(self):
+        import_csv(io.BytesIO(b'pos,sample,primers\nA1,x,p\nA2,y,p\n'), Project.objects.create(name='p'))
+        self.plate = Plate.objects.get()
+
+    def samples(self, *wells):
+        return plate_map(self.plate).get(list(wells))[0].tolist()
+
+    def test_edits_apply_together(self):
+        revision, changed = apply_edits(self.plate, 1, [
+            {'op': 'set', 'wells': ['B1'], 'sample': 'new'},
+            {'op': 'shift', 'wells': ['A1', 'A2'], 'rows': 2},
+        ])
+        self.assertEqual(revision, 2)
+        self.assertEqual(sorted(pos for pos, _, _ in changed), ['A1', 'A2', 'B1', 'C1', 'C2'])
+        self.assertEqual(self.samples('A1', 'B1', 'C1', 'C2'), ['', 'new', 'x', 'y'])
+
+    def test_stale_revision_conflicts(self):
+        apply_edits(self.plate, 1, [{'op': 'set', 'wells': 'A1', 'sample': 'mine'}])
+        with self.assertRaises(Conflict) as caught:
+            apply_edits(self.plate, 1, [{'op': 'set', 'wells': 'A1', 'sample': 'theirs'}])
+        self.assertEqual(caught.exception.revision, 2)
+        self.assertEqual(self.samples('A1'), ['mine'])
+
+    def test_invalid_edit_rolls_back_the_batch(self):
+        with self.assertRaises(ValueError):
+            apply_edits(self.plate, 1, [
+                {'op': 'set', 'wells': ['B1'], 'sample': 'new'},
+                {'op': 'move', 'wells': ['A1'], 'to': ['A2']},
+            ])
+        self.assertEqual(self.samples('A1', 'A2', 'B1'), ['x', 'y', ''])
+        self.plate.refresh_from_db()
+        self.assertEqual(self.plate.revision, 1)
+
+    def test_bad_arguments_are_value_errors(self):
+        for edit in [
+            {'op': 'shift', 'wells': ['A1'], 'rows': 10 ** 30},
+            {'op': 'set', 'wells': [['A1']], 'sample': 'x'},
+            {'op': 'set', 'wells': ['A1', 'A2'], 'sample': ['x']},
+            {'op': 'swap', 'wells': ['A1', 'A2'], 'with': ['A2', 'B1']},
+            {'op': 'nope', 'wells': 'A1'},
+        ]:
+            with self.subTest(edit=edit), self.assertRaises(ValueError):
+                apply_edits(self.plate, 1, [edit])
+
+
+class ApiTests(TestCase):
+    def setUp(self):
+        self.client.post(reverse('load_csv'), {
+            'file': upload('plate,pos,sample,primers\none,A1,x,y\n'), 'project': 'p', 'size': 96})
+        self.plate = Plate.objects.get()
+
+    def post_edits(self, revision, *edits):
+        return self.client.post(reverse('api_plate', args=[self.plate.id]),
+                                json.dumps({'revision': revision, 'edits': list(edits)}), content_type='application/json')
+
+    def test_api(self):
+        response = self.client.get(reverse('api_plate', args=[self.plate.id]))
+        self.assertEqual(response.json()['wells'], [{'pos': 'A1', 'sample': 'x', 'primers': 'y'}])
+        response = self.post_edits(1, {'op': 'set', 'wells': 'B1', 'sample': 'z'})
+        self.assertEqual(response.json(), {'revision': 2, 'wells': [{'pos': 'B1', 'sample': 'z', 'primers': ''}]})
+        self.assertEqual(self.post_edits(1, {'op': 'clear', 'wells': 'A1'}).status_code, 409)
+        self.assertEqual(self.post_edits(2, {'op': 'shift', 'wells': 'A1', 'cols': 99}).status_code, 400)
+
+    @override_settings(PLANNER_API_TOKEN='secret')
+    def test_api_posts_need_a_token_or_csrf(self):
+        client = Client(enforce_csrf_checks=True)
+        url = reverse('api_plate', args=[self.plate.id])
+        body = json.dumps({'revision': 1, 'edits': [{'op': 'clear', 'wells': 'A1'}]})
+        post = lambda **headers: client.post(url, body, content_type='application/json', headers=headers)
+        self.assertEqual(post().status_code, 403)
+        self.assertEqual(post(Authorization='Bearer wrong').status_code, 403)
+        self.assertEqual(post(Authorization='Bearer secret').json()['revision'], 2)
+        client.get(reverse('edit_well', args=[self.plate.id, 'A1']))
+        body = json.dumps({'revision': 2, 'edits': [{'op': 'set', 'wells': 'A1', 'sample': 'x'}]})
+        self.assertEqual(post(**{'X-CSRFToken': client.cookies['csrftoken'].value}).json()['revision'], 3)
+
+    def test_bad_requests(self):
+        url = reverse('api_plate', args=[self.plate.id])
+        for body in ['not json', '{"edits": []}', '{"revision": "x", "edits": []}', '{"revision": 1, "edits": 5}']:
+            with self.subTest(body=body):
+                self.assertEqual(self.client.post(url, body, content_type='application/json').status_code, 400)
+        self.assertEqual(self.client.put(url).status_code, 405)
+        self.assertEqual(self.client.get(reverse('api_plate', args=[self.plate.id + 1])).status_code, 404)
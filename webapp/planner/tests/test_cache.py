@@ -0,0 +1,38 @@
+import io
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Plate, Project, Sample, Well
+from ..services import apply_edits, import_csv
+
+
+class CacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        import_csv(io.BytesIO(b'pos,sample,primers\nA1,x,y\n'), Project.objects.create(name='p'))
+        self.plate = Plate.objects.get()
+
+    def sneak(self, sample):
+        # Change a well behind the app's back, leaving the revision alone
+        Well.objects.filter(plate=self.plate).update(sample=Sample.objects.create(name=sample))
+
+    def test_grid_is_cached_per_revision(self):
+        url = reverse('plate', args=[self.plate.id])
+        self.assertContains(self.client.get(url), '>x</a>')
+        self.sneak('sneaked')
+        with self.assertNumQueries(4):  # versions, plate and the project's plates; no wells
+            self.assertContains(self.client.get(url), '>x</a>')
+        apply_edits(self.plate, 1, [{'op': 'set', 'wells': 'B1', 'sample': 'new'}])
+        response = self.client.get(url)
+        self.assertContains(response, '>sneaked</a>')
+        self.assertContains(response, '>new</a>')
+
+    def test_plate_export_is_cached_per_revision(self):
+        url = reverse('save_plate_csv', args=[self.plate.id])
+        self.assertEqual(self.client.get(url).content, b'pos,sample,primers\nA1,x,y\n')
+        self.sneak('sneaked')
+        self.assertEqual(self.client.get(url).content, b'pos,sample,primers\nA1,x,y\n')
+        apply_edits(self.plate, 1, [{'op': 'set', 'wells': 'A2', 'sample': 'z'}])
+        self.assertEqual(self.client.get(url).content, b'pos,sample,primers\nA1,sneaked,y\nA2,z,\n')
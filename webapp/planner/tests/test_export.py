@@ -0,0 +1,56 @@
+import gzip
+import io
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Plate, Project
+from ..services import apply_edits, import_csv
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        cache.clear()  # plate ids repeat between tests, and exports are cached by id and revision
+        import_csv(io.BytesIO(b'plate,pos,sample,primers\none,B1,x,y\none,A1,w,\ntwo,A1,z,q\n'),
+                   Project.objects.create(name='p'))
+        import_csv(io.BytesIO(b'pos,sample\nA1,v\n'), Project.objects.create(name='other'))
+        self.plate = Plate.objects.get(name='one')
+
+    def get(self, name, *args, compress=False):
+        response = self.client.get(reverse(name, args=args), {'gzip': 1} if compress else {})
+        if response.streaming:
+            content = b''.join(response.streaming_content)
+        else:
+            content = response.content
+        return response, gzip.decompress(content) if compress else content
+
+    def test_plate(self):
+        response, content = self.get('save_plate_csv', self.plate.id)
+        self.assertEqual(content, b'pos,sample,primers\nA1,w,\nB1,x,y\n')
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="one.csv"')
+
+    def test_plate_follows_edits(self):
+        self.get('save_plate_csv', self.plate.id)
+        apply_edits(self.plate, 1, [{'op': 'set', 'wells': 'A1', 'sample': 'new'}])
+        self.assertEqual(self.get('save_plate_csv', self.plate.id)[1], b'pos,sample,primers\nA1,new,\nB1,x,y\n')
+
+    def test_project_is_streamed_with_a_plate_column(self):
+        project = Project.objects.get(name='p')
+        response, content = self.get('save_project_csv', project.id)
+        self.assertTrue(response.streaming)
+        self.assertEqual(content, b'plate,pos,sample,primers\none,A1,w,\none,B1,x,y\ntwo,A1,z,q\n')
+
+    def test_everything(self):
+        content = self.get('save_csv')[1].decode()
+        self.assertEqual(content.splitlines(), [
+            'project,plate,pos,sample,primers', 'other,1,A1,v,', 'p,one,A1,w,', 'p,one,B1,x,y', 'p,two,A1,z,q'])
+
+    def test_gzip(self):
+        for name, args in [('save_plate_csv', [self.plate.id]), ('save_project_csv', [self.plate.project_id])]:
+            with self.subTest(name=name):
+                response, content = self.get(name, *args, compress=True)
+                self.assertEqual(response['Content-Type'], 'application/gzip')
+                self.assertTrue(response['Content-Disposition'].endswith('.csv.gz"'))
+                self.assertEqual(content, self.get(name, *args)[1])
@@ -0,0 +1,39 @@
+import io
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from plateplanner.render import render_plate
+from ..models import Plate, Project
+from ..services import apply_edits, import_csv
+
+
+class ImageTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        import_csv(io.BytesIO(b'pos,sample,primers\nA1,x,y\n'), Project.objects.create(name='p'))
+        self.plate = Plate.objects.get()
+
+    def get(self, format, **headers):
+        return self.client.get(reverse('plate_image', args=[self.plate.id, format]), headers=headers)
+
+    def test_formats(self):
+        for format, content_type, magic in [('svg', 'image/svg+xml', b'<svg'), ('png', 'image/png', b'\x89PNG'),
+                                            ('pdf', 'application/pdf', b'%PDF')]:
+            with self.subTest(format=format):
+                response = self.get(format)
+                self.assertEqual(response['Content-Type'], content_type)
+                self.assertTrue(response.content.startswith(magic))
+        self.assertEqual(self.get('gif').status_code, 404)
+
+    def test_maps_are_cached_per_revision(self):
+        with mock.patch('planner.views.render_plate', wraps=render_plate) as render:
+            first = self.get('svg')
+            self.assertEqual(self.get('svg').content, first.content)
+            self.assertEqual(render.call_count, 1)
+            self.assertEqual(self.get('svg', if_none_match=first['ETag']).status_code, 304)
+            apply_edits(self.plate, 1, [{'op': 'set', 'wells': 'B1', 'sample': 'z'}])
+            self.assertIn(b'>z</text>', self.get('svg').content)
+            self.assertEqual(render.call_count, 2)
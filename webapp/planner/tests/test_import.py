@@ -0,0 +1,60 @@
+import io
+
+from django.test import TestCase
+from django.urls import reverse
+
+from plateplanner import get_geometry
+from plateplanner.csvio import CSVImportError
+from ..models import Plate, Project, Well
+from ..services import import_csv, plate_map
+from . import upload
+
+
+class ImportTests(TestCase):
+    def setUp(self):
+        self.project = Project.objects.create(name='p')
+
+    def test_import_creates_plates_and_wells(self):
+        written = import_csv(io.BytesIO(b'plate,pos,sample,primers\none,A1,x,y\ntwo,B2,z,\n'), self.project)
+        self.assertEqual(written, 2)
+        self.assertEqual(list(self.project.plates.values_list('name', 'revision')), [('one', 1), ('two', 1)])
+        layout = plate_map(self.project.plates.get(name='two'))
+        self.assertEqual(layout.get('B2')[0].tolist(), ['z'])
+
+    def test_errors_roll_back_the_whole_file(self):
+        with self.assertRaises(CSVImportError) as caught:
+            import_csv(io.BytesIO(b'pos,sample\nA1,x\nZ99,y\nA1,z\n'), self.project)
+        self.assertEqual([line for line, _ in caught.exception.errors], [3, 4])
+        self.assertFalse(Plate.objects.exists())
+        self.assertFalse(Well.objects.exists())
+
+    def test_malformed_csv_is_an_import_error(self):
+        with self.assertRaises(CSVImportError) as caught:
+            import_csv(io.BytesIO(b'pos,sample\nA1,' + b'x' * 200000 + b'\n'), self.project)
+        self.assertEqual(caught.exception.errors, [(2, 'field larger than field limit (131072)')])
+
+    def test_load_csv_rejects_malformed_files(self):
+        response = self.client.post(reverse('load_csv'), {
+            'file': upload('pos,sample\nA1,' + 'x' * 200000 + '\n'), 'project': 'p', 'size': 96})
+        self.assertContains(response, 'field larger than field limit', status_code=400)
+        self.assertFalse(Plate.objects.exists())
+
+    def test_reimport_updates_wells_in_place(self):
+        import_csv(io.BytesIO(b'pos,sample,primers\nA1,x,p\nA2,y,p\n'), self.project)
+        import_csv(io.BytesIO(b'pos,sample,primers\nA1,z,q\n'), self.project)
+        plate = Plate.objects.get()
+        self.assertEqual(plate.revision, 2)
+        self.assertEqual(Well.objects.count(), 2)
+        self.assertEqual(plate_map(plate).get(['A1', 'A2'])[0].tolist(), ['z', 'y'])
+
+    def test_large_imports_are_written_in_chunks(self):
+        rows = ''.join(f'{pos},s{i},p{i % 3}\n' for i, pos in enumerate(get_geometry(384).positions))
+        written = import_csv(io.BytesIO(f'pos,sample,primers\n{rows}'.encode()), self.project, 384, chunk_size=50)
+        self.assertEqual(written, 384)
+        self.assertEqual(Well.objects.count(), 384)
+
+    def test_load_csv_names_the_plate_after_the_file(self):
+        response = self.client.post(reverse('load_csv'), {
+            'file': upload('pos,sample\nA1,x\n', name='run7.csv'), 'project': 'p', 'size': 96})
+        self.assertRedirects(response, reverse('index'))
+        self.assertEqual(list(Plate.objects.values_list('name', flat=True)), ['run7'])
@@ -0,0 +1,43 @@
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from ..models import Plate, Project
+from ..views import PLATES_PER_PAGE
+from . import upload
+
+
+class IndexTests(TestCase):
+    def test_plates_are_paginated(self):
+        project = Project.objects.create(name='p')
+        Plate.objects.bulk_create([Plate(project=project, name=f'{i:03}') for i in range(PLATES_PER_PAGE + 5)])
+        with self.assertNumQueries(2):  # count and one page
+            response = self.client.get(reverse('index'))
+        self.assertEqual(len(response.context['page']), PLATES_PER_PAGE)
+        response = self.client.get(reverse('index'), {'page': 2})
+        self.assertEqual([plate['name'] for plate in response.context['page']], [f'{i:03}' for i in range(50, 55)])
+        self.assertEqual(len(self.client.get(reverse('index'), {'page': 'nope'}).context['page']), PLATES_PER_PAGE)
+
+
+class PlatePageTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.client.post(reverse('load_csv'), {
+            'file': upload('plate,pos,sample,primers\none,A1,x,y\n'), 'project': 'p', 'size': 96})
+        self.plate = Plate.objects.get()
+
+    def test_plate_page_shows_the_grid(self):
+        response = self.client.get(reverse('plate', args=[self.plate.id]))
+        self.assertContains(response, '>one</option>')
+        self.assertContains(response, 'title="A1: y"><a href="/plate/%d/edit/A1/">x</a>' % self.plate.id)
+        self.assertIn('Last-Modified', response)
+
+    def test_plate_page_etag_follows_the_project(self):
+        url = reverse('plate', args=[self.plate.id])
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        self.client.post(reverse('load_csv'), {
+            'file': upload('plate,pos,sample,primers\ntwo,A1,x,y\n'), 'project': 'p', 'size': 96})
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, '>two</option>')
@@ -0,0 +1,116 @@
+import asyncio
+import io
+import json
+from unittest import mock
+
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+
+from ..live import Hub, websocket_application
+from ..models import Plate, Project
+from ..services import apply_edits, import_csv, plate_map
+
+
+class HubTests(SimpleTestCase):
+    def run_hub(self, watch, publish, wait=0.05):
+        # Subscribe to the given plates, publish from another thread, and collect what each socket got
+        hub = Hub(window=0.01)
+
+        async def main():
+            queues = {plate_id: hub.subscribe(plate_id) for plate_id in watch}
+            await asyncio.to_thread(publish, hub)
+            await asyncio.sleep(wait)
+            return {plate_id: [queue.get_nowait() for _ in range(queue.qsize())] for plate_id, queue in queues.items()}
+        return hub, asyncio.run(main())
+
+    def test_bursts_are_coalesced(self):
+        def publish(hub):
+            hub.publish(1, 2, [('A1', 'x', ''), ('A2', 'y', '')])
+            hub.publish(1, 3, [('A1', 'z', 'p')])
+            hub.publish(2, 7, [('B1', 'w', '')])
+        _, received = self.run_hub([1], publish)
+        self.assertEqual(received, {1: [{'revision': 3, 'wells': [
+            {'pos': 'A1', 'sample': 'z', 'primers': 'p'}, {'pos': 'A2', 'sample': 'y', 'primers': ''}]}]})
+
+    def test_reload(self):
+        def publish(hub):
+            hub.publish(1, 2, [('A1', 'x', '')])
+            hub.publish(1)
+        _, received = self.run_hub([1], publish)
+        self.assertEqual(received, {1: [{'revision': 2, 'reload': True}]})
+
+    def test_unwatched_plates_are_ignored(self):
+        hub = Hub()
+        hub.publish(1, 2, [('A1', 'x', '')])  # no loop yet
+        queue = asyncio.run(self.subscribe_and_leave(hub))
+        hub.publish(1, 3, [('A1', 'x', '')])
+        self.assertEqual((dict(hub.groups), hub.pending, queue.qsize()), ({}, {}, 0))
+
+    async def subscribe_and_leave(self, hub):
+        queue = hub.subscribe(1)
+        hub.unsubscribe(1, queue)
+        return queue
+
+
+class SocketTests(SimpleTestCase):
+    def test_socket_receives_plate_updates(self):
+        async def main():
+            incoming, sent = asyncio.Queue(), []
+            await incoming.put({'type': 'websocket.connect'})
+
+            async def send(message):
+                sent.append(message)
+                if message['type'] == 'websocket.send':
+                    await incoming.put({'type': 'websocket.disconnect'})
+
+            scope = {'type': 'websocket', 'path': '/ws/plate/5/'}
+            with mock.patch('planner.live.hub', Hub(window=0)) as hub:
+                socket = asyncio.ensure_future(websocket_application(scope, incoming.get, send))
+                while 5 not in hub.groups:
+                    await asyncio.sleep(0)
+                hub.publish(5, 2, [('A1', 'x', 'y')])
+                await asyncio.wait_for(socket, 1)
+                self.assertEqual(dict(hub.groups), {})
+            return sent
+        sent = asyncio.run(main())
+        self.assertEqual(sent[0], {'type': 'websocket.accept'})
+        self.assertEqual(json.loads(sent[1]['text']), {'revision': 2, 'wells': [{'pos': 'A1', 'sample': 'x', 'primers': 'y'}]})
+
+    def test_unknown_paths_are_closed(self):
+        sent = []
+
+        async def receive():
+            return {'type': 'websocket.connect'}
+
+        async def send(message):
+            sent.append(message)
+        asyncio.run(websocket_application({'type': 'websocket', 'path': '/ws/other/'}, receive, send))
+        self.assertEqual(sent, [{'type': 'websocket.close', 'code': 4404}])
+
+
+class LiveEditTests(TestCase):
+    def setUp(self):
+        import_csv(io.BytesIO(b'pos,sample,primers\nA1,x,y\n'), Project.objects.create(name='p'))
+        self.plate = Plate.objects.get()
+
+    def test_edits_are_published_after_commit(self):
+        with mock.patch('planner.services.hub') as hub, self.captureOnCommitCallbacks(execute=True):
+            apply_edits(self.plate, 1, [{'op': 'set', 'wells': 'B1', 'sample': 'z'}])
+            hub.publish.assert_not_called()
+        hub.publish.assert_called_once_with(self.plate.pk, 2, [('B1', 'z', '')])
+
+    def test_imports_ask_watchers_to_reload(self):
+        with mock.patch('planner.services.hub') as hub, self.captureOnCommitCallbacks(execute=True):
+            import_csv(io.BytesIO(b'pos,sample\nA2,w\n'), self.plate.project)
+        hub.publish.assert_called_once_with(self.plate.pk)
+
+    def test_edit_form_detects_conflicts(self):
+        url = reverse('edit_well', args=[self.plate.id, 'A1'])
+        self.assertEqual(self.client.get(url).context['form'].initial['revision'], 1)
+        apply_edits(self.plate, 1, [{'op': 'set', 'wells': 'A1', 'sample': 'theirs'}])
+        response = self.client.post(url, {'sample': 'mine', 'primers': 'y', 'revision': 1})
+        self.assertEqual(response.status_code, 409)
+        self.assertContains(response, 'theirs', status_code=409)
+        response = self.client.post(url, {'sample': 'mine', 'primers': 'y', 'revision': 2})
+        self.assertRedirects(response, reverse('plate', args=[self.plate.id]))
+        self.assertEqual(plate_map(self.plate).get('A1')[0].tolist(), ['mine'])
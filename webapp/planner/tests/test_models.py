@@ -0,0 +1,32 @@
+import io
+
+from django.db import IntegrityError, transaction
+from django.test import TestCase
+
+from ..models import Plate, Primer, Project, Sample, Well
+from ..services import import_csv, plate_map
+
+
+class ModelTests(TestCase):
+    def setUp(self):
+        self.project = Project.objects.create(name='p')
+        import_csv(io.BytesIO(b'plate,pos,sample,primers\none,A1,x,p\none,B1,x,p\ntwo,A1,y,p\n'), self.project)
+
+    def test_names_are_stored_once(self):
+        self.assertEqual(sorted(Sample.objects.values_list('name', flat=True)), ['x', 'y'])
+        self.assertEqual(list(Primer.objects.values_list('name', flat=True)), ['p'])
+        self.assertEqual(Well.objects.filter(primers__name='p').count(), 3)
+
+    def test_plate_names_and_wells_are_unique(self):
+        plate = Plate.objects.get(name='one')
+        for create in [lambda: Plate.objects.create(project=self.project, name='one'),
+                       lambda: Well.objects.create(plate=plate, row=0, col=0)]:
+            with self.subTest(create=create), self.assertRaises(IntegrityError), transaction.atomic():
+                create()
+        Plate.objects.create(project=Project.objects.create(name='q'), name='one')
+
+    def test_wells_know_their_position(self):
+        plate = Plate.objects.create(project=self.project, name='big', size=1536)
+        well = Well.objects.create(plate=plate, row=31, col=47)
+        self.assertEqual((str(well), plate.geometry.wells), ('AF48', 1536))
+        self.assertEqual(plate_map(plate).label([31], [47]), ['AF48'])
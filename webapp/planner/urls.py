@@ -3,7 +3,13 @@ from . import views
 
 urlpatterns = [
     path('', views.index, name='index'),
-    path('edit/<str:pos>/', views.edit_plate, name='edit_plate'),
+    path('plate/<int:plate_id>/', views.plate, name='plate'),
+    path('plate/<int:plate_id>/edit/<str:pos>/', views.edit_well, name='edit_well'),
+    path('plate/<int:plate_id>/map.<str:format>', views.plate_image, name='plate_image'),
+    path('plate/<int:plate_id>/save/', views.save_csv, name='save_plate_csv'),
+    path('project/<int:project_id>/save/', views.save_csv, name='save_project_csv'),
+    path('api/plate/<int:plate_id>/', views.api_plate, name='api_plate'),
+    path('trace/', views.trace_dump, name='trace'),
     path('load/', views.load_csv, name='load_csv'),
     path('save/', views.save_csv, name='save_csv'),
 ]
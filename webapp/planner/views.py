@@ -1,47 +1,265 @@
+import io
+import json
+import zlib
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db.models import Count, Max
+from django.http import Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.middleware.csrf import CsrfViewMiddleware
+from django.template.loader import render_to_string
+from django.utils.crypto import constant_time_compare
+from django.utils.safestring import mark_safe
 from django.shortcuts import render, redirect, get_object_or_404
-from .models import Plate
-from .forms import PlateForm
-import pandas as pd
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import condition, require_http_methods
+from .models import Plate, Project, Well
+from .forms import UploadForm, WellForm
+from plateplanner import get_geometry, trace
+from plateplanner.csvio import CSVImportError, iter_csv
+from plateplanner.colours import ColourMap
+from plateplanner.render import render_plate
+from .services import Conflict, apply_edits, import_csv, plate_map
 
 
-# Create your views here.
-from django.shortcuts import render, redirect, get_object_or_404
-from .models import Plate
-from .forms import PlateForm
-import pandas as pd
+PLATES_PER_PAGE = 50
+
+
+def plate_version(request, plate_id=None, **kwargs):
+    # (revision, updated) of the requested plate, read once per request for the conditional GET checks
+    if plate_id is None:
+        return None
+    if not hasattr(request, 'plate_version'):
+        request.plate_version = Plate.objects.filter(pk=plate_id).values_list('revision', 'updated').first()
+    return request.plate_version
+
+def plate_etag(request, plate_id=None, **kwargs):
+    version = plate_version(request, plate_id)
+    return f'plate-{plate_id}-{version[0]}' if version else None
+
+def plate_last_modified(request, plate_id=None, **kwargs):
+    version = plate_version(request, plate_id)
+    return version[1] if version else None
+
+def project_version(request, plate_id=None, **kwargs):
+    # Plate count and latest change across the plate's project, for pages that list its siblings
+    if not hasattr(request, 'project_version'):
+        request.project_version = Plate.objects.filter(project__plates=plate_id).aggregate(
+            count=Count('id'), updated=Max('updated'))
+    return request.project_version
+
+def plate_page_etag(request, plate_id=None, **kwargs):
+    version = plate_version(request, plate_id)
+    if not version:
+        return None
+    project = project_version(request, plate_id)
+    return f'plate-{plate_id}-{version[0]}-{project["count"]}-{project["updated"].timestamp()}'
+
+def plate_page_last_modified(request, plate_id=None, **kwargs):
+    return project_version(request, plate_id)['updated'] if plate_version(request, plate_id) else None
 
 def index(request):
-    plates = Plate.objects.all().order_by('pos')
-    context = {'plates': plates}
-    return render(request, 'planner/index.html', context)
+    plates = Plate.objects.order_by('project__name', 'name').values('id', 'name', 'size', 'project_id', 'project__name')
+    page = Paginator(plates, PLATES_PER_PAGE).get_page(request.GET.get('page'))
+    return render(request, 'planner/index.html', {'page': page})
+
+def plate_cache_key(kind, plate):
+    # Keys carry the revision, so writing to a plate leaves its old entries to expire unused
+    return f'plate:{plate.id}:{plate.revision}:{kind}'
+
+def render_grid(plate):
+    geometry = plate.geometry
+    # Plate grid in row/column order, empty wells included; stored wells come from one query
+    grid = [[(label, '', '') for label in labels] for labels in geometry.labels]
+    wells = plate.wells.order_by('row', 'col').values_list('row', 'col', 'sample__name', 'primers__name')
+    for row, col, sample, primers in wells:
+        grid[row][col] = (geometry.labels[row, col], sample or '', primers or '')
+    context = {'plate': plate, 'col_labels': geometry.col_labels, 'grid': list(zip(geometry.row_labels, grid))}
+    return render_to_string('planner/plate_grid.html', context)
+
+# The page also lists the project's other plates, so it changes with them too
+@condition(etag_func=plate_page_etag, last_modified_func=plate_page_last_modified)
+def plate(request, plate_id):
+    plate = get_object_or_404(Plate.objects.select_related('project'), pk=plate_id)
+    grid_html = cache.get_or_set(plate_cache_key('grid', plate), lambda: render_grid(plate))
+    context = {
+        'plate': plate,
+        'plates': plate.project.plates.values('id', 'name'),
+        'grid_html': mark_safe(grid_html),
+    }
+    return render(request, 'planner/plate.html', context)
 
-def edit_plate(request, pos):
-    plate = get_object_or_404(Plate, pk=pos)
+def edit_well(request, plate_id, pos):
+    plate = get_object_or_404(Plate, pk=plate_id)
+    try:
+        (row,), (col,) = plate.geometry.parse(pos)
+    except ValueError:
+        raise Http404(f'{pos} is not a well on this plate')
+    pos = plate.geometry.labels[row, col]
+    status = 200
     if request.method == 'POST':
-        form = PlateForm(request.POST, instance=plate)
+        form = WellForm(request.POST)
         if form.is_valid():
-            form.save()
-            return redirect('index')
+            edit = {'op': 'set', 'wells': [pos], 'sample': form.cleaned_data['sample'], 'primers': form.cleaned_data['primers']}
+            try:
+                # Same path as the JSON API: revision checked, live clients notified
+                apply_edits(plate, form.cleaned_data['revision'], [edit])
+                return redirect('plate', plate_id=plate.id)
+            except Conflict as e:
+                # Show what the well holds now; saving again overwrites it knowingly
+                well = Well.objects.filter(plate=plate, row=row, col=col).select_related('sample', 'primers').first()
+                data = request.POST.copy()
+                data['revision'] = e.revision
+                form = WellForm(data)
+                form.is_valid()
+                current = f'{well.sample or "(empty)"} / {well.primers or "(empty)"}' if well else 'nothing'
+                form.add_error(None, f'Someone else changed this plate while you were editing. {pos} now holds '
+                                     f'{current}. Save again to replace it.')
+                status = 409
     else:
-        form = PlateForm(instance=plate)
-    return render(request, 'planner/edit_plate.html', {'form': form, 'plate': plate})
+        well = Well.objects.filter(plate=plate, row=row, col=col).select_related('sample', 'primers').first()
+        initial = {'sample': well.sample or '', 'primers': well.primers or ''} if well else {}
+        form = WellForm(initial={**initial, 'revision': plate.revision})
+    return render(request, 'planner/edit_well.html', {'form': form, 'plate': plate, 'pos': pos}, status=status)
 
 def load_csv(request):
-    if request.method == 'POST' and request.FILES.get('file'):
-        file = request.FILES['file']
-        df = pd.read_csv(file, dtype=str)
-        for index, row in df.iterrows():
-            Plate.objects.update_or_create(
-                pos=row['pos'],
-                defaults={'sample': row['sample'], 'primers': row['primers']}
-            )
-        return redirect('index')
-    return render(request, 'planner/load_csv.html')
-
-def save_csv(request):
-    plates = Plate.objects.all().order_by('pos')
-    df = pd.DataFrame.from_records(plates.values('pos', 'sample', 'primers'))
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="plates.csv"'
-    df.to_csv(path_or_buf=response, index=False)
+    if request.method == 'POST':
+        form = UploadForm(request.POST, request.FILES)
+        if form.is_valid():
+            file = form.cleaned_data['file']
+            project, _ = Project.objects.get_or_create(name=form.cleaned_data['project'])
+            try:
+                # A file without a plate column becomes a plate named after the file
+                import_csv(file, project, form.cleaned_data['size'], default_plate=Path(file.name).stem)
+            except CSVImportError as e:
+                return render(request, 'planner/load_csv.html', {'form': form, 'errors': e.errors}, status=400)
+            return redirect('index')
+    else:
+        form = UploadForm()
+    return render(request, 'planner/load_csv.html', {'form': form})
+
+MAP_TYPES = {'svg': 'image/svg+xml', 'png': 'image/png', 'pdf': 'application/pdf'}
+
+@condition(etag_func=plate_etag, last_modified_func=plate_last_modified)
+def plate_image(request, plate_id, format):
+    if format not in MAP_TYPES:
+        raise Http404(f'No {format} plate maps')
+    plate = get_object_or_404(Plate, pk=plate_id)
+    def build():
+        layout = plate_map(plate)
+        # Colours follow primer names, so a revision always renders the same way
+        colours = ColourMap()
+        colours.update(sorted(layout.distinct('primers')))
+        buffer = io.BytesIO()
+        render_plate(layout, buffer, format, title=plate.name, colours=colours)
+        return buffer.getvalue()
+    return HttpResponse(cache.get_or_set(plate_cache_key(f'map.{format}', plate), build), content_type=MAP_TYPES[format])
+
+def gzipped(chunks):
+    # Compress a stream of text chunks on the fly
+    compressor = zlib.compressobj(wbits=31)  # gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode('utf-8'))
+        if data:
+            yield data
+    yield compressor.flush()
+
+def export_rows(wells, columns):
+    # (project, plate, size, row, col, sample, primers) -> the requested leading columns + pos, sample, primers
+    for project, plate, size, row, col, sample, primers in wells:
+        leading = {'project': project, 'plate': plate}
+        yield (*(leading[c] for c in columns), get_geometry(size).labels[row, col], sample or '', primers or '')
+
+def plate_csv(plate, compress):
+    # One plate's export as bytes, cached per revision (and compression)
+    def build():
+        wells = (
+            plate.wells.order_by('col', 'row')
+            .values_list('row', 'col', 'sample__name', 'primers__name')
+        )
+        labels = plate.geometry.labels
+        rows = ((labels[row, col], sample or '', primers or '') for row, col, sample, primers in wells)
+        chunks = iter_csv(rows, ['pos', 'sample', 'primers'])
+        if compress:
+            return b''.join(gzipped(chunks))
+        return ''.join(chunks).encode('utf-8')
+    return cache.get_or_set(plate_cache_key('csv.gz' if compress else 'csv', plate), build)
+
+def attachment(content, filename, compress):
+    content_type = 'application/gzip' if compress else 'text/csv'
+    response_class = HttpResponse if isinstance(content, bytes) else StreamingHttpResponse
+    response = response_class(content, content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="{filename}{".gz" if compress else ""}"'
     return response
+
+@condition(etag_func=plate_etag, last_modified_func=plate_last_modified)
+def save_csv(request, project_id=None, plate_id=None):
+    # A single plate is small and served from the cache. Projects and everything are streamed
+    # straight from the database, plate by plate and column-major within a plate: a project
+    # adds a plate column, everything a project column too.
+    compress = bool(request.GET.get('gzip'))
+    wells = Well.objects.all()
+    if plate_id is not None:
+        plate = get_object_or_404(Plate, pk=plate_id)
+        return attachment(plate_csv(plate, compress), f'{plate.name}.csv', compress)
+    if project_id is not None:
+        project = get_object_or_404(Project, pk=project_id)
+        wells, columns, filename = wells.filter(plate__project=project), ['plate'], f'{project.name}.csv'
+    else:
+        columns, filename = ['project', 'plate'], 'plates.csv'
+    wells = (
+        wells
+        .order_by('plate__project__name', 'plate__name', 'col', 'row')
+        .values_list('plate__project__name', 'plate__name', 'plate__size', 'row', 'col', 'sample__name', 'primers__name')
+        .iterator(chunk_size=2000)
+    )
+    chunks = iter_csv(export_rows(wells, columns), [*columns, 'pos', 'sample', 'primers'])
+    return attachment(gzipped(chunks) if compress else chunks, filename, compress)
+
+def trace_dump(request):
+    # The in-process trace as Chrome-trace JSON, or ?format=summary for a table; only while tracing
+    if not trace.enabled:
+        raise Http404('Tracing is off')
+    if request.GET.get('format') == 'summary':
+        return HttpResponse(trace.format_summary(), content_type='text/plain')
+    return JsonResponse(trace.chrome_trace())
+
+def well_json(pos, sample, primers):
+    return {'pos': pos, 'sample': sample, 'primers': primers}
+
+def api_denied(request):
+    # Scripts send "Authorization: Bearer <PLANNER_API_TOKEN>"; anything else is a browser and needs the CSRF token
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() == 'bearer':
+        if settings.PLANNER_API_TOKEN and constant_time_compare(token.strip(), settings.PLANNER_API_TOKEN):
+            return None
+        return JsonResponse({'error': 'invalid API token'}, status=403)
+    return CsrfViewMiddleware(lambda request: None).process_view(request, None, (), {})
+
+@csrf_exempt
+@require_http_methods(['GET', 'POST'])
+def api_plate(request, plate_id):
+    # GET: the plate's revision and occupied wells.
+    # POST {"revision": n, "edits": [...]}: apply a batch of edits, answering with only the changed wells
+    plate = get_object_or_404(Plate, pk=plate_id)
+    if request.method == 'GET':
+        layout = plate_map(plate)
+        wells = [well_json(*record) for record in layout.records() if record[1] or record[2]]
+        return JsonResponse({'revision': plate.revision, 'size': plate.size, 'wells': wells})
+    denied = api_denied(request)
+    if denied:
+        return denied
+    try:
+        body = json.loads(request.body)
+        revision, edits = int(body['revision']), list(body['edits'])
+    except (ValueError, KeyError, TypeError):
+        return JsonResponse({'error': 'expected {"revision": <int>, "edits": [...]}'}, status=400)
+    try:
+        revision, changed = apply_edits(plate, revision, edits)
+    except Conflict as e:
+        return JsonResponse({'error': str(e), 'revision': e.revision}, status=409)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+    return JsonResponse({'revision': revision, 'wells': [well_json(*well) for well in changed]})
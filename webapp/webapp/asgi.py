@@ -13,4 +13,14 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'webapp.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from planner.live import websocket_application  # noqa: E402 (needs the app registry set up above)
+
+
+async def application(scope, receive, send):
+    # Websockets carry live plate updates; everything else is Django
+    if scope['type'] == 'websocket':
+        await websocket_application(scope, receive, send)
+    else:
+        await django_application(scope, receive, send)
@@ -10,11 +10,14 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.0/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# The shared plateplanner package must be installed: run "pip install -e ." in the repository root
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/5.0/howto/deployment/checklist/
@@ -27,6 +30,10 @@ DEBUG = True
 
 ALLOWED_HOSTS = []
 
+# Scripts POST edits to /api/plate/<id>/ with "Authorization: Bearer <token>" instead of
+# a CSRF token. Unset (the default) means only the browser, with its CSRF cookie, can edit.
+PLANNER_API_TOKEN = os.environ.get('PLANNER_API_TOKEN', '')
+
 
 # Application definition
 
@@ -41,6 +48,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'planner.middleware.TraceMiddleware',  # only active with PLATEPLANNER_TRACE set
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -82,6 +90,21 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/5.0/topics/cache/
+# Rendered plate grids and single-plate exports are cached under keys that include
+# the plate revision, so a write makes the old entries unreachable
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'plateplanner',
+        'TIMEOUT': 3600,
+        'OPTIONS': {'MAX_ENTRIES': 2000},
+    }
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
 